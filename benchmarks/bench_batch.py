@@ -0,0 +1,79 @@
+"""Throughput benchmark: 1 KB frames one at a time vs send_many()/recv_many().
+
+Streams (256,) float32 frames (1 KB each) from a child process to the
+parent and reports frames per second for:
+
+  single-slot  send() / poll() + recv() on the default pipe (lock + token)
+  ring         send() / poll() + recv() on a ring pipe
+  batched      send_many() of `batch` frames / recv_many() on a ring pipe
+
+The single-slot pipe only keeps the latest frame, so a frame it delivers
+may already have been overwritten; it is there as the per-frame cost
+baseline.
+
+Run with:
+    uv run python benchmarks/bench_batch.py
+"""
+
+import multiprocessing
+from time import perf_counter
+
+import numpy as np
+from mempipe import MemPipe
+
+N = 200_000
+SLOTS = 256
+BATCH = 64
+
+
+def _sender(pipe, mode, n, batch):
+    frames = np.random.rand(batch, 256).astype(np.float32)
+    if mode == "batched":
+        for _ in range(n // batch):
+            pipe.send_many(frames)
+    else:
+        frame = frames[0]
+        for _ in range(n):
+            pipe.send(frame)
+    pipe.send("done")
+
+
+def bench(mode, n=N, batch=BATCH):
+    slots = None if mode == "single-slot" else SLOTS
+    pipe = MemPipe(np.zeros(256, dtype=np.float32), slots=slots)
+    proc = multiprocessing.Process(target=_sender, args=(pipe, mode, n, batch))
+    proc.start()
+    got = 0
+    t0 = perf_counter()
+    try:
+        if mode == "batched":
+            while True:
+                msgs = pipe.recv_many(timeout=None)
+                if isinstance(msgs, np.ndarray):
+                    got += len(msgs)
+                    continue
+                got += sum(isinstance(m, np.ndarray) for m in msgs)
+                if any(isinstance(m, str) for m in msgs):
+                    break
+        else:
+            while True:
+                pipe.poll(timeout=None)
+                if isinstance(pipe.recv(), str):
+                    break
+                got += 1
+        elapsed = perf_counter() - t0
+    finally:
+        proc.join()
+        pipe.close()
+    return got, elapsed
+
+
+def main():
+    print(f"1 KB frames, {N} sent, ring of {SLOTS} slots, batches of {BATCH}")
+    for mode in ("single-slot", "ring", "batched"):
+        got, elapsed = bench(mode)
+        print(f"  {mode:12s} {got / elapsed:12,.0f} frames/s  ({got} received in {elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark: large passthrough values through the OS pipe vs. shared memory.
+
+A child process receives a non-ndarray value (a bytes object, or a list
+holding one float64 array) and answers with a short string. The round trip
+is reported for MemPipe(oob_threshold=None), where the whole value is
+pickled through the OS pipe, and for oob_threshold=0, where every buffer
+goes through a shared segment of its own and only the pickle skeleton
+crosses the pipe. The size at which the second wins is what the default
+oob_threshold is based on.
+
+Run with:
+    uv run python benchmarks/bench_passthrough.py
+"""
+
+import multiprocessing
+from time import perf_counter_ns
+
+import numpy as np
+from mempipe import MemPipe
+
+
+SIZES = [16 << 10, 64 << 10, 256 << 10, 1 << 20, 16 << 20]
+MODES = {"pipe": None, "shm": 0}
+
+
+def _ack(in_conn, out_conn, n):
+    for _ in range(n):
+        in_conn.poll(timeout=None)
+        in_conn.recv()
+        out_conn.send("ok")
+
+
+def round_trip(value, threshold, n=50, warmup=5):
+    there, back = MemPipe(oob_threshold=threshold), MemPipe()
+    proc = multiprocessing.Process(target=_ack, args=(there, back, n + warmup))
+    proc.start()
+    try:
+        samples = np.empty(n, dtype=np.int64)
+        for i in range(-warmup, n):
+            t0 = perf_counter_ns()
+            there.send(value)
+            back.poll(timeout=None)
+            back.recv()
+            if i >= 0:
+                samples[i] = perf_counter_ns() - t0
+    finally:
+        proc.join(timeout=10)
+        if proc.is_alive():
+            proc.terminate()
+        there.close()
+        back.close()
+    return samples
+
+
+def main():
+    for size in SIZES:
+        values = {"bytes": b"x" * size, "[ndarray]": [np.random.rand(size // 8)]}
+        print(f"[{size >> 10} KB]")
+        for label, value in values.items():
+            line = "  ".join(f"{mode} p50 {np.median(round_trip(value, t)) / 1e3:9.1f} us"
+                             for mode, t in MODES.items())
+            print(f"  {label:<10} {line}")
+
+
+if __name__ == "__main__":
+    main()
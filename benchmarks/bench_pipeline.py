@@ -0,0 +1,61 @@
+"""Benchmark: a 5-stage chain that adds to a frame, copying vs in place.
+
+Each stage adds its index to the frame. In copy mode every stage copies the
+frame out of its input pipe and its result into its output pipe; in place
+the stages modify one pooled buffer and pass its index along, so the only
+copies are into the pool in send() and out of it in recv().
+
+Run with:
+    uv run python benchmarks/bench_pipeline.py
+"""
+
+from functools import partial
+from time import perf_counter
+
+import numpy as np
+from mempipe import Pipeline
+
+NUM_STAGES = 5
+SHAPE = (4000, 2000)    # 64 MB of float64
+N = 10
+
+
+def add(index, x):
+    return x + index
+
+
+def add_inplace(index, x):
+    x += index
+
+
+def bench(inplace):
+    arr = np.random.rand(*SHAPE)
+    fn = add_inplace if inplace else add
+    stages = [partial(fn, i) for i in range(NUM_STAGES)]
+    kwargs = dict(inplace=True, buffers=2) if inplace else dict(slots=1)
+    with Pipeline(stages, ex_array=arr, **kwargs) as pipeline:
+        # Warm up: map the segments and fault their pages in.
+        pipeline.send(arr)
+        pipeline.poll(timeout=None)
+        pipeline.recv()
+        samples = []
+        for _ in range(N):
+            t0 = perf_counter()
+            pipeline.send(arr)
+            pipeline.poll(timeout=None)
+            result = pipeline.recv()
+            samples.append(perf_counter() - t0)
+    assert np.allclose(result, arr + sum(range(NUM_STAGES)))
+    return np.array(samples)
+
+
+def main():
+    print(f"{NUM_STAGES} stages, frame {SHAPE} float64 ({np.prod(SHAPE) * 8 / 1e6:.0f} MB)")
+    for inplace in (False, True):
+        samples = bench(inplace)
+        label = "in place" if inplace else "copying"
+        print(f"  {label:9s} median {np.median(samples) * 1e3:8.1f} ms per frame end to end")
+
+
+if __name__ == "__main__":
+    main()
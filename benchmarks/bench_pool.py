@@ -0,0 +1,60 @@
+"""Benchmark: first-frame latency of a fresh MemPipe, with and without a MemPool.
+
+Mimics a pipeline that is rebuilt for every trial: each trial makes a new
+ring MemPipe, sends one frame (which creates the segment and faults its
+pages in), receives it and closes the pipe. With a MemPool the segment is
+a block of one pre-faulted segment that every trial reuses.
+
+Run with:
+    uv run python benchmarks/bench_pool.py
+"""
+
+from time import perf_counter
+
+import numpy as np
+from mempipe import MemPipe, MemPool
+
+TRIALS = 10
+
+
+def trial(frame, pool):
+    t0 = perf_counter()
+    pipe = MemPipe(slots=2, pool=pool)
+    pipe.send(frame)
+    t_send = perf_counter()
+    pipe.poll(timeout=None)
+    pipe.recv()
+    t_recv = perf_counter()
+    pipe.close()
+    t_close = perf_counter()
+    return t_send - t0, t_recv - t_send, t_close - t_recv
+
+
+def bench(nbytes, use_pool):
+    frame = np.random.rand(nbytes // 8)
+    pool = None
+    if use_pool:
+        t0 = perf_counter()
+        pool = MemPool(3 * nbytes)
+        setup = perf_counter() - t0
+    try:
+        samples = np.array([trial(frame, pool) for _ in range(TRIALS)])
+    finally:
+        if pool is not None:
+            pool.close()
+    return np.median(samples, axis=0), setup if use_pool else 0.0
+
+
+def main():
+    print(f"median of {TRIALS} trials: new pipe + first send / first recv / close")
+    for nbytes in (1 << 20, 16 << 20, 128 << 20):
+        for use_pool in (False, True):
+            (send_s, recv_s, close_s), setup_s = bench(nbytes, use_pool)
+            label = "pool" if use_pool else "no pool"
+            extra = f"  (pool setup {setup_s * 1e3:.0f} ms, once)" if use_pool else ""
+            print(f"  {nbytes >> 20:4d} MB {label:8s} send {send_s * 1e3:8.2f} ms  "
+                  f"recv {recv_s * 1e3:8.2f} ms  close {close_s * 1e3:6.2f} ms{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark: first-frame latency of a large frame, with and without prefault.
+
+A fresh ring MemPipe carries one (4000, 4000) float64 frame (128 MB) to a
+child process. Without prefault the sender page-faults the segment in while
+it copies the frame, and the receiver again while it copies it out; with
+prefault=True both ends fault their mapping in up front (when the pipe is
+made and when the receiver attaches), so the first frame costs about what
+every later one does.
+
+Run with:
+    uv run python benchmarks/bench_prefault.py
+"""
+
+import multiprocessing
+from time import perf_counter
+
+import numpy as np
+from mempipe import MemPipe
+
+SHAPE = (4000, 4000)
+
+
+def _receiver(pipe, out):
+    pipe.poll(timeout=None)     # attaches (and prefaults) on the init message
+    t0 = perf_counter()
+    pipe.recv()
+    first = perf_counter() - t0
+    pipe.poll(timeout=None)
+    t0 = perf_counter()
+    pipe.recv()
+    out.put((first, perf_counter() - t0))
+
+
+def bench(prefault):
+    frame = np.random.rand(*SHAPE)
+    t0 = perf_counter()
+    pipe = MemPipe(frame, slots=2, prefault=prefault)
+    setup = perf_counter() - t0
+    out = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_receiver, args=(pipe, out))
+    proc.start()
+    try:
+        t0 = perf_counter()
+        pipe.send(frame)
+        send_first = perf_counter() - t0
+        t0 = perf_counter()
+        pipe.send(frame)
+        send_next = perf_counter() - t0
+        recv_first, recv_next = out.get()
+    finally:
+        proc.join()
+        pipe.close()
+    return setup, send_first, send_next, recv_first, recv_next
+
+
+def main():
+    print(f"frame {SHAPE} float64 ({np.prod(SHAPE) * 8 / 1e6:.0f} MB), ring of 2")
+    for prefault in (False, True):
+        setup, send_first, send_next, recv_first, recv_next = bench(prefault)
+        print(f"  prefault={prefault!s:5s}  new pipe {setup * 1e3:6.1f} ms  "
+              f"send first/next {send_first * 1e3:6.1f}/{send_next * 1e3:6.1f} ms  "
+              f"recv first/next {recv_first * 1e3:6.1f}/{recv_next * 1e3:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Micro-benchmark: per-message latency of MemPipe for small frames.
+
+Sends a (64, 32) float32 frame through a single MemPipe in one process
+(send -> poll -> recv) and reports the mean and median cost of one
+message. Running both ends in the same process keeps scheduler noise out
+of the number, so it reflects the per-call overhead of the pipe itself
+(attaching to shared memory, locking, the control token and the copy).
+
+Run with:
+    uv run python benchmarks/bench_small_frames.py
+"""
+
+from time import perf_counter_ns
+
+import numpy as np
+from mempipe import MemPipe
+
+
+def bench(shape=(64, 32), dtype=np.float32, n=20000, warmup=1000):
+    frame = np.random.rand(*shape).astype(dtype)
+    mp = MemPipe(frame)
+    p_in, p_out = mp.Pipe()
+    try:
+        for _ in range(warmup):
+            p_out.send(frame)
+            p_in.poll()
+            p_in.recv()
+
+        samples = np.empty(n, dtype=np.int64)
+        for i in range(n):
+            t0 = perf_counter_ns()
+            p_out.send(frame)
+            p_in.poll()
+            p_in.recv()
+            samples[i] = perf_counter_ns() - t0
+    finally:
+        mp.close()
+    return samples
+
+
+def main():
+    samples = bench()
+    print("MemPipe send+poll+recv, shape=(64, 32), dtype=float32")
+    print(f"  mean:   {samples.mean() / 1e3:8.2f} us")
+    print(f"  median: {np.median(samples) / 1e3:8.2f} us")
+    print(f"  p99:    {np.percentile(samples, 99) / 1e3:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark: lock-free ring (slots=N) vs. the Lock + OS-pipe single slot.
+
+Two measurements per frame size, for MemPipe(ex, slots=None) (a
+multiprocessing.Lock around every copy plus a pickled "GO" token per frame)
+and MemPipe(ex, slots=4) (sequence counters in the shared header, no lock and
+no per-frame token):
+
+* in-process: send -> poll -> recv in one process, i.e. the per-message cost
+  of the pipe itself without any scheduler involvement;
+* ping-pong: a frame bounced off a child process over two pipes; half the
+  round trip is reported as the one-way latency.
+
+Run with:
+    uv run python benchmarks/bench_spsc.py
+"""
+
+import multiprocessing
+from time import perf_counter_ns
+
+import numpy as np
+from mempipe import MemPipe
+
+
+SIZES = {"8 KB": (64, 32), "128 KB": (256, 128), "1 MB": (512, 512)}
+MODES = {"Lock+Pipe": None, "lock-free": 4}
+
+
+def in_process(shape, slots, n=5000, warmup=500):
+    frame = np.random.rand(*shape).astype(np.float32)
+    mp = MemPipe(frame, slots=slots)
+    try:
+        samples = np.empty(n, dtype=np.int64)
+        for i in range(-warmup, n):
+            t0 = perf_counter_ns()
+            mp.send(frame)
+            mp.poll(timeout=None)
+            mp.recv()
+            if i >= 0:
+                samples[i] = perf_counter_ns() - t0
+    finally:
+        mp.close()
+    return samples
+
+
+def _echo(in_conn, out_conn, n):
+    for _ in range(n):
+        in_conn.poll(timeout=None)
+        out_conn.send(in_conn.recv())
+
+
+def ping_pong(shape, slots, n=2000, warmup=200):
+    frame = np.random.rand(*shape).astype(np.float32)
+    there, back = MemPipe(frame, slots=slots), MemPipe(frame, slots=slots)
+    proc = multiprocessing.Process(target=_echo, args=(there, back, n + warmup))
+    proc.start()
+    try:
+        samples = np.empty(n, dtype=np.int64)
+        for i in range(-warmup, n):
+            t0 = perf_counter_ns()
+            there.send(frame)
+            back.poll(timeout=None)
+            back.recv()
+            if i >= 0:
+                samples[i] = (perf_counter_ns() - t0) // 2
+    finally:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
+        there.close()
+        back.close()
+    return samples
+
+
+def report(name, samples):
+    p50, p99 = np.percentile(samples, [50, 99]) / 1e3
+    print(f"  {name:<10} p50 {p50:8.2f} us   p99 {p99:8.2f} us")
+
+
+def main():
+    for label, shape in SIZES.items():
+        print(f"[{label}: {shape} float32]")
+        for bench in (in_process, ping_pong):
+            print(f" {bench.__name__}")
+            for mode, slots in MODES.items():
+                report(mode, bench(shape, slots))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark: one-way frame latency for each poll() wait mode.
+
+A child process sends a small int64 frame every PERIOD seconds, stamped
+with time.perf_counter_ns() (a system-wide monotonic clock on Linux), and
+the parent waits for it with poll(timeout=None). With a gap between frames
+the receiver is always idle when a frame lands, which is where the kernel
+wakeup of a blocking poll() shows up. For each wait mode of a ring pipe
+the script prints p50/p99/p99.9 and a log2 latency histogram.
+
+"spin" only pays off when sender and receiver have a core each; on a single
+CPU the spinning receiver competes with the sender for it.
+
+Run with:
+    uv run python benchmarks/bench_wait_modes.py
+"""
+
+import multiprocessing
+import time
+
+import numpy as np
+from mempipe import MemPipe
+
+
+N = 2000
+PERIOD = 0.001
+MODES = {
+    "spin": dict(wait="spin"),
+    "hybrid": dict(wait="hybrid", spin_us=200),
+    "block": dict(wait="block"),
+}
+
+
+def _ticker(out_conn, n, period):
+    frame = np.zeros(16, dtype=np.int64)
+    for _ in range(n):
+        time.sleep(period)
+        frame[0] = time.perf_counter_ns()
+        out_conn.send(frame)
+
+
+def measure(n=N, period=PERIOD, **kwargs):
+    mp = MemPipe(np.zeros(16, dtype=np.int64), slots=8, **kwargs)
+    proc = multiprocessing.Process(target=_ticker, args=(mp, n, period))
+    proc.start()
+    samples = np.empty(n, dtype=np.int64)
+    try:
+        for i in range(n):
+            mp.poll(timeout=None)
+            frame = mp.recv(copy=False)
+            samples[i] = time.perf_counter_ns() - frame[0]
+            mp.release()
+    finally:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
+        mp.close()
+    return samples / 1e3
+
+
+def histogram(us):
+    edges = 2.0 ** np.arange(0, 15)
+    counts, _ = np.histogram(us, bins=np.concatenate([[0], edges]))
+    width = 40 / max(counts.max(), 1)
+    for hi, count in zip(edges, counts):
+        if count:
+            print(f"    <= {hi:7.0f} us | {'#' * max(1, int(count * width)):<40} {count}")
+
+
+def main():
+    print(f"{N} frames, one every {PERIOD * 1e3:.1f} ms")
+    for name, kwargs in MODES.items():
+        us = measure(**kwargs)
+        p50, p99, p999 = np.percentile(us, [50, 99, 99.9])
+        print(f"\n[{name}] p50 {p50:8.1f} us   p99 {p99:8.1f} us   p99.9 {p999:8.1f} us")
+        histogram(us)
+
+
+if __name__ == "__main__":
+    main()
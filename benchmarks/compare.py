@@ -0,0 +1,68 @@
+"""Compare two result files of benchmarks/suite.py and flag regressions.
+
+For every case found in both files, prints the ratio new/baseline of the
+p50 and p99 latencies and of the throughput. A case regressed if its p50
+latency grew, or its throughput shrank, by more than --threshold (10% by
+default). The exit status is 1 if any case regressed, so this can gate CI:
+
+    uv run python benchmarks/compare.py baseline.jsonl results.jsonl
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path):
+    "(environment record, {case: record}) of a results file."
+    env, cases = {}, {}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("bench") == "env":
+                env = record
+            elif "skipped" not in record:
+                cases[record["case"]] = record
+    return env, cases
+
+
+def compare(base, new, threshold):
+    "[(case, p50 ratio, p99 ratio, throughput ratio, regressed)] for cases in both."
+    rows = []
+    for case in sorted(base.keys() & new.keys()):
+        b, n = base[case], new[case]
+        p50 = n["lat_p50_us"] / b["lat_p50_us"]
+        p99 = n["lat_p99_us"] / b["lat_p99_us"]
+        tput = n["frames_per_s"] / b["frames_per_s"]
+        rows.append((case, p50, p99, tput, p50 > 1 + threshold or tput < 1 / (1 + threshold)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline")
+    parser.add_argument("results")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative change that counts as a regression (default 0.1)")
+    args = parser.parse_args(argv)
+    base_env, base = load(args.baseline)
+    new_env, new = load(args.results)
+    for key in ("commit", "python", "numpy", "platform", "cpus"):
+        if base_env.get(key) != new_env.get(key):
+            print(f"{key}: {base_env.get(key)} -> {new_env.get(key)}")
+    rows = compare(base, new, args.threshold)
+    print(f"{'case':64s} {'p50':>7s} {'p99':>7s} {'tput':>7s}")
+    for case, p50, p99, tput, regressed in rows:
+        print(f"{case:64s} {p50:7.2f} {p99:7.2f} {tput:7.2f}{'  REGRESSED' if regressed else ''}")
+    only = (base.keys() ^ new.keys())
+    if only:
+        print(f"{len(only)} case(s) in only one of the files")
+    regressions = sum(row[4] for row in rows)
+    print(f"{regressions} of {len(rows)} cases regressed by more than {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""Benchmark suite: MemPipe against multiprocessing.Pipe, Queue and raw SharedMemory.
+
+Two benchmarks, swept over their parameters:
+
+* transfer: one sender, one receiver in another process, for every
+  transport x frame size x dtype (x slot count for ring pipes). Latency
+  is measured with one frame in flight, from just before send() to just
+  after recv() returned the copy, using monotonic timestamps written into
+  the frame itself. Throughput is measured separately, with frames sent
+  back to back.
+* pipeline: a chain of `depth` relay processes, for mempipe.Pipeline
+  (copying and in place) and a chain of multiprocessing.Pipe processes.
+  Latency is end to end with one frame in flight; throughput keeps two
+  frames in flight.
+
+Processes are started and warmed up before anything is timed. Cases
+that would not fit in half of RAM (or of /dev/shm) are reported as
+skipped.
+
+Results go to stdout as JSON lines, one per case, after a first line
+describing the machine. A summary goes to stderr:
+
+    uv run python benchmarks/suite.py > results.jsonl
+    uv run python benchmarks/suite.py --full > results.jsonl
+    uv run python benchmarks/suite.py --bench transfer --sizes 1K,16M \\
+        --transports mempipe-ring,pipe --slots 2,16 --dtypes float32
+    uv run python benchmarks/compare.py baseline.jsonl results.jsonl
+"""
+
+import argparse
+from datetime import datetime, timezone
+import json
+import multiprocessing
+from multiprocessing import Pipe, Process
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import mempipe
+from mempipe import Pipeline
+
+from transports import TRANSPORTS
+
+QUICK = dict(sizes="1K,64K,1M,16M", dtypes="float64", slots="4", depths="1,4",
+             transports=",".join(TRANSPORTS))
+FULL = dict(sizes="1K,16K,256K,4M,64M,1G", dtypes="float64,float32,uint8", slots="2,4,16",
+            depths="1,2,4,8", transports=",".join(TRANSPORTS))
+WARMUP = 3
+PIPELINE_WINDOW = 2
+
+# Bytes of each copy of a frame a case keeps alive, in RAM and in /dev/shm.
+_RAM_COPIES = {"mempipe": 3, "mempipe-ring": 2, "pipe": 4, "queue": 4, "shm-raw": 2}
+
+
+def _parse_size(text):
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper().rstrip("B")
+    if text[-1:] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def _label(nbytes):
+    for unit, size in (("G", 1 << 30), ("M", 1 << 20), ("K", 1 << 10)):
+        if nbytes >= size and nbytes % size == 0:
+            return f"{nbytes // size}{unit}"
+    return str(nbytes)
+
+
+def _counts(nbytes, scale):
+    "Frames to time for latency and for throughput: fewer as frames grow."
+    n_lat = int(min(max(256e6 / nbytes, 5), 1000) * scale)
+    n_tput = int(min(max(1e9 / nbytes, 5), 20000) * scale)
+    return max(n_lat, 1), max(n_tput, 2)
+
+
+def _limits():
+    "(bytes of RAM, bytes of /dev/shm) a case may use."
+    ram = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 1 << 40
+    try:
+        st = os.statvfs("/dev/shm")
+        shm = st.f_bavail * st.f_frsize
+    except (AttributeError, OSError):
+        shm = ram
+    return ram // 2, shm // 2
+
+
+def _frame(nbytes, dtype):
+    dtype = np.dtype(dtype)
+    return np.random.default_rng(0).integers(0, 100, nbytes // dtype.itemsize).astype(dtype)
+
+
+def _stamp(frame):
+    "Write the current monotonic time into a frame's first 8 bytes."
+    frame.view(np.uint8)[:8].view(np.int64)[0] = time.monotonic_ns()
+
+
+def _stamp_of(frame):
+    return int(frame.view(np.uint8)[:8].view(np.int64)[0])
+
+
+def _percentiles(samples_ns):
+    p50, p90, p99 = np.percentile(samples_ns, [50, 90, 99]) / 1e3
+    return {"lat_p50_us": round(p50, 2), "lat_p90_us": round(p90, 2), "lat_p99_us": round(p99, 2),
+            "lat_max_us": round(samples_ns.max() / 1e3, 2)}
+
+
+def _throughput(n, nbytes, elapsed_ns):
+    per_s = n / (elapsed_ns / 1e9)
+    return {"frames_per_s": round(per_s, 1), "gb_per_s": round(per_s * nbytes / 1e9, 3)}
+
+
+# -- transfer ----------------------------------------------------------------
+
+
+def _transfer_receiver(transport, n_lat, n_tput, ack, results):
+    lat = np.empty(n_lat, dtype=np.int64)
+    for i in range(-WARMUP, n_lat):
+        frame = transport.recv()
+        t = time.monotonic_ns()
+        if i >= 0:
+            lat[i] = t - _stamp_of(frame)
+        ack.send_bytes(b"")
+    # The sender stamps only the first frame of the stream.
+    start = _stamp_of(transport.recv())
+    for _ in range(n_tput - 1):
+        transport.recv()
+    results.send((lat, time.monotonic_ns() - start))
+
+
+def transfer(name, nbytes, dtype, slots, scale):
+    cls, _ = TRANSPORTS[name]
+    frame = _frame(nbytes, dtype)
+    n_lat, n_tput = _counts(nbytes, scale)
+    transport = cls(frame, slots=slots)
+    ack_r, ack_w = Pipe(duplex=False)
+    res_r, res_w = Pipe(duplex=False)
+    proc = Process(target=_transfer_receiver, args=(transport, n_lat, n_tput, ack_w, res_w))
+    proc.start()
+    try:
+        for _ in range(WARMUP + n_lat):
+            _stamp(frame)
+            transport.send(frame)
+            ack_r.recv_bytes()
+        _stamp(frame)
+        for _ in range(n_tput):
+            transport.send(frame)
+        lat, elapsed = res_r.recv()
+    finally:
+        proc.join(timeout=60)
+        if proc.is_alive():
+            proc.terminate()
+        transport.close()
+    return {**_percentiles(lat), **_throughput(n_tput, nbytes, elapsed), "n_lat": n_lat, "n_tput": n_tput}
+
+
+# -- pipeline ----------------------------------------------------------------
+
+
+def forward(x):
+    return x
+
+
+def touch(x):
+    return None
+
+
+def _relay(in_conn, out_conn):
+    while True:
+        msg = in_conn.recv()
+        out_conn.send(msg)
+        if msg is None:
+            return
+
+
+class _PipeChain:
+    "depth relay processes joined by multiprocessing.Pipe."
+
+    def __init__(self, depth):
+        self.conns = [Pipe(duplex=False) for _ in range(depth + 1)]
+        self.procs = [Process(target=_relay, args=(self.conns[i][0], self.conns[i + 1][1]), daemon=True)
+                      for i in range(depth)]
+        for proc in self.procs:
+            proc.start()
+
+    def send(self, frame):
+        self.conns[0][1].send(frame)
+
+    def recv(self):
+        return self.conns[-1][0].recv()
+
+    def close(self):
+        self.send(None)
+        self.recv()
+        for proc in self.procs:
+            proc.join(timeout=10)
+
+
+class _MemChain:
+    def __init__(self, depth, frame, inplace, slots):
+        kwargs = dict(inplace=True) if inplace else dict(slots=slots)
+        self.pipeline = Pipeline([touch if inplace else forward] * depth, ex_array=frame, **kwargs)
+
+    def send(self, frame):
+        self.pipeline.send(frame)
+
+    def recv(self):
+        self.pipeline.poll(timeout=None)
+        return self.pipeline.recv()
+
+    def close(self):
+        self.pipeline.close()
+
+
+PIPELINES = ("mempipe", "mempipe-inplace", "pipe")
+
+
+def pipeline(name, depth, nbytes, dtype, slots, scale):
+    frame = _frame(nbytes, dtype)
+    n_lat, n_tput = _counts(nbytes * depth, scale)
+    chain = _PipeChain(depth) if name == "pipe" else _MemChain(depth, frame, name == "mempipe-inplace", slots)
+    try:
+        lat = np.empty(n_lat, dtype=np.int64)
+        for i in range(-WARMUP, n_lat):
+            t0 = time.monotonic_ns()
+            chain.send(frame)
+            chain.recv()
+            if i >= 0:
+                lat[i] = time.monotonic_ns() - t0
+        # Feed from a thread: a frame larger than the OS pipe's buffer
+        # blocks send() until the far end reads it, so a sender that also
+        # has to receive would deadlock the Pipe chain.
+        window = threading.Semaphore(PIPELINE_WINDOW)
+
+        def feed():
+            for _ in range(n_tput):
+                window.acquire()
+                chain.send(frame)
+
+        feeder = threading.Thread(target=feed)
+        t0 = time.monotonic_ns()
+        feeder.start()
+        for _ in range(n_tput):
+            chain.recv()
+            window.release()
+        elapsed = time.monotonic_ns() - t0
+        feeder.join()
+    finally:
+        chain.close()
+    return {**_percentiles(lat), **_throughput(n_tput, nbytes, elapsed), "n_lat": n_lat, "n_tput": n_tput}
+
+
+# -- driver ------------------------------------------------------------------
+
+
+def _environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    try:
+        from importlib.metadata import version
+        mempipe_version = version("mempipe")
+    except Exception:
+        mempipe_version = None
+    return {"bench": "env", "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": commit, "mempipe": mempipe_version, "mempipe_path": os.path.dirname(mempipe.__file__),
+            "python": platform.python_version(), "numpy": np.__version__,
+            "platform": platform.platform(), "machine": platform.machine(), "cpus": cpus,
+            "start_method": multiprocessing.get_start_method()}
+
+
+def cases(args):
+    sizes = [_parse_size(s) for s in args.sizes.split(",")]
+    dtypes = args.dtypes.split(",")
+    slot_counts = [int(s) for s in args.slots.split(",")]
+    if "transfer" in args.bench:
+        for name in args.transports.split(","):
+            if name not in TRANSPORTS:
+                raise SystemExit(f"unknown transport {name!r}; choose from {', '.join(TRANSPORTS)}")
+            for nbytes in sizes:
+                for dtype in dtypes:
+                    for slots in (slot_counts if TRANSPORTS[name][1] else [None]):
+                        yield "transfer", name, dict(nbytes=nbytes, dtype=dtype, slots=slots)
+    if "pipeline" in args.bench:
+        for name in PIPELINES:
+            for depth in (int(d) for d in args.depths.split(",")):
+                for nbytes in sizes:
+                    slots = slot_counts[0] if name == "mempipe" else None
+                    yield "pipeline", name, dict(depth=depth, nbytes=nbytes, dtype=dtypes[0], slots=slots)
+
+
+def _case_id(bench, name, params):
+    parts = [bench, name] + [f"{k}={_label(v) if k == 'nbytes' else v}" for k, v in params.items()
+                             if v is not None]
+    return "/".join(parts)
+
+
+def _needs(bench, name, params):
+    "(RAM, /dev/shm) bytes a case needs."
+    nbytes, slots = params["nbytes"], params["slots"] or 1
+    if bench == "transfer":
+        shm = {"mempipe": 1, "mempipe-ring": slots, "shm-raw": 2}.get(name, 0) * nbytes
+        return _RAM_COPIES[name] * nbytes + shm, shm
+    depth = params["depth"]
+    shm = 0 if name == "pipe" else (depth + 1) * (1 if name == "mempipe-inplace" else slots) * nbytes
+    if name == "mempipe-inplace":
+        shm += (depth + 2) * nbytes
+    return 2 * (depth + 1) * nbytes + shm, shm
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--full", action="store_true", help="the full sweep (1 KB to 1 GB; slow)")
+    parser.add_argument("--bench", default="transfer,pipeline", help="transfer, pipeline or both")
+    for key in QUICK:
+        parser.add_argument(f"--{key}", help=f"comma-separated (default: {QUICK[key]}; --full: {FULL[key]})")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the number of frames timed")
+    args = parser.parse_args(argv)
+    for key, value in (FULL if args.full else QUICK).items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+    ram, shm = _limits()
+    print(json.dumps(_environment()), flush=True)
+    for bench, name, params in cases(args):
+        record = {"bench": bench, "case": _case_id(bench, name, params), "transport": name, **params}
+        need_ram, need_shm = _needs(bench, name, params)
+        if need_ram > ram or need_shm > shm:
+            record["skipped"] = f"needs {need_ram >> 20} MB of RAM and {need_shm >> 20} MB of /dev/shm"
+        else:
+            run = transfer if bench == "transfer" else pipeline
+            record.update(run(name, scale=args.scale, **params))
+        print(json.dumps(record), flush=True)
+        if "skipped" in record:
+            print(f"{record['case']:64s} skipped: {record['skipped']}", file=sys.stderr)
+        else:
+            print(f"{record['case']:64s} p50 {record['lat_p50_us']:10.1f} us  p99 {record['lat_p99_us']:10.1f} us"
+                  f"  {record['frames_per_s']:10.1f} frames/s  {record['gb_per_s']:7.3f} GB/s",
+                  file=sys.stderr, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""The ways of moving a frame between processes that the suite compares.
+
+Each transport is made in the parent, handed to the child process like any
+other argument, and used with send(frame) on one side and recv() -> frame on
+the other. recv() waits for a frame and returns a private copy of it.
+"""
+
+from multiprocessing import Pipe, Queue, Semaphore
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from mempipe import MemPipe
+
+
+class MemPipeTransport:
+    "MemPipe, single-slot (slots=None) or a ring of `slots` frames."
+
+    def __init__(self, ex, slots=None):
+        # A single-slot pipe lets send() overwrite an unread frame; one
+        # credit makes a sender that streams frames wait instead.
+        self.pipe = MemPipe(ex, slots=slots, max_inflight=1 if slots is None else None)
+
+    def send(self, frame):
+        self.pipe.send(frame)
+
+    def recv(self):
+        self.pipe.poll(timeout=None)
+        return self.pipe.recv()
+
+    def close(self):
+        self.pipe.close()
+
+
+class PipeTransport:
+    "multiprocessing.Pipe: the frame is pickled through the OS pipe."
+
+    def __init__(self, ex, slots=None):
+        self.r, self.w = Pipe(duplex=False)
+
+    def send(self, frame):
+        self.w.send(frame)
+
+    def recv(self):
+        return self.r.recv()
+
+    def close(self):
+        self.r.close()
+        self.w.close()
+
+
+class QueueTransport:
+    "multiprocessing.Queue: pickled by a feeder thread, through an OS pipe."
+
+    def __init__(self, ex, slots=None):
+        self.q = Queue()
+
+    def send(self, frame):
+        self.q.put(frame)
+
+    def recv(self):
+        return self.q.get()
+
+    def close(self):
+        self.q.close()
+        self.q.cancel_join_thread()
+
+
+class SharedMemoryTransport:
+    """
+    The floor for a shared-memory transport: a raw SharedMemory segment of
+    `slots` frames, a semaphore counting free ones and a 4-byte slot index
+    per frame through an OS pipe. No shapes, dtypes or passthrough values.
+    """
+
+    def __init__(self, ex, slots=2):
+        self.shape, self.dtype, self.slots = ex.shape, ex.dtype, slots or 2
+        self.shm = SharedMemory(create=True, size=max(ex.nbytes, 1) * self.slots)
+        self.name = self.shm.name
+        self.free = Semaphore(self.slots)
+        self.r, self.w = Pipe(duplex=False)
+        self.n = 0
+        self._frames = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["shm"] = state["_frames"] = None
+        return state
+
+    def _ring(self):
+        if self._frames is None:
+            if self.shm is None:
+                self.shm = SharedMemory(name=self.name)
+            self._frames = np.ndarray((self.slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+        return self._frames
+
+    def send(self, frame):
+        self.free.acquire()
+        slot = self.n % self.slots
+        self.n += 1
+        self._ring()[slot] = frame
+        self.w.send_bytes(slot.to_bytes(4, "little"))
+
+    def recv(self):
+        slot = int.from_bytes(self.r.recv_bytes(), "little")
+        frame = self._ring()[slot].copy()
+        self.free.release()
+        return frame
+
+    def close(self):
+        self._frames = None
+        self.r.close()
+        self.w.close()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+
+
+# name -> (class, takes slots=)
+TRANSPORTS = {
+    "mempipe": (MemPipeTransport, False),
+    "mempipe-ring": (MemPipeTransport, True),
+    "pipe": (PipeTransport, False),
+    "queue": (QueueTransport, False),
+    "shm-raw": (SharedMemoryTransport, False),
+}
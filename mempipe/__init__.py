@@ -1 +1,6 @@
-from .mempipe import MemPipe
+from .mempipe import MemPipe, snapshot, wait
+from .broadcast import MemBroadcast
+from .fanin import MemFanIn
+from .pipeline import Pipeline
+from .pool import MemPool
+from .trace import Tracer
@@ -0,0 +1,81 @@
+"Fan-out: one writer feeding several readers through a single shared segment."
+
+from collections import deque
+from multiprocessing import Pipe
+
+import numpy as np
+
+from .mempipe import MemPipe, _is_multi
+
+
+class MemBroadcast(MemPipe):
+    def __init__(self, ex_array: np.ndarray | None = None, n_readers: int = 2, slots: int = 4,
+                 on_full: str = "block", wait: str | None = None, spin_us: float | None = None,
+                 meta_dtype=None):
+        """
+        A ring MemPipe with one writer and `n_readers` readers.
+        Every frame is written once into shared memory and delivered to every
+        reader; a slot is only reused after all readers have released it.
+        Send on the broadcast itself, and hand each consumer one of
+        `readers` (or the next one from subscribe()). Each reader has its own
+        cursor and supports poll(), recv() (including copy=False), release()
+        and recv_view(). Passthrough values are delivered to every reader.
+        The other arguments are as for MemPipe; on_full="drop" lets the
+        writer overwrite frames that slow readers have not seen yet.
+        """
+        if n_readers < 1:
+            raise ValueError(f"n_readers must be a positive integer, got {n_readers}")
+        super().__init__(None, slots=slots, on_full=on_full, wait=wait, spin_us=spin_us,
+                         meta_dtype=meta_dtype)
+        self._n_readers = n_readers
+        self._ins = [self._p_in]
+        for _ in range(n_readers - 1):
+            p_in, p_out = Pipe(duplex=False)
+            self._ins.append(p_in)
+            self._outs.append(p_out)
+        if isinstance(ex_array, np.ndarray) or _is_multi(ex_array):
+            self._init_shm(ex_array)
+        self.readers = tuple(self._endpoint(i) for i in range(n_readers))
+        self._n_subscribed = 0
+
+    def _endpoint(self, reader):
+        # A receive-only MemPipe on the reader's own header line and OS pipe,
+        # with its own mapping of the segment (once it exists). __getstate__
+        # is a shallow copy, so the receive-side state must be fresh or the
+        # readers would share one set of queues.
+        state = self.__getstate__()
+        for attr in ("readers", "_ins", "_n_subscribed"):
+            state.pop(attr, None)
+        state.update(_reader=reader, _p_in=self._ins[reader], _p_out=None, _outs=[],
+                     _held=deque(), _pending=deque(), _n_recv=0, _next_seq=0,
+                     _rd_seq=None, _frame=None, _polled=False, _is_passthrough=False,
+                     _passthrough_val=None)
+        endpoint = MemPipe.__new__(MemPipe)
+        endpoint.__setstate__(state)
+        return endpoint
+
+    def subscribe(self):
+        "Return the next reader that has not been handed out yet."
+        if self._n_subscribed >= self._n_readers:
+            raise ValueError(f"all {self._n_readers} readers are already subscribed")
+        self._n_subscribed += 1
+        return self.readers[self._n_subscribed - 1]
+
+    def poll(self, *args, **kwargs):
+        raise TypeError("a MemBroadcast only sends; poll() one of its readers instead")
+
+    def recv(self, *args, **kwargs):
+        raise TypeError("a MemBroadcast only sends; recv() from one of its readers instead")
+
+    def arecv(self, *args, **kwargs):
+        raise TypeError("a MemBroadcast only sends; arecv() from one of its readers instead")
+
+    def close(self):
+        for reader in getattr(self, "readers", ()):
+            reader.close()
+        super().close()
+        for conn in getattr(self, "_ins", []) + getattr(self, "_outs", []):
+            try:
+                conn.close()
+            except Exception:
+                pass
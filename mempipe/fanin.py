@@ -0,0 +1,160 @@
+"Fan-in: several writers feeding one reader through a single shared segment."
+
+from collections import deque
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+import time
+
+import numpy as np
+
+from .mempipe import MemPipe, _align, _is_multi, _ring_layout, _schema_of, _sleep_until
+
+
+class MemFanIn:
+    def __init__(self, ex_array: np.ndarray, n_producers: int = 2, slots: int = 4,
+                 on_full: str = "block", wait: str | None = None, spin_us: float | None = None,
+                 meta_dtype=None):
+        """
+        A channel with `n_producers` writers and one reader, e.g. a pool of
+        workers feeding a single consumer.
+        Each producer gets its own lock-free ring inside one shared segment,
+        so producers never contend for a slot. Hand each worker one of
+        `producers` (a MemPipe to send() or reserve() on), and poll()/recv()
+        on the fan-in itself: recv() returns (producer id, message), taking
+        ready producers in turn so a busy one cannot starve the others.
+        Frames from one producer arrive in the order it sent them.
+        In this process all rings share the fan-in's one mapping of the
+        segment; a producer passed to another process maps the whole segment
+        there but only touches its own ring.
+        ex_array (an ndarray, or a tuple or dict of them) sizes every ring
+        and is required. The other arguments are
+        as for MemPipe and apply to every ring.
+        """
+        if _is_multi(ex_array):
+            schema, size = _schema_of(ex_array)
+            ex_array = np.empty(size, dtype=np.uint8)
+        elif isinstance(ex_array, np.ndarray):
+            schema = None
+        else:
+            raise ValueError("MemFanIn needs ex_array to size the producers' rings")
+        if n_producers < 1:
+            raise ValueError(f"n_producers must be a positive integer, got {n_producers}")
+        self._shm = None
+        self._owns_shm = False
+        self.producers = tuple(MemPipe(slots=slots, on_full=on_full, wait=wait, spin_us=spin_us,
+                                       meta_dtype=meta_dtype)
+                               for _ in range(n_producers))
+        meta = self.producers[0]._meta_dtype
+        ring_size = _align(_ring_layout(ex_array.nbytes, slots, 1, 0 if meta is None else meta.itemsize)[4])
+        self._shm = SharedMemory(create=True, size=ring_size * n_producers)
+        self._owns_shm = True
+        for i, producer in enumerate(self.producers):
+            producer._base = i * ring_size
+            producer._init_shm(shape=ex_array.shape, dtype=ex_array.dtype,
+                               nbytes=self._shm.size, name=self._shm.name, shm=self._shm,
+                               schema=schema)
+        self._wait = self.producers[0]._wait
+        self._spin_s = self.producers[0]._spin_s
+        # Producer whose message poll() armed, where the next poll() starts
+        # looking, and the producers of unreleased recv(copy=False) views.
+        self._ready = None
+        self._next = 0
+        self._views = deque()
+
+    # Same spin loop as MemPipe; it only needs _spin_s.
+    _spin = MemPipe._spin
+
+    def poll(self, timeout=0.0):
+        """
+        Wait up to timeout seconds (forever if None) for a message from any
+        producer. Like Connection.poll(), and unlike MemPipe.poll(), a
+        message armed by an earlier poll() stays armed until recv().
+        """
+        if self._ready is not None:
+            return True
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        if self._spin(self._try_arm, deadline):
+            return True
+        if self._wait == "spin" or (timeout is not None and timeout <= 0):
+            return False
+        return _sleep_until(self._try_arm, self.producers, deadline)
+
+    def _try_arm(self):
+        n = len(self.producers)
+        for k in range(n):
+            i = (self._next + k) % n
+            if self.producers[i]._try_arm():
+                self._ready = i
+                self._next = (i + 1) % n
+                return True
+        return False
+
+    def recv(self, copy: bool = True):
+        """
+        Return (producer id, message) for the message armed by the last
+        successful poll(), or None. copy=False works as for MemPipe.recv();
+        release() hands back the oldest view whichever producer it came from.
+        """
+        if self._ready is None:
+            return None
+        i, self._ready = self._ready, None
+        producer = self.producers[i]
+        n_held = len(producer._held)
+        data = producer.recv(copy=copy)
+        if len(producer._held) > n_held:
+            self._views.append(i)
+        return i, data
+
+    def release(self):
+        "Hand the oldest view returned by recv(copy=False) back to its producer."
+        if not self._views:
+            raise ValueError("no view to release")
+        self.producers[self._views.popleft()].release()
+
+    @contextmanager
+    def recv_view(self):
+        """
+        Context manager form of recv(copy=False): yields (producer id,
+        message) and releases the view on exit.
+        """
+        n_views = len(self._views)
+        item = self.recv(copy=False)
+        try:
+            yield item
+        finally:
+            if len(self._views) > n_views:
+                self.release()
+
+    def close(self):
+        for producer in getattr(self, "producers", ()):
+            producer.close()
+        shm = getattr(self, "_shm", None)
+        if shm is not None:
+            try:
+                shm.close()
+            except Exception:
+                pass
+            if getattr(self, "_owns_shm", False):
+                try:
+                    shm.unlink()
+                except Exception:
+                    pass
+                self._owns_shm = False
+            self._shm = None
+
+    def __getstate__(self):
+        # The producers re-attach on their own; only the creator unlinks.
+        state = self.__dict__.copy()
+        state.pop("_shm", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = None
+        self._owns_shm = False
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
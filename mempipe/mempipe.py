@@ -1,68 +1,838 @@
 "The mempipe module provides a simple way to create a pipe between two processes using shared memory."
 
-from multiprocessing import Pipe, Lock
+from collections import deque
+import asyncio
+from contextlib import contextmanager
+from copy import copy
+from multiprocessing import Pipe, Lock, Semaphore, resource_tracker
+from multiprocessing.connection import wait as _wait_conns
 from multiprocessing.shared_memory import SharedMemory
+from queue import Full
+import mmap
+import os
+import pickle
+import platform
+import struct
+import threading
+import time
+import weakref
 
 import numpy as np
 
+from . import numa
+
+try:
+    import _posixshmem
+except ImportError:     # Windows: passthrough values never spill there.
+    _posixshmem = None
+
 
 # Sentinel tag prefixed to non-ndarray values so poll() can distinguish a
-# passthrough payload from a shm-init tuple (which is always a 4-tuple).
+# passthrough payload from a shm-init tuple (shape, dtype, nbytes, name,
+# schema, base), base being where the pipe starts in a MemPool's segment.
+# Older pipes send only the first four or five.
 _PASSTHROUGH = "__pt__"
+# Tag of the (tag, shape, dtype) token announcing a single-slot frame whose
+# shape or dtype differs from the pipe's own.
+_FRAME = "__fr__"
+# Doorbell sent to a ring receiver that went to sleep waiting for a frame.
+_WAKE = "__wk__"
+
+# Ring-mode segment layout: an int64 header line, one int64 line per reader,
+# one int64 record per slot, the per-slot metadata records (if the pipe has a
+# meta_dtype), then the slots themselves, each starting on a cache-line
+# boundary. A MemPipe has one reader; a MemBroadcast has several.
+#
+# Ring pipes are lock-free single-producer queues: the sender alone advances
+# HEAD, each reader alone advances its own TAIL, and nobody takes a lock or
+# sends a token per frame. This relies on aligned int64 stores being atomic
+# and on x86-64's ordering: stores become visible in program order and a load
+# is never reordered with an earlier load or a later store, so a reader that
+# sees HEAD move also sees the slot it covers, and a sender that sees TAIL
+# move knows the reader is done with the slot. x86-64 does let a load pass an
+# earlier store to another address. The one place where that matters is the
+# sleep handshake (the sender stores HEAD then loads WAITING, a reader stores
+# WAITING then loads HEAD), and both sides put a _fence() in between. Weakly
+# ordered CPUs such as arm64 give none of these guarantees to plain numpy
+# loads and stores, so there _ordered() fences as well: before the stores
+# that hand a slot over (a stamp, HEAD, TAIL) and after the loads that take
+# one (HEAD, TAIL, a stamp). The OS pipe only carries passthrough values, the
+# deferred-init tuple and doorbells; MSGS counts every message ever sent so
+# the receiver can tell whether the pipe needs reading without a syscall.
+_ALIGN = 64
+_HDR_HEAD = 0       # frames published by the sender
+_HDR_LEN = 8
+_RDR_TAIL = 0       # frames released by this reader
+_RDR_MSGS = 1       # messages the sender has put on this reader's OS pipe
+_RDR_WAITING = 2    # set by the reader when it is about to sleep on its pipe
+_RDR_LEN = 8
+
+# How long a "hybrid" poll() spins before it sleeps on the OS pipe unless
+# spin_us says otherwise, and how long a sleeping ring receiver waits before
+# re-checking the header. With the fenced handshake a doorbell is not
+# missed, so the slice is only a backstop. With a single CPU the sender
+# cannot run while we spin, so by default we don't.
+_SPIN_S = 50e-6 if len(getattr(os, "sched_getaffinity", lambda _: range(os.cpu_count() or 1))(0)) > 1 else 0.0
+_SLEEP_SLICE_S = 0.01
+
+_WAIT = ("spin", "hybrid", "block")
+
+# Per-slot record: seqlock stamp plus the actual shape and dtype of the frame.
+_SLOT_STAMP = 0
+_SLOT_NDIM = 1      # -1 for a frame with the pipe's own shape and dtype
+_SLOT_DTYPE = 2     # two words of dtype.str; zero for the pipe's own dtype
+_SLOT_SHAPE = 4
+_MAX_NDIM = 32
+_SLOT_TIME = 36     # monotonic_ns() when the frame was published (counters=True)
+_SLOT_WORDS = 40    # _SLOT_SHAPE + _MAX_NDIM + 1, padded to whole cache lines
+
+# Counters of a pipe made with counters=True: a block of int64 words at the
+# end of its segment, so that every process mapping the segment sees the same
+# numbers. The sender and the receiver each write their own cache line(s)
+# only, so no word has two writers. Latencies go into power-of-two buckets:
+# bucket i counts frames that took [2**i, 2**(i+1)) ns from publish to recv().
+_CNT_SENT = 0
+_CNT_SENT_BYTES = 1
+_CNT_SEND_WAIT_NS = 2
+_CNT_SEND_COPY_NS = 3
+_CNT_FRAME_TIME = 4     # single-slot pipes: publish time of the current frame
+_CNT_RECV = 8
+_CNT_RECV_BYTES = 9
+_CNT_RECV_WAIT_NS = 10
+_CNT_RECV_COPY_NS = 11
+_CNT_HIST = 16
+_HIST_BUCKETS = 40
+_CNT_WORDS = _CNT_HIST + _HIST_BUCKETS
+_CNT_BYTES = _CNT_WORDS * 8
+
+# Every live MemPipe end with counters in this process, for snapshot().
+_counted = weakref.WeakSet()
+
+# Events a pipe made with trace=... records into its Tracer (trace.py):
+# send() and commit() calls, recv() calls, frames armed by poll(), and the
+# work a Pipeline stage did on a frame.
+_TR_SEND, _TR_RECV, _TR_ARMED, _TR_WORK = range(4)
+
+_ON_FULL = ("block", "drop", "raise")
+_MODES = ("queue", "latest")
+
+# Passthrough buffers of at least this many bytes travel through shared
+# memory instead of the OS pipe: through a spill segment the sender keeps and
+# reuses, whose first word the receiver sets to the generation of the last
+# value it copied out. While the segment still holds an unread value, the next
+# one gets a segment of its own that the receiver unlinks; handing segments
+# over like that needs POSIX shared memory.
+_OOB_THRESHOLD = 256 * 1024 if os.name == "posix" else None
+_SPILL_HDR = _ALIGN
+# Passthrough values that never hold a buffer and are pickled as they are.
+_SCALARS = (str, int, float, complex, bool, type(None))
+
+# madvise() advice that Python < 3.13 has no names for; Linux >= 5.14.
+_MADV_POPULATE_READ = getattr(mmap, "MADV_POPULATE_READ", 22)
+_MADV_POPULATE_WRITE = getattr(mmap, "MADV_POPULATE_WRITE", 23)
+
+
+def _shmem_thp():
+    "Whether the kernel backs shared memory with transparent huge pages on request."
+    try:
+        with open("/sys/kernel/mm/transparent_hugepage/shmem_enabled") as f:
+            setting = f.read().split("[")[1].split("]")[0]
+    except (OSError, IndexError):
+        return False
+    return setting in ("always", "within_size", "advise", "force")
+
+
+# Attributes that hold views into the mapping. They are rebuilt by _attach()
+# and must be dropped before the mapping can be closed or pickled.
+_VIEW_ATTRS = ("_view", "_hdr", "_rdrs", "_rdr", "_recs", "_stamps", "_ring", "_slot_bytes", "_metas",
+               "_cnt")
+
+# Defaults for attributes added after a MemPipe may already have been pickled.
+_STATE_DEFAULTS = {"_slots": None, "_on_full": "block", "_rd_seq": None, "_frame": None,
+                   "_held": deque(), "_reserved": None, "_reserved_msg": None, "_desc": None,
+                   "_next_seq": 0, "_n_recv": 0, "_n_sent": 0, "_pending": deque(),
+                   "_wait": "block", "_spin_s": 0.0, "_n_readers": 1, "_reader": 0,
+                   "_base": 0, "_borrowed_shm": False, "_meta_dtype": None,
+                   "_schema": None, "_oob_threshold": None,
+                   "_spill_out": None, "_spill_gen": 0, "_spill_in": None, "_eof": False,
+                   "_spill_once": [],
+                   "_pool": None, "_pool_block": None, "_huge_pages": False,
+                   "_prefault": False, "huge_pages": False, "_numa_node": None,
+                   "_mode": "queue", "_last_seq": -1, "skipped": 0,
+                   "_max_inflight": None, "_credits": None, "_counters": False,
+                   "_frame_times": (0, 0), "_reserved_nbytes": 0, "_tracer": None,
+                   "_trace_id": 0, "_sent_seq": -1}
+
+
+# An uncontended lock round-trip is a locked read-modify-write, which orders
+# every earlier store before every later load: the closest thing to a memory
+# fence that Python offers.
+_FENCE = threading.Lock()
+
+
+def _fence():
+    _FENCE.acquire()
+    _FENCE.release()
+
+
+# x86 keeps plain loads and stores in the order the ring protocol needs.
+_WEAKLY_ORDERED = platform.machine().lower() not in ("x86_64", "amd64", "i386", "i686", "x86")
+
+
+def _ordered():
+    "A _fence() where the CPU may reorder the ring's plain loads and stores."
+    if _WEAKLY_ORDERED:
+        _fence()
+
+
+def _align(n, a=_ALIGN):
+    return (n + a - 1) // a * a
+
+
+def _ring_layout(frame_nbytes, slots, readers=1, meta_itemsize=0):
+    "Return (records offset, metadata offset, data offset, slot stride, total size) of a ring segment."
+    recs_off = (_HDR_LEN + readers * _RDR_LEN) * 8
+    meta_off = _align(recs_off + slots * _SLOT_WORDS * 8)
+    data_off = _align(meta_off + slots * meta_itemsize)
+    stride = _align(max(frame_nbytes, 1))
+    return recs_off, meta_off, data_off, stride, data_off + slots * stride
+
+
+def _dtype_words(dtype):
+    "Pack a plain dtype into the two int64 words of a slot record."
+    code = dtype.str.encode()
+    if dtype.fields is not None or len(code) > 16:
+        raise ValueError(f"frames of a different dtype than the pipe's must use a plain dtype, got {dtype}")
+    return np.frombuffer(code.ljust(16, b"\0"), dtype=np.int64)
+
+
+def _words_dtype(words):
+    code = words.tobytes().rstrip(b"\0")
+    return np.dtype(code.decode()) if code else None
+
+
+def _is_multi(data):
+    "True for a non-empty tuple or dict made only of ndarrays."
+    if not isinstance(data, (tuple, dict)) or not data:
+        return False
+    values = data.values() if isinstance(data, dict) else data
+    return all(isinstance(v, np.ndarray) for v in values)
+
+
+def _schema_of(example):
+    """Lay out a tuple or dict of ndarrays in one byte frame. Returns the
+    schema (dict keys or None, ((shape, dtype, offset), ...)) and the frame
+    size; every array starts on a cache-line boundary."""
+    keys = tuple(example) if isinstance(example, dict) else None
+    fields, offset = [], 0
+    for arr in (example.values() if keys is not None else example):
+        if arr.dtype.hasobject:
+            raise ValueError(f"arrays of Python objects cannot go through shared memory, got {arr.dtype}")
+        fields.append((arr.shape, arr.dtype, offset))
+        offset = _align(offset + arr.nbytes)
+    return (keys, tuple(fields)), max(offset, 1)
+
+
+def _remaining(deadline):
+    "Seconds left until a perf_counter() deadline (None: no deadline)."
+    return None if deadline is None else max(deadline - time.perf_counter(), 0.0)
+
+
+def _wait_until(cond, timeout=None):
+    """Wait for cond() to become true, backing off from a busy spin to 1 ms
+    sleeps. Returns False if timeout (seconds) expires first."""
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    delay = 0.0
+    while not cond():
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        time.sleep(delay)
+        delay = min(max(delay * 2, 1e-6), 1e-3)
+    return True
+
+
+def _spin(check, spin_s, deadline):
+    "Busy-poll check() for up to spin_s seconds, but not past deadline; return its last result."
+    result = check()
+    if result:
+        return result
+    spin_end = time.perf_counter() + spin_s
+    if deadline is not None:
+        spin_end = min(spin_end, deadline)
+    while time.perf_counter() < spin_end:
+        result = check()
+        if result:
+            return result
+    return result
+
+
+def _set_waiting(pipes, flag):
+    """Set or clear WAITING on the ring readers among pipes. Setting it is
+    followed by a fence, so a sender either sees it or we see its frame."""
+    for pipe in pipes:
+        if pipe._rdr is not None:
+            pipe._rdr[_RDR_WAITING] = flag
+    if flag:
+        _fence()
+
+
+def _sleep_until(check, pipes, deadline):
+    """
+    The sleeping half of every wait for messages: with WAITING set on the
+    ring readers among pipes, re-check, then sleep on their OS pipes, until
+    check() returns something true or deadline passes; return its last
+    result. The senders ring the doorbell when they publish to a waiting
+    reader, so the sleep slices are a backstop, not the wake-up path.
+    """
+    conns = [pipe._p_in for pipe in pipes]
+    try:
+        while True:
+            _set_waiting(pipes, 1)
+            result = check()
+            if result:
+                return result
+            slice_s = _SLEEP_SLICE_S
+            if deadline is not None:
+                slice_s = min(slice_s, deadline - time.perf_counter())
+                if slice_s <= 0:
+                    return result
+            if len(conns) == 1:
+                conns[0].poll(slice_s)
+            else:
+                _wait_conns(conns, slice_s)
+    finally:
+        _set_waiting(pipes, 0)
+
+
+def _map_segment(name):
+    """Map an existing POSIX shared segment without registering it with the
+    resource tracker: on Python < 3.13 a tracker started by this process
+    would otherwise unlink the sender's segment when this process exits."""
+    fd = _posixshmem.shm_open("/" + name, os.O_RDWR, 0o600)
+    try:
+        return mmap.mmap(fd, os.fstat(fd).st_size)
+    finally:
+        os.close(fd)
+
+
+def _segment_exists(name):
+    try:
+        os.close(_posixshmem.shm_open("/" + name, os.O_RDONLY, 0o600))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _unlink_segment(name):
+    "Unlink a POSIX shared segment, if it still exists, behind the resource tracker's back."
+    try:
+        _posixshmem.shm_unlink("/" + name)
+    except FileNotFoundError:
+        pass
+
+
+class _Spilled:
+    """A passthrough value pickled with protocol 5, with its large buffers
+    moved out of band into the shared segment `name`."""
+
+    def __init__(self, skeleton, name, spans, kind=None, gen=None):
+        self.skeleton = skeleton
+        self.name = name
+        self.spans = spans      # (offset, nbytes) of each buffer
+        self.kind = kind        # type of a bare bytes-like value
+        self.gen = gen          # spill generation; None for a one-off segment
+
+    def load(self, buf):
+        "Rebuild the value from the segment's buffer, copying its buffers out."
+        buffers = []
+        with memoryview(buf) as seg:
+            for off, nbytes in self.spans:
+                with seg[off:off + nbytes] as view:
+                    buffers.append(bytearray(view))
+        value = pickle.loads(self.skeleton, buffers=buffers)
+        return value if self.kind is None or self.kind is bytearray else self.kind(value)
+
+
+class _Reservation:
+    "A frame claimed by MemPipe.reserve(); `array` is its writable shared buffer."
+
+    def __init__(self, pipe, array):
+        self._pipe = pipe
+        self.array = array
+
+    def __enter__(self):
+        return self.array
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._pipe.commit()
+        else:
+            self._pipe._abort()
 
 
 class MemPipe:
-    def __init__(self, ex_array: np.ndarray | None = None):
+    def __init__(self, ex_array: np.ndarray | None = None, slots: int | None = None,
+                 on_full: str | None = None, wait: str | None = None, spin_us: float | None = None,
+                 meta_dtype=None, oob_threshold: int | None = _OOB_THRESHOLD, pool=None,
+                 huge_pages: bool = False, prefault: bool = False, numa_node: int | None = None,
+                 mode: str = "queue", max_inflight: int | None = None, counters: bool = False,
+                 trace=None):
         """
-        Initialize the mempipe.
-        MemPipes can only transfer numpy arrays of the same shape and dtype.
-        ex_array: example numpy array that will be shared between processes
-        ex_array is used to determine the shape and dtype of the shared memory
-        If not supplied initially, it will be inferred from the first send.
+        Initialize the mempipe. See the README for each option in more detail.
+        ex_array: example frame, or tuple/dict of them: shape, dtype and capacity (else the first send's).
+        slots: back the pipe with a ring of this many frames instead of a single slot.
+        on_full: send() on a full ring: "block" (default), "drop" the oldest frame or "raise" queue.Full.
+        wait: how poll(timeout) waits: "spin", "block" or "hybrid" (spin, then sleep; the ring default).
+        spin_us: the "hybrid" spin budget; 50 us by default, none when the process has only one CPU.
+        meta_dtype: (structured) dtype of a metadata record stored next to every frame.
+        oob_threshold: pickled passthrough buffers this large go through shared memory (None: never).
+        pool: a MemPool to take the pipe's segment from, and hand it back to on close().
+        huge_pages: ask Linux to back the segment with transparent huge pages.
+        prefault: fault the whole segment in up front, in the sender and in each receiver.
+        numa_node: put the segment's pages on this NUMA node (best effort, Linux).
+        mode: "queue" delivers every frame in order; "latest" only ever the newest one.
+        max_inflight: at most this many messages sent and not yet received; send() waits for room.
+        counters: keep performance counters in the shared segment; see stats() and mempipe.snapshot().
+        trace: a mempipe.Tracer to record this pipe's send(), armed frames and recv() into.
         """
+        if mode not in _MODES:
+            raise ValueError(f"mode must be one of {_MODES}, got {mode!r}")
+        if mode == "latest":
+            if slots is None:
+                slots = 3
+            if slots < 2:
+                raise ValueError(f"mode='latest' needs at least 2 slots, got {slots}")
+            if on_full not in (None, "drop"):
+                raise ValueError(f"mode='latest' never waits for the receiver, so on_full "
+                                 f"must be 'drop', got {on_full!r}")
+            on_full = "drop"
+        elif on_full is None:
+            on_full = "block"
+        if slots is not None and slots < 1:
+            raise ValueError(f"slots must be a positive integer, got {slots}")
+        if on_full not in _ON_FULL:
+            raise ValueError(f"on_full must be one of {_ON_FULL}, got {on_full!r}")
+        if max_inflight is not None:
+            if max_inflight < 1:
+                raise ValueError(f"max_inflight must be a positive integer, got {max_inflight}")
+            if on_full == "drop":
+                raise ValueError("a pipe that drops frames never waits for the receiver; "
+                                 "max_inflight needs on_full='block' or 'raise'")
+        # One credit per message that may be in flight: send() takes one,
+        # and the receiver gives it back once the message is consumed.
+        self._max_inflight = max_inflight
+        self._credits = None if max_inflight is None else Semaphore(max_inflight)
+        self._counters = counters
+        # Receiver: (ns poll() spent copying a drop-mode frame out, its
+        # publish time), counted when recv() returns it. Sender: size of
+        # the reserved frame.
+        self._frame_times = (0, 0)
+        self._reserved_nbytes = 0
+        if counters:
+            _counted.add(self)
+        self._tracer = trace
+        self._trace_id = 0 if trace is None else trace._new_pipe_id()
+        # A traced single-slot pipe numbers the frames it sends here, and the
+        # ones it arms in _last_seq.
+        self._sent_seq = -1
+        if wait is None:
+            wait = "block" if slots is None else "hybrid"
+        if wait not in _WAIT:
+            raise ValueError(f"wait must be one of {_WAIT}, got {wait!r}")
+        if spin_us is not None and spin_us < 0:
+            raise ValueError(f"spin_us must be non-negative, got {spin_us}")
+        if slots is None and wait == "spin":
+            raise ValueError("wait='spin' needs a ring pipe (slots=N); a single-slot pipe "
+                             "only learns of a frame from its OS pipe")
+        if slots is None:
+            wait = "block"
+        if meta_dtype is not None:
+            meta_dtype = np.dtype(meta_dtype)
+            if meta_dtype.hasobject:
+                raise ValueError(f"meta_dtype cannot hold Python objects, got {meta_dtype}")
+        self._meta_dtype = meta_dtype
+        if numa_node is not None:
+            if isinstance(numa_node, bool) or not isinstance(numa_node, int) or numa_node < 0:
+                raise ValueError(f"numa_node must be a node number, got {numa_node!r}")
+            nodes = numa.numa_nodes()
+            if len(nodes) > 1 and numa_node not in nodes:
+                raise ValueError(f"numa_node {numa_node} is not one of the online nodes {nodes}")
+        self._numa_node = numa_node
+        if oob_threshold is not None and oob_threshold < 0:
+            raise ValueError(f"oob_threshold must be non-negative, got {oob_threshold}")
+        if oob_threshold is not None and os.name != "posix":
+            raise ValueError("oob_threshold needs POSIX shared memory; pass None on this platform")
+        self._oob_threshold = oob_threshold
+        # MemPool the segment comes from, and the (offset, size class) of
+        # our block of it, which close() gives back.
+        self._pool = pool
+        self._pool_block = None
+        self._huge_pages = huge_pages
+        self._prefault = prefault
+        # Whether this process's mapping got its huge-page request through.
+        self.huge_pages = False
+        # Sender's reusable spill segment and the generation last written to
+        # it, and the receiver's (name, mmap) of the other end's one.
+        self._spill_out = None
+        self._spill_gen = 0
+        self._spill_in = None
+        # Sender: names of one-off spill segments the receiver may not have
+        # unlinked yet; close() unlinks those that are left.
+        self._spill_once = []
+        self._wait = wait
+        if wait == "spin":
+            self._spin_s = float("inf")
+        elif wait == "hybrid":
+            self._spin_s = _SPIN_S if spin_us is None else spin_us * 1e-6
+        else:
+            self._spin_s = 0.0
+        self._slots = slots
+        self._on_full = on_full
+        self._mode = mode
+        # Sequence number of the last ring frame armed, and how many frames
+        # were dropped or skipped right before it.
+        self._last_seq = -1
+        self.skipped = 0
+        self._rd_seq = None
+        self._frame = None
+        # Ring receiver: next frame to deliver, OS-pipe messages consumed, and
+        # (value, head-at-send) passthroughs waiting for earlier frames. The
+        # sender counts its messages in _n_sent until the header exists.
+        self._next_seq = 0
+        self._n_recv = 0
+        self._n_sent = 0
+        self._pending = deque()
+        # Receiver-side [seq, released] entries for views handed out by
+        # recv(copy=False); seq is None for the single-slot buffer.
+        self._held = deque()
+        # Sequence number claimed by reserve() (-1 on a single-slot pipe), and
+        # the token commit() sends for a single-slot reservation.
+        self._reserved = None
+        self._reserved_msg = None
+        # (shape, dtype) of the armed single-slot frame if it is not the
+        # pipe's own.
+        self._desc = None
         self._lock = Lock()
         self._p_in, self._p_out = Pipe(duplex=False)
+        # Ring-mode readers: this pipe's one, or a MemBroadcast's several.
+        # _reader is the header line this endpoint receives on.
+        self._n_readers = 1
+        self._reader = 0
+        self._outs = [self._p_out]
+        self._base = 0
+        # True when _shm is another object's mapping (a MemFanIn's), which
+        # close() must leave open.
+        self._borrowed_shm = False
         self._polled = False
         self._is_passthrough = False
         self._passthrough_val = None
+        # Set once wait() or arecv() has found the sending end closed.
+        self._eof = False
         self.shm_created = False
         self._owns_shm = False
-        if isinstance(ex_array, np.ndarray):
+        self._shm = None
+        # (keys, fields) of a pipe that carries tuples or dicts of ndarrays.
+        self._schema = None
+        self._detach()
+        if isinstance(ex_array, np.ndarray) or _is_multi(ex_array):
             self._init_shm(ex_array)
 
     @property
     def _arr(self):
-        shm = SharedMemory(name=self._shm_name)
-        arr = np.ndarray(self._shape, dtype=self._shm_dtype, buffer=shm.buf)
         with self._lock:
-            data = arr.copy()
+            data = self._view.copy()
         return data
 
     @_arr.setter
     def _arr(self, value):
-        shm = SharedMemory(name=self._shm_name)
-        arr = np.ndarray(self._shape, dtype=self._shm_dtype, buffer=shm.buf)
         with self._lock:
-            arr[:] = value
+            self._view[...] = value
+
+    def _attach(self):
+        # Map the segment once and keep an ndarray view over it for the life
+        # of the pipe, so send()/recv() never re-open the segment.
+        if getattr(self, "_shm", None) is None:
+            self._shm = SharedMemory(name=self._shm_name)
+            self._prepare_mapping(write=False)
+        buf = self._shm.buf
+        meta = self._meta_dtype
+        if self._counters:
+            # A memoryview: its items are several times quicker to update
+            # than an ndarray's.
+            end = self._base + self._shm_size
+            self._cnt = buf[end - _CNT_BYTES:end].cast("q")
+        if self._slots is None:
+            self._view = np.ndarray(self._shape, dtype=self._shm_dtype, buffer=buf, offset=self._base)
+            if meta is not None:
+                self._metas = np.ndarray((1,), dtype=meta, buffer=buf,
+                                         offset=self._base + _align(self._capacity))
+            return
+        frame = np.empty(self._shape, dtype=self._shm_dtype)
+        recs_off, meta_off, data_off, stride, _ = _ring_layout(
+            frame.nbytes, self._slots, self._n_readers, 0 if meta is None else meta.itemsize)
+        # A MemFanIn packs one ring per producer into a segment, and a
+        # MemPool one pipe per block; _base is where this pipe's ring starts.
+        base = self._base
+        recs_off += base
+        data_off += base
+        if meta is not None:
+            self._metas = np.ndarray((self._slots,), dtype=meta, buffer=buf, offset=base + meta_off)
+        self._hdr = np.ndarray((_HDR_LEN,), dtype=np.int64, buffer=buf, offset=base)
+        self._rdrs = np.ndarray((self._n_readers, _RDR_LEN), dtype=np.int64, buffer=buf,
+                                offset=base + _HDR_LEN * 8)
+        self._rdr = self._rdrs[self._reader]
+        self._recs = np.ndarray((self._slots, _SLOT_WORDS), dtype=np.int64, buffer=buf, offset=recs_off)
+        self._stamps = self._recs[:, _SLOT_STAMP]
+        self._ring = np.ndarray((self._slots,) + self._shape, dtype=self._shm_dtype, buffer=buf,
+                                offset=data_off, strides=(stride,) + frame.strides)
+        self._slot_bytes = np.ndarray((self._slots, stride), dtype=np.uint8, buffer=buf, offset=data_off)
+
+    def _prepare_mapping(self, write):
+        """Apply numa_node, huge_pages and prefault to our range of a mapping
+        we just made. Binding is up to the creator, before any page exists;
+        the policy belongs to the segment, not to one process's mapping."""
+        mapping = getattr(self._shm, "_mmap", None)
+        bind = write and self._numa_node is not None
+        if mapping is None or not (bind or self._huge_pages or self._prefault):
+            return
+        start = self._base - self._base % mmap.PAGESIZE
+        length = min(self._base + self._shm_size, self._shm.size) - start
+        if bind:
+            numa._bind(self._address(start), length, self._numa_node)
+        if self._huge_pages and hasattr(mmap, "MADV_HUGEPAGE") and _shmem_thp():
+            try:
+                mapping.madvise(mmap.MADV_HUGEPAGE, start, length)
+                self.huge_pages = True
+            except OSError:
+                pass
+        if self._prefault:
+            try:
+                mapping.madvise(_MADV_POPULATE_WRITE if write else _MADV_POPULATE_READ, start, length)
+            except (OSError, ValueError):
+                # Kernel older than 5.14: touch one byte per page instead.
+                # Writing a byte back to itself is harmless even on a
+                # segment the other end may already have written to.
+                pages = np.ndarray(length, dtype=np.uint8, buffer=self._shm.buf, offset=start)[::mmap.PAGESIZE]
+                if write:
+                    pages[...] = pages.copy()
+                else:
+                    pages.max()
+
+    def _is_default(self, shape, dtype):
+        return shape == self._shape and dtype == self._shm_dtype
+
+    def _buffer(self, shape, dtype, slot=None):
+        "ndarray of the given shape and dtype over the single buffer or a ring slot."
+        if self._is_default(shape, dtype):
+            return self._view if slot is None else self._ring[slot]
+        if slot is None:
+            return np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=self._base)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        return self._slot_bytes[slot, :nbytes].view(dtype).reshape(shape)
+
+    def _write_desc(self, slot, shape, dtype):
+        rec = self._recs[slot]
+        if self._is_default(shape, dtype):
+            rec[_SLOT_NDIM] = -1
+            return
+        if len(shape) > _MAX_NDIM:
+            raise ValueError(f"frames may have at most {_MAX_NDIM} dimensions, got {len(shape)}")
+        rec[_SLOT_DTYPE:_SLOT_SHAPE] = 0 if dtype == self._shm_dtype else _dtype_words(dtype)
+        rec[_SLOT_SHAPE:_SLOT_SHAPE + len(shape)] = shape
+        rec[_SLOT_NDIM] = len(shape)
+
+    def _read_slot(self, slot):
+        "ndarray over the frame currently described by ring slot `slot`."
+        rec = self._recs[slot]
+        ndim = int(rec[_SLOT_NDIM])
+        if ndim < 0:
+            return self._ring[slot]
+        shape = tuple(rec[_SLOT_SHAPE:_SLOT_SHAPE + ndim].tolist())
+        dtype = _words_dtype(rec[_SLOT_DTYPE:_SLOT_SHAPE]) or self._shm_dtype
+        return self._buffer(shape, dtype, slot)
+
+    def _pack_meta(self, meta):
+        "Check a send()'s meta against the pipe and turn it into a record."
+        if self._meta_dtype is None:
+            if meta is not None:
+                raise ValueError("this mempipe has no meta_dtype; pass one to carry metadata")
+            return None
+        rec = np.zeros((), dtype=self._meta_dtype)
+        if isinstance(meta, dict):
+            for name, value in meta.items():
+                rec[name] = value
+        elif meta is not None:
+            rec[()] = meta
+        return rec
+
+    def _with_meta(self, data, slot=None):
+        """What recv() returns for a raw frame: rebuilt into a tuple or dict
+        on a pipe with a schema, and paired with its metadata record on a
+        pipe with a meta_dtype."""
+        if self._schema is not None:
+            data = self._unpack(data)
+        if self._meta_dtype is None:
+            return data
+        return data, self._metas[0 if slot is None else slot].copy()
+
+    def _unpack(self, frame):
+        "Views of the arrays of a tuple/dict message inside its byte frame."
+        keys, fields = self._schema
+        arrays = [frame[off:off + int(np.prod(shape)) * dtype.itemsize].view(dtype).reshape(shape)
+                  for shape, dtype, off in fields]
+        return tuple(arrays) if keys is None else dict(zip(keys, arrays))
+
+    def _fields_of(self, data):
+        "The arrays of a tuple/dict message in schema order, checked against the schema."
+        keys, fields = self._schema
+        if keys is None:
+            arrays = data if isinstance(data, tuple) else None
+        else:
+            arrays = [data[k] for k in keys] if isinstance(data, dict) and data.keys() == set(keys) else None
+        if arrays is None or len(arrays) != len(fields):
+            raise ValueError(f"message does not match the mempipe's structure "
+                             f"({'tuple' if keys is None else 'keys ' + str(list(keys))} of {len(fields)} arrays)")
+        for i, (arr, (shape, dtype, _)) in enumerate(zip(arrays, fields)):
+            if arr.shape != shape:
+                raise ValueError(f"array {keys[i] if keys else i} has shape {arr.shape}, expected {shape}")
+            if arr.dtype != dtype:
+                raise ValueError(f"array {keys[i] if keys else i} has dtype {arr.dtype}, expected {dtype}")
+        return arrays
+
+    def _fill(self, buf, data):
+        "Write an ndarray, or the arrays of a tuple/dict message, into a frame buffer."
+        if isinstance(data, np.ndarray):
+            buf[...] = data
+            return
+        dsts = self._unpack(buf)
+        for dst, src in zip(dsts.values() if isinstance(dsts, dict) else dsts, data):
+            dst[...] = src
+
+    def _address(self, offset=0):
+        "Address of a byte of our mapping, for system calls."
+        return np.ndarray(1, dtype=np.uint8, buffer=self._shm.buf, offset=offset).ctypes.data
 
-    def _init_shm(self, ex_array=None, shape=None, dtype=None, nbytes=None, name=None):
+    @property
+    def numa_node(self):
+        """
+        The NUMA node holding most of this process's resident pages of the
+        segment; None before there is a segment or if none of it is resident
+        here. On a machine with a single node, that node.
+        """
+        nodes = numa.numa_nodes()
+        if len(nodes) == 1:
+            return nodes[0]
+        if getattr(self, "_shm", None) is None:
+            return None
+        length = min(self._shm_size, self._shm.size - self._base)
+        counts = numa._page_nodes(self._address(self._base), length)
+        return counts.most_common(1)[0][0] if counts else None
+
+    def stats(self):
+        """
+        The pipe's counters (made with counters=True), as both ends have
+        updated them so far:
+        frames_sent, bytes_sent, frames_received, bytes_received;
+        send_wait_s: time send() spent waiting for a credit, a ring slot
+        or the single-slot lock, and send_copy_s copying frames in;
+        recv_wait_s: time recv() spent waiting for the single-slot lock,
+        and recv_copy_s copying frames out;
+        depth: frames waiting to be received;
+        latency_hist: latency_hist[i] frames took 2**i to 2**(i+1) ns from
+        being published to recv() returning them, and latency_p50_s and
+        latency_p99_s the upper edges of the buckets holding those
+        percentiles (nan before the first frame).
+        """
+        if not self._counters:
+            raise ValueError("this mempipe keeps no counters; make it with counters=True")
+        cnt = np.zeros(_CNT_WORDS, dtype=np.int64) if self._cnt is None else np.array(self._cnt)
+        sent, received = int(cnt[_CNT_SENT]), int(cnt[_CNT_RECV])
+        if self._slots is not None and self._hdr is not None:
+            # Frames dropped by on_full="drop" never arrive, but leave the ring.
+            depth = min(int(self._hdr[_HDR_HEAD] - self._min_tail()), self._slots)
+        else:
+            depth = max(sent - received, 0)
+        hist = cnt[_CNT_HIST:]
+        total = int(hist.sum())
+        cum = np.cumsum(hist)
+
+        def upper_edge(q):
+            return 2.0 ** (int(np.searchsorted(cum, q * total)) + 1) * 1e-9 if total else float("nan")
+
+        return {"frames_sent": sent, "bytes_sent": int(cnt[_CNT_SENT_BYTES]),
+                "frames_received": received, "bytes_received": int(cnt[_CNT_RECV_BYTES]),
+                "send_wait_s": cnt[_CNT_SEND_WAIT_NS] * 1e-9, "send_copy_s": cnt[_CNT_SEND_COPY_NS] * 1e-9,
+                "recv_wait_s": cnt[_CNT_RECV_WAIT_NS] * 1e-9, "recv_copy_s": cnt[_CNT_RECV_COPY_NS] * 1e-9,
+                "depth": depth, "latency_hist": hist,
+                "latency_p50_s": upper_edge(0.5), "latency_p99_s": upper_edge(0.99)}
+
+    def _detach(self):
+        for attr in _VIEW_ATTRS:
+            setattr(self, attr, None)
+
+    def _init_shm(self, ex_array=None, shape=None, dtype=None, nbytes=None, name=None, shm=None,
+                  schema=None, base=None):
+        example = None
+        if _is_multi(ex_array):
+            # A tuple/dict message travels as one byte frame.
+            example = ex_array
+            self._schema, size = _schema_of(ex_array)
+            ex_array = np.zeros(size, dtype=np.uint8)
+            self._fill(ex_array, self._fields_of(example))
         if isinstance(ex_array, np.ndarray):
             # Sender path: create a new shm region and seed it with ex_array.
             self._shape = ex_array.shape
             self._shm_dtype = ex_array.dtype
-            self._shm_size = ex_array.nbytes
-            self._shm = SharedMemory(create=True, size=self._shm_size)
+            self._capacity = ex_array.nbytes
+            meta_size = 0 if self._meta_dtype is None else self._meta_dtype.itemsize
+            if self._slots is None:
+                self._shm_size = ex_array.nbytes if not meta_size else _align(ex_array.nbytes) + meta_size
+            else:
+                self._shm_size = _ring_layout(ex_array.nbytes, self._slots, self._n_readers, meta_size)[4]
+            if self._counters:
+                self._shm_size = _align(self._shm_size) + _CNT_BYTES
+            # Only the pool's own process hands out its blocks; a forked
+            # child's copy of it knows nothing of the parent's later ones.
+            if self._pool is None or self._pool._pid != os.getpid():
+                self._shm = SharedMemory(create=True, size=self._shm_size)
+                self._owns_shm = True
+                self._prepare_mapping(write=True)
+            else:
+                self._pool_block = self._pool._alloc(self._shm_size)
+                self._base = self._pool_block[0]
+                self._shm = self._pool._shm
+                self._borrowed_shm = True
+                # A reused block still holds the last pipe's header, records
+                # and metadata; a new segment would be all zeros there.
+                if self._slots is None:
+                    start, end = _align(self._capacity), self._shm_size
+                else:
+                    start, end = 0, _ring_layout(ex_array.nbytes, self._slots, self._n_readers,
+                                                 meta_size)[2]
+                if end > start:
+                    self._shm.buf[self._base + start:self._base + end] = bytes(end - start)
+                if self._counters:
+                    end = self._base + self._shm_size
+                    self._shm.buf[end - _CNT_BYTES:end] = bytes(_CNT_BYTES)
             self._shm_name = self._shm.name
-            self._owns_shm = True
-            self._arr = ex_array
+            self._attach()
+            if self._slots is None:
+                self._arr = ex_array
         elif shape is not None and dtype is not None and nbytes is not None and name is not None:
-            # Receiver path: attach to an existing shm by name. Must NOT write
-            # to the buffer — the sender has already placed valid data there.
+            # Receiver path: attach to an existing shm by name, or use the
+            # caller's mapping of it. Must NOT write to the buffer — the
+            # sender has already placed valid data there.
             self._shape = tuple(shape)
             self._shm_dtype = dtype
+            self._capacity = int(np.prod(self._shape)) * np.dtype(dtype).itemsize
             self._shm_size = nbytes
             self._shm_name = name
-            self._shm = SharedMemory(name=self._shm_name)
+            self._shm = shm
+            self._borrowed_shm = shm is not None
+            self._schema = schema
+            if base is not None:
+                self._base = base
+            self._attach()
             self._owns_shm = False
         else:
             raise ValueError("ex_array or (shape, dtype, nbytes, name) must be provided")
@@ -72,56 +842,994 @@ class MemPipe:
         "To imitate the multiprocessing.Pipe() interface"
         return self, self
 
-    def send(self, data):
-        if not isinstance(data, np.ndarray):
-            # Non-ndarray values (strings, lists, etc.) pass through the underlying pipe directly.
-            self._p_out.send((_PASSTHROUGH, data))
-            return
+    def send(self, data, meta=None, block: bool = True, timeout: float | None = None):
+        """
+        Send an ndarray (or, on a pipe made for them, a tuple or dict of
+        ndarrays) through shared memory; any other value is pickled through
+        the OS pipe. meta: the frame's metadata record on a pipe with
+        a meta_dtype (a tuple, a dict of fields or a numpy record; fields
+        left out are zero).
+        block, timeout: how long to wait for room, that is for a max_inflight
+        credit, a free ring slot (on_full="block") or a single-slot frame
+        the receiver is reading. With block=False, or once timeout seconds
+        have passed, send() raises queue.Full and nothing is sent.
+        """
+        if self._reserved is not None:
+            raise ValueError("commit() the pending reservation before sending")
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        tracer = self._tracer
+        t0 = time.monotonic_ns() if self._counters or tracer is not None else 0
+        self._take_credit(block, timeout)
+        try:
+            seq = self._send(data, meta, block, deadline, t0)
+        except BaseException:
+            self._return_credit()
+            raise
+        if tracer is not None and seq is not None:
+            tracer._record(_TR_SEND, self._trace_id, seq, t0, time.monotonic_ns())
+
+    def try_send(self, data, meta=None):
+        """
+        Send data as send() does if that needs no waiting, and return True;
+        otherwise send nothing and return False.
+        """
+        try:
+            self.send(data, meta, block=False)
+        except Full:
+            return False
+        return True
+
+    def _take_credit(self, block=True, timeout=None):
+        "Take a max_inflight credit, or raise queue.Full if none comes free in time."
+        if self._credits is not None and not self._credits.acquire(block, timeout):
+            raise Full(f"{self._max_inflight} messages of the mempipe are in flight")
+
+    def _return_credit(self, n=1):
+        if self._credits is not None:
+            for _ in range(n):
+                self._credits.release()
+
+    def _send(self, data, meta, block, deadline, t0=0):
+        """Send data and return the frame's sequence number: None for a
+        passthrough value, and for a frame on an untraced single-slot pipe."""
+        multi = _is_multi(data) and (self._schema is not None or not self.shm_created)
+        if not isinstance(data, np.ndarray) and not multi:
+            if meta is not None:
+                raise ValueError("meta can only be sent along with an ndarray frame")
+            # Non-ndarray values (strings, lists, etc.) pass through the underlying
+            # pipe, with their large buffers (if any) in shared memory.
+            if self._oob_threshold is not None and self._n_readers == 1:
+                data = self._spill(data)
+            if self._slots is None:
+                self._p_out.send((_PASSTHROUGH, data))
+            else:
+                # Tag with the frame count so the receiver can keep the order.
+                head = int(self._hdr[_HDR_HEAD]) if self.shm_created else 0
+                self._send_msg((_PASSTHROUGH, data, head))
+            return None
 
         if self.shm_created:
             msg = "GO"
         else:
             self._init_shm(data)
-            msg = (self._shape, self._shm_dtype, self._shm_size, self._shm_name)
+            msg = (self._shape, self._shm_dtype, self._shm_size, self._shm_name, self._schema,
+                   self._base)
 
-        assert data.shape == self._shape, \
-            f"Data shape {data.shape} does not match mempipe shape {self._shape}"
-        self._arr = data
-        self._p_out.send(msg)
+        if multi:
+            # The arrays are written straight into the frame; no packing copy.
+            data = self._fields_of(data)
+            shape, dtype = self._shape, self._shm_dtype
+        elif self._schema is not None:
+            raise ValueError("this mempipe carries tuples or dicts of arrays, not a single ndarray")
+        else:
+            shape, dtype = data.shape, data.dtype
+            assert data.nbytes <= self._capacity, \
+                f"Data shape {data.shape} ({data.nbytes} bytes) exceeds mempipe capacity " \
+                f"{self._shape} ({self._capacity} bytes)"
+        meta = self._pack_meta(meta)
+        cnt = self._cnt
+        if self._slots is None:
+            if not self._lock.acquire(block, _remaining(deadline)):
+                raise Full("the receiver of the mempipe is still reading its frame")
+            try:
+                t_ready = time.monotonic_ns() if cnt is not None else 0
+                self._fill(self._buffer(shape, dtype), data)
+                if meta is not None:
+                    self._metas[0] = meta
+                if cnt is not None:
+                    t_done = cnt[_CNT_FRAME_TIME] = time.monotonic_ns()
+            finally:
+                self._lock.release()
+            if not self._is_default(shape, dtype):
+                msg = (_FRAME, shape, dtype)
+            self._p_out.send(msg)
+            if cnt is not None:
+                self._count_sent(1, self._capacity if multi else data.nbytes, t_ready - t0,
+                                 t_done - t_ready)
+            if self._tracer is not None:
+                self._sent_seq += 1
+                return self._sent_seq
+            return None
+        if msg != "GO":
+            # Readers find the segment through the init tuple; MSGS takes
+            # over the count of everything sent so far.
+            self._rdrs[:, _RDR_MSGS] = self._n_sent + 1
+            for conn in self._outs:
+                conn.send(msg)
+        return self._write_slot(data, shape, dtype, meta, block, deadline, t0)
 
-    def recv(self):
+    def send_many(self, frames, metas=None):
+        """
+        Send a batch of ndarray frames, given as a sequence or as one array
+        whose first axis runs over them, through consecutive ring slots.
+        As many frames as there are free slots are written together and
+        published with one header update and at most one doorbell, so a
+        large batch goes in several steps, each waiting, dropping or raising
+        per on_full like send(). With on_full="raise" the frames before the
+        one that did not fit have been sent. A stacked array of the pipe's
+        own frame shape and dtype is copied in with one slice assignment.
+        metas: one metadata record per frame on a pipe with a meta_dtype.
+        Needs a ring pipe of single-array frames.
+        """
+        if self._slots is None:
+            raise ValueError("send_many() needs a ring pipe (slots=N)")
+        if self._reserved is not None:
+            raise ValueError("commit() the pending reservation before sending")
+        n = len(frames)
+        if metas is not None and len(metas) != n:
+            raise ValueError(f"got {len(metas)} metadata records for {n} frames")
+        if n == 0:
+            return
+        if self._schema is not None or _is_multi(frames[0]):
+            raise ValueError("send_many() sends single ndarrays; send() tuples or dicts one by one")
+        i = 0
+        if not self.shm_created:
+            # The first frame sizes the segment, as for send().
+            self.send(frames[0], None if metas is None else metas[0])
+            i = 1
+        stacked = (isinstance(frames, np.ndarray) and frames.shape[1:] == self._shape
+                   and frames.dtype == self._shm_dtype)
+        if not stacked:
+            for frame in frames[i:]:
+                if not isinstance(frame, np.ndarray):
+                    raise ValueError(f"send_many() sends ndarrays, got {type(frame).__name__}")
+                assert frame.nbytes <= self._capacity, \
+                    f"Data shape {frame.shape} ({frame.nbytes} bytes) exceeds mempipe capacity " \
+                    f"{self._shape} ({self._capacity} bytes)"
+        if self._meta_dtype is not None:
+            if isinstance(metas, np.ndarray) and metas.dtype == self._meta_dtype:
+                records = metas
+            else:
+                records = np.zeros(n, dtype=self._meta_dtype)
+                for j in range(i, n):
+                    records[j] = self._pack_meta(None if metas is None else metas[j])
+        elif metas is not None:
+            raise ValueError("this mempipe has no meta_dtype; pass one to carry metadata")
+        slots = self._slots
+        cnt = self._cnt
+        tracer = self._tracer
+        while i < n:
+            t0 = time.monotonic_ns() if cnt is not None or tracer is not None else 0
+            self._take_credit()
+            try:
+                seq = self._claim_slot()
+            except BaseException:
+                self._return_credit()
+                raise
+            # The claim waited (or dropped, or raised) for the first slot;
+            # whatever else is free right now goes in the same step.
+            k = max(1, min(n - i, slots - (seq - int(self._min_tail()))))
+            if self._credits is not None:
+                for extra in range(1, k):
+                    if not self._credits.acquire(False):
+                        k = extra
+                        break
+            seqs = np.arange(seq, seq + k)
+            idx = seqs % slots
+            self._stamps[idx] = 2 * seqs + 1
+            _ordered()
+            t_ready = time.monotonic_ns() if cnt is not None else 0
+            if stacked:
+                first = seq % slots
+                split = min(k, slots - first)
+                self._ring[first:first + split] = frames[i:i + split]
+                self._ring[:k - split] = frames[i + split:i + k]
+                self._recs[idx, _SLOT_NDIM] = -1
+            else:
+                for slot, frame in zip(idx.tolist(), frames[i:i + k]):
+                    self._write_desc(slot, frame.shape, frame.dtype)
+                    self._fill(self._buffer(frame.shape, frame.dtype, slot), frame)
+            if self._meta_dtype is not None:
+                self._metas[idx] = records[i:i + k]
+            if cnt is not None:
+                t_done = time.monotonic_ns()
+                self._recs[idx, _SLOT_TIME] = t_done
+            self._publish_slot(seq, k)
+            if cnt is not None:
+                nbytes = frames[i:i + k].nbytes if stacked else sum(f.nbytes for f in frames[i:i + k])
+                self._count_sent(k, nbytes, t_ready - t0, t_done - t_ready)
+            if tracer is not None:
+                tracer._record(_TR_SEND, self._trace_id, seq, t0, time.monotonic_ns(), k)
+            i += k
+
+    def _spill(self, value):
+        "Move the large buffers of a passthrough value into shared memory, or return it unchanged."
+        if type(value) in _SCALARS:
+            return value
+        threshold = self._oob_threshold
+        kind = type(value) if isinstance(value, (bytes, bytearray, memoryview)) else None
+        buffers = []
+
+        def out_of_band(buf):
+            # Returning True keeps a buffer in the pickle.
+            if buf.raw().nbytes < threshold:
+                return True
+            buffers.append(buf)
+
+        if kind is not None and memoryview(value).nbytes < threshold:
+            return value
+        obj = value if kind is None else pickle.PickleBuffer(value)
+        skeleton = pickle.dumps(obj, protocol=5, buffer_callback=out_of_band)
+        if not buffers:
+            return value
+        spans, size = [], _SPILL_HDR
+        for buf in buffers:
+            spans.append((size, buf.raw().nbytes))
+            size = _align(size + spans[-1][1])
+
+        shm, gen = self._spill_out, None
+        if shm is not None and struct.unpack_from("q", shm.buf)[0] != self._spill_gen:
+            # The receiver has not copied out the previous value yet.
+            shm = SharedMemory(create=True, size=size)
+        else:
+            if shm is None or shm.size < size:
+                self._close_spill_out()
+                shm = self._spill_out = SharedMemory(create=True, size=_align(size, 1 << 20))
+                self._spill_gen = 0
+            self._spill_gen += 1
+            gen = self._spill_gen
+        for (off, nbytes), buf in zip(spans, buffers):
+            shm.buf[off:off + nbytes] = buf.raw()
+        if gen is None:
+            shm.close()
+            # The receiver unlinks a one-off segment; stop our resource
+            # tracker from unlinking it as leaked when this process exits.
+            # Done before sending, so it cannot undo the receiver's register.
+            resource_tracker.unregister(shm._name, "shared_memory")
+            # Forget the ones the receiver has unlinked since.
+            self._spill_once = [name for name in self._spill_once if _segment_exists(name)]
+            self._spill_once.append(shm.name)
+        return _Spilled(skeleton, shm.name, spans, kind, gen)
+
+    def _unspill(self, spilled):
+        "Rebuild a spilled passthrough value and hand its segment back."
+        if spilled.gen is None:
+            shm = SharedMemory(name=spilled.name)
+            try:
+                return spilled.load(shm.buf)
+            finally:
+                shm.close()
+                shm.unlink()
+        if self._spill_in is None or self._spill_in[0] != spilled.name:
+            # First spill from this sender, or it outgrew its last segment.
+            self._close_spill_in()
+            self._spill_in = (spilled.name, _map_segment(spilled.name))
+        seg = self._spill_in[1]
+        try:
+            return spilled.load(seg)
+        finally:
+            struct.pack_into("q", seg, 0, spilled.gen)
+
+    def _close_spill_in(self):
+        spill_in, self._spill_in = getattr(self, "_spill_in", None), None
+        if spill_in is not None:
+            spill_in[1].close()
+
+    def _close_spill_out(self):
+        shm, self._spill_out = getattr(self, "_spill_out", None), None
+        if shm is not None:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        names, self._spill_once = getattr(self, "_spill_once", []), []
+        for name in names:
+            _unlink_segment(name)
+
+    def _send_msg(self, msg, reader=None):
+        # Ring mode: send msg to one reader or all of them. Count the message
+        # before writing it: a reader that sees the count early just blocks in
+        # recv() for a moment, whereas counting afterwards lets a reader woken
+        # by the write spin on a pipe it thinks is empty until the sender gets
+        # the CPU back.
+        readers = range(self._n_readers) if reader is None else (reader,)
+        for i in readers:
+            if self.shm_created:
+                self._rdrs[i, _RDR_MSGS] += 1
+            self._outs[i].send(msg)
+        if not self.shm_created:
+            self._n_sent += 1
+
+    def _write_slot(self, data, shape, dtype, meta=None, block=True, deadline=None, t0=0):
+        "Copy data (and its metadata record) into the next ring slot and return its sequence number."
+        seq = self._claim_slot(block, deadline)
+        slot = seq % self._slots
+        cnt = self._cnt
+        t_ready = time.monotonic_ns() if cnt is not None else 0
+        self._write_desc(slot, shape, dtype)
+        self._fill(self._buffer(shape, dtype, slot), data)
+        if meta is not None:
+            self._metas[slot] = meta
+        if cnt is not None:
+            t_done = self._recs[slot, _SLOT_TIME] = time.monotonic_ns()
+        self._publish_slot(seq)
+        if cnt is not None:
+            nbytes = data.nbytes if isinstance(data, np.ndarray) else self._capacity
+            self._count_sent(1, nbytes, t_ready - t0, t_done - t_ready)
+        return seq
+
+    def _frame_nbytes(self, data):
+        "Bytes of a frame as recv() returns it: data, or its (data, meta) pair."
+        if self._meta_dtype is not None and isinstance(data, tuple) and len(data) == 2:
+            data = data[0]
+        return data.nbytes if isinstance(data, np.ndarray) else self._capacity
+
+    def _count_sent(self, n, nbytes, wait_ns, copy_ns):
+        cnt = self._cnt
+        cnt[_CNT_SENT] += n
+        cnt[_CNT_SENT_BYTES] += nbytes
+        cnt[_CNT_SEND_WAIT_NS] += wait_ns
+        cnt[_CNT_SEND_COPY_NS] += copy_ns
+
+    def _count_recv(self, n, nbytes, wait_ns, copy_ns, published):
+        "Count n received frames; published: their publish time(s) in monotonic ns."
+        cnt = self._cnt
+        now = time.monotonic_ns()
+        cnt[_CNT_RECV] += n
+        cnt[_CNT_RECV_BYTES] += nbytes
+        cnt[_CNT_RECV_WAIT_NS] += wait_ns
+        cnt[_CNT_RECV_COPY_NS] += copy_ns
+        if n == 1:
+            bucket = max(now - int(published), 1).bit_length() - 1
+            cnt[_CNT_HIST + min(bucket, _HIST_BUCKETS - 1)] += 1
+        else:
+            buckets = np.log2(np.maximum(now - published, 1)).astype(np.int64)
+            np.add.at(np.asarray(cnt), _CNT_HIST + np.minimum(buckets, _HIST_BUCKETS - 1), 1)
+
+    def _claim_slot(self, block=True, deadline=None):
+        "Wait for (or make) room for the next frame and return its sequence number."
+        slots = self._slots
+        seq = int(self._hdr[_HDR_HEAD])
+        if seq - self._min_tail() >= slots:
+            # "drop": overwrite the oldest frame; the receiver sees its stamp
+            # change and skips it.
+            if self._on_full == "block" and block:
+                full = not _wait_until(lambda: seq - self._min_tail() < slots, _remaining(deadline))
+            else:
+                full = self._on_full != "drop"
+            if full:
+                raise Full(f"all {slots} slots of the mempipe hold unread frames")
+        # Seqlock-style stamp: odd while the slot is being written, even
+        # once frame `seq` is complete.
+        self._stamps[seq % slots] = 2 * seq + 1
+        _ordered()
+        return seq
+
+    def _min_tail(self):
+        # A slot is free once every reader has released it.
+        if self._n_readers == 1:
+            tail = self._rdrs[0, _RDR_TAIL]
+        else:
+            tail = self._rdrs[:, _RDR_TAIL].min()
+        _ordered()
+        return tail
+
+    def _publish_slot(self, seq, n=1):
+        "Publish frames seq .. seq + n - 1 and ring any reader that went to sleep."
+        _ordered()
+        if n == 1:
+            self._stamps[seq % self._slots] = 2 * seq + 2
+        else:
+            seqs = np.arange(seq, seq + n)
+            self._stamps[seqs % self._slots] = 2 * seqs + 2
+        _ordered()
+        self._hdr[_HDR_HEAD] = seq + n
+        _fence()
+        rdrs = self._rdrs
+        for i in range(self._n_readers):
+            if rdrs[i, _RDR_WAITING]:
+                rdrs[i, _RDR_WAITING] = 0
+                self._send_msg(_WAKE, i)
+
+    def reserve(self, shape=None, dtype=None, meta=None):
+        """
+        Claim the next frame of shared memory so the producer can fill it in
+        place, then send it with commit():
+
+            with pipe.reserve() as buf:
+                np.add(x, y, out=buf)
+
+        Leaving the with-block commits; an exception abandons the frame. Without
+        a with-block, write into `pipe.reserve().array` and call commit().
+        The pipe's shape and dtype must already be known (ex_array or a prior
+        send()). On a single-slot pipe the reservation holds the pipe lock.
+        shape, dtype: reserve a frame other than the pipe's own shape and
+        dtype, as long as it fits in the pipe's capacity. On a pipe for tuple
+        or dict messages, `array` is that tuple or dict of writable arrays.
+        meta: the frame's metadata record, as for send(); it can also be
+        given (or replaced) by commit(meta=...).
+        """
+        if not self.shm_created:
+            raise ValueError("reserve() needs the shared memory to exist: pass ex_array or send() first")
+        if self._reserved is not None:
+            raise ValueError("commit() the previous reservation before reserving again")
+        shape = self._shape if shape is None else tuple(shape)
+        dtype = self._shm_dtype if dtype is None else np.dtype(dtype)
+        if int(np.prod(shape)) * dtype.itemsize > self._capacity:
+            raise ValueError(f"a {shape} {dtype} frame exceeds the mempipe capacity of {self._capacity} bytes")
+        meta = self._pack_meta(meta)
+        self._take_credit()
+        if self._slots is None:
+            self._lock.acquire()
+            self._reserved = -1
+            self._reserved_msg = "GO" if self._is_default(shape, dtype) else (_FRAME, shape, dtype)
+            slot = 0
+            buf = self._buffer(shape, dtype)
+        else:
+            try:
+                self._reserved = self._claim_slot()
+            except BaseException:
+                self._return_credit()
+                raise
+            slot = self._reserved % self._slots
+            self._write_desc(slot, shape, dtype)
+            buf = self._buffer(shape, dtype, slot)
+        if meta is not None:
+            self._metas[slot] = meta
+        self._reserved_nbytes = buf.nbytes
+        if self._schema is not None and self._is_default(shape, dtype):
+            buf = self._unpack(buf)
+        return _Reservation(self, buf)
+
+    def commit(self, meta=None):
+        "Send the frame claimed by reserve() without copying it."
+        if meta is not None and self._reserved is not None:
+            slot = 0 if self._slots is None else self._reserved % self._slots
+            self._metas[slot] = self._pack_meta(meta)
+        cnt = self._cnt
+        tracer = self._tracer
+        t0 = time.monotonic_ns() if tracer is not None else 0
+        if cnt is not None and self._reserved is not None:
+            # The frame was written in place: no copy to count.
+            t_done = time.monotonic_ns()
+            if self._slots is None:
+                cnt[_CNT_FRAME_TIME] = t_done
+            else:
+                self._recs[self._reserved % self._slots, _SLOT_TIME] = t_done
+        seq = self._end_reservation()
+        if self._slots is None:
+            self._p_out.send(self._reserved_msg)
+        else:
+            self._publish_slot(seq)
+        if cnt is not None:
+            self._count_sent(1, self._reserved_nbytes, 0, 0)
+        if tracer is not None:
+            if self._slots is None:
+                self._sent_seq += 1
+                seq = self._sent_seq
+            tracer._record(_TR_SEND, self._trace_id, seq, t0, time.monotonic_ns())
+
+    def _abort(self):
+        # The claimed ring slot is reused by the next frame; its stamp stays
+        # odd so a reader never trusts the half-written contents.
+        self._end_reservation()
+        self._return_credit()
+
+    def _end_reservation(self):
+        seq, self._reserved = self._reserved, None
+        if seq is None:
+            raise ValueError("no reservation to commit")
+        if self._slots is None:
+            self._lock.release()
+        return seq
+
+    def recv(self, copy: bool = True):
+        """
+        Return the message armed by the last successful poll(), or None.
+        On a pipe with a meta_dtype a frame comes back as (frame, meta).
+        copy: if False, an ndarray frame is returned as a read-only view into
+        shared memory instead of a private copy. The view stays valid until
+        release() is called, and until then the sender cannot reuse its
+        slot (a single-slot pipe blocks the sender's next send() entirely).
+        With on_full="drop" frames are always copied out in poll(), so the
+        returned array is that copy and needs no release().
+        Raises EOFError once wait() or arecv() has found the sender gone.
+        """
         if not self._polled:
+            if self._eof:
+                raise EOFError("the sending end of the mempipe was closed")
             return None
         self._polled = False
+        tracer = self._tracer
+        traced = tracer is not None and not self._is_passthrough
+        t0 = time.monotonic_ns() if traced else 0
+        try:
+            data = self._take_armed(copy)
+        finally:
+            # Only now: a single-slot sender may overwrite the frame as soon
+            # as it has the credit.
+            self._return_credit()
+        if traced:
+            tracer._record(_TR_RECV, self._trace_id, self._last_seq, t0, time.monotonic_ns())
+        return data
+
+    def _take_armed(self, copy):
         if self._is_passthrough:
             self._is_passthrough = False
             return self._passthrough_val
-        return self._arr
+        cnt = self._cnt
+        t0 = time.monotonic_ns() if cnt is not None else 0
+        if self._slots is not None and self._on_full == "drop":
+            # poll() already copied and validated the frame.
+            data, self._frame = self._frame, None
+            if cnt is not None:
+                self._count_recv(1, self._frame_nbytes(data), 0, *self._frame_times)
+            return data
+        if not copy:
+            data = self._hold()
+            if cnt is not None:
+                seq = self._held[-1][0]
+                published = cnt[_CNT_FRAME_TIME] if seq is None else self._recs[seq % self._slots, _SLOT_TIME]
+                self._count_recv(1, self._frame_nbytes(data), time.monotonic_ns() - t0, 0, published)
+            return data
+        if self._slots is None:
+            with self._lock:
+                t_locked = time.monotonic_ns() if cnt is not None else 0
+                data = self._view.copy() if self._desc is None else self._buffer(*self._desc).copy()
+                data = self._with_meta(data)
+                if cnt is not None:
+                    self._count_recv(1, self._frame_nbytes(data), t_locked - t0,
+                                     time.monotonic_ns() - t_locked, cnt[_CNT_FRAME_TIME])
+                return data
+        seq, self._rd_seq = self._rd_seq, None
+        slot = seq % self._slots
+        data = self._with_meta(self._read_slot(slot).copy(), slot)
+        if cnt is not None:
+            self._count_recv(1, self._frame_nbytes(data), 0, time.monotonic_ns() - t0,
+                             self._recs[slot, _SLOT_TIME])
+        self._release_seq(seq)
+        return data
+
+    def recv_many(self, max_n: int | None = None, timeout=0.0):
+        """
+        Wait up to timeout seconds (forever if None) for a message, then
+        return it along with every message already queued behind it, up to
+        max_n in all, or None if nothing arrived in time. When they are all
+        ndarray frames of one shape and dtype they come back stacked into
+        one array (with a structured array of their records on a pipe with
+        a meta_dtype); otherwise as a list of what recv() would have
+        returned. Frames are always copied. On a ring pipe a run of frames
+        is copied out with one gather and handed back to the sender at once.
+        A message already armed by poll() is the first one returned.
+        """
+        if max_n is not None and max_n < 1:
+            raise ValueError(f"max_n must be a positive integer, got {max_n}")
+        if not (self._polled or self.poll(timeout)):
+            return None
+        limit = float("inf") if max_n is None else max_n
+        # (stacked frames, their records, None) or (None, None, message)
+        parts, n = [], 0
+        while n < limit and (self._polled or self.poll()):
+            if self._rd_seq is not None and self._schema is None:
+                frames, records = self._take_frames(limit - n)
+                parts.append((frames, records, None))
+                n += len(frames)
+                continue
+            is_frame = not self._is_passthrough and self._schema is None
+            msg = self.recv()
+            if not is_frame:
+                parts.append((None, None, msg))
+            elif self._meta_dtype is None:
+                parts.append((msg[None], None, None))
+            else:
+                parts.append((msg[0][None], np.array([msg[1]], dtype=self._meta_dtype), None))
+            n += 1
+        kinds = {(frames.shape[1:], frames.dtype) if frames is not None else None
+                 for frames, _, _ in parts}
+        if len(kinds) == 1 and None not in kinds:
+            frames = parts[0][0] if len(parts) == 1 else np.concatenate([p[0] for p in parts])
+            if self._meta_dtype is None:
+                return frames
+            return frames, parts[0][1] if len(parts) == 1 else np.concatenate([p[1] for p in parts])
+        out = []
+        for frames, records, msg in parts:
+            if frames is None:
+                out.append(msg)
+            elif records is None:
+                out.extend(frames)
+            else:
+                out.extend(zip(frames, records))
+        return out
+
+    def _take_frames(self, limit):
+        """Copy out the armed ring frame and up to limit - 1 frames of the
+        same kind right behind it, then release them together."""
+        seq = self._rd_seq
+        # HEAD before the OS pipe, as in _try_arm(): a passthrough sent
+        # before any of these frames was published is then in _pending.
+        end = int(self._hdr[_HDR_HEAD])
+        _ordered()
+        self._drain()
+        if limit < end - seq:
+            end = seq + int(limit)
+        if self._pending:
+            end = min(end, max(self._pending[0][1], seq + 1))
+        idx = np.arange(seq, end) % self._slots
+        odd = np.flatnonzero(self._recs[idx, _SLOT_NDIM] >= 0)
+        if len(odd):
+            # Stop at the first frame whose shape or dtype is not the pipe's.
+            end = seq + max(int(odd[0]), 1)
+            idx = idx[:end - seq]
+        cnt = self._cnt
+        tracer = self._tracer
+        t0 = time.monotonic_ns() if cnt is not None or tracer is not None else 0
+        if len(odd) and odd[0] == 0:
+            frames = self._read_slot(int(idx[0])).copy()[None]
+        else:
+            frames = self._ring[idx]
+        records = None if self._meta_dtype is None else self._metas[idx]
+        if cnt is not None:
+            self._count_recv(len(idx), frames.nbytes, 0, time.monotonic_ns() - t0,
+                             self._recs[idx, _SLOT_TIME])
+        self._rd_seq = None
+        self._polled = False
+        self._return_credit(end - seq)
+        self._next_seq = end
+        self._last_seq = end - 1
+        if self._held:
+            for s in range(seq, end):
+                self._release_seq(s)
+        else:
+            _ordered()
+            self._rdr[_RDR_TAIL] = end
+        if tracer is not None:
+            tracer._record(_TR_RECV, self._trace_id, seq, t0, time.monotonic_ns(), end - seq)
+        return frames, records
+
+    def _hold(self):
+        # Hand out a read-only view and keep its slot out of the sender's
+        # reach until release().
+        if self._slots is None:
+            if self._held:
+                raise ValueError("release() the previous view before taking another one")
+            self._lock.acquire()
+            self._held.append([None, False])
+            view = self._view.view() if self._desc is None else self._buffer(*self._desc)
+            slot = None
+        else:
+            seq, self._rd_seq = self._rd_seq, None
+            self._held.append([seq, False])
+            slot = seq % self._slots
+            view = self._read_slot(slot)
+        view.flags.writeable = False
+        return self._with_meta(view, slot)
 
-    def poll(self, *args, **kwargs):
-        if not self._p_in.poll(*args, **kwargs):
+    def release(self):
+        "Hand the oldest view returned by recv(copy=False) back to the sender."
+        for entry in self._held:
+            if not entry[1]:
+                break
+        else:
+            raise ValueError("no view to release")
+        if entry[0] is None:
+            self._held.clear()
+            self._lock.release()
+        else:
+            self._release_seq(entry[0])
+
+    @contextmanager
+    def recv_view(self):
+        """
+        Context manager form of recv(copy=False): yields the armed message and
+        releases its view on exit.
+        """
+        n_held = len(self._held)
+        data = self.recv(copy=False)
+        try:
+            yield data
+        finally:
+            if len(self._held) > n_held:
+                self.release()
+
+    async def arecv(self, copy: bool = True):
+        """
+        Wait for the next message without blocking the running event loop,
+        then return it as recv(copy) would. The loop watches the OS pipe,
+        which the sender rings when it publishes to a waiting reader, so
+        there is neither a helper thread nor busy-polling. `async for msg
+        in pipe` does the same until the sender closes the pipe or exits,
+        which this process only sees after close_send_end(). Needs a loop
+        that supports add_reader() (not the proactor loop on Windows).
+        """
+        if not self._arm_ready():
+            await self._until_armed()
+        return self.recv(copy=copy)
+
+    def _arm_ready(self):
+        """
+        Arm the next message if it is already here, without spinning or
+        blocking, for wait() and arecv(). A message armed earlier stays
+        armed, and a sender that hung up counts as ready: recv() then raises
+        EOFError.
+        """
+        if self._polled or self._eof:
+            return True
+        try:
+            while not self.poll():
+                if self._slots is None or not self._p_in.poll():
+                    return False
+                # Readable, yet MSGS had nothing new for us: a message
+                # counted after we looked, or the sender hung up.
+                self._take(self._p_in.recv())
+            return True
+        except EOFError:
+            self._eof = True
+            return True
+
+    async def _until_armed(self):
+        loop = asyncio.get_running_loop()
+        fd = self._p_in.fileno()
+        readable = asyncio.Event()
+        loop.add_reader(fd, readable.set)
+        try:
+            while True:
+                # As in _sleep_until(), with the loop doing the sleeping.
+                _set_waiting([self], 1)
+                if self._arm_ready():
+                    return
+                await readable.wait()
+                readable.clear()
+        finally:
+            loop.remove_reader(fd)
+            _set_waiting([self], 0)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.arecv()
+        except EOFError:
+            raise StopAsyncIteration from None
+
+    def _release_seq(self, seq):
+        "Hand ring frame `seq` back to the sender; slots are freed in order."
+        held = self._held
+        _ordered()
+        if not held:
+            self._rdr[_RDR_TAIL] = seq + 1
+            return
+        for entry in held:
+            if entry[0] == seq:
+                entry[1] = True
+                break
+        else:
+            held.append([seq, True])
+        while held and held[0][1]:
+            self._rdr[_RDR_TAIL] = held.popleft()[0] + 1
+
+    def poll(self, timeout=0.0):
+        """
+        Wait up to timeout seconds (forever if None) for the next message and
+        arm it for recv(). Polling again before recv() drops the armed
+        message and arms the next one (a MemFanIn keeps it instead).
+        """
+        if self._slots is not None:
+            return self._poll_ring(timeout)
+        if not self._p_in.poll(timeout):
             return False
         p_data = self._p_in.recv()
         if p_data == "GO":
+            self._desc = None
             self._is_passthrough = False
-            self._polled = True
+            self._armed()
             return True
         if isinstance(p_data, tuple):
+            if len(p_data) == 3 and p_data[0] == _FRAME:
+                self._desc = (tuple(p_data[1]), p_data[2])
+                self._is_passthrough = False
+                self._armed()
+                return True
             if len(p_data) == 2 and p_data[0] == _PASSTHROUGH:
-                self._passthrough_val = p_data[1]
-                self._is_passthrough = True
-                self._polled = True
+                self._arm_passthrough(p_data[1])
                 return True
-            # Shape/dtype init tuple: (shape, dtype, nbytes, name)
+            # Shape/dtype init tuple: (shape, dtype, nbytes, name, schema, base)
             if not self.shm_created:
-                self._init_shm(shape=p_data[0], dtype=p_data[1], nbytes=p_data[2], name=p_data[3])
+                self._init_shm(shape=p_data[0], dtype=p_data[1], nbytes=p_data[2], name=p_data[3],
+                               schema=p_data[4] if len(p_data) > 4 else None,
+                               base=p_data[5] if len(p_data) > 5 else None)
+            self._desc = None
             self._is_passthrough = False
-            self._polled = True
+            self._armed()
             return True
         raise ValueError("Invalid message received")
 
+    def _armed(self):
+        "Mark a new message armed; one armed before it is dropped."
+        if self._polled:
+            self._return_credit()
+        self._polled = True
+        if self._tracer is not None and not self._is_passthrough:
+            if self._slots is None:
+                self._last_seq += 1
+            t = time.monotonic_ns()
+            self._tracer._record(_TR_ARMED, self._trace_id, self._last_seq, t, t)
+
+    def _arm_passthrough(self, value):
+        self._discard_armed()
+        if isinstance(value, _Spilled):
+            value = self._unspill(value)
+        self._passthrough_val = value
+        self._is_passthrough = True
+        self._armed()
+
+    def _spin(self, check, deadline):
+        "Busy-poll check() for up to the spin budget, but not past deadline."
+        return bool(_spin(check, self._spin_s, deadline))
+
+    def _poll_ring(self, timeout):
+        # Spin on the header for a while, then sleep on the OS pipe with
+        # WAITING set so the sender's next publish rings the doorbell.
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        if self._spin(self._try_arm, deadline):
+            return True
+        if self._wait == "spin" or (timeout is not None and timeout <= 0):
+            return False
+        return _sleep_until(self._try_arm, [self], deadline)
+
+    def _try_arm(self):
+        "Arm the next ring message, in send order; False if there is none yet."
+        while True:
+            attached = self.shm_created
+            # HEAD must be read before the OS pipe is drained: a passthrough
+            # sent before frame n was published is then guaranteed to be seen.
+            head = int(self._hdr[_HDR_HEAD]) if attached else 0
+            _ordered()
+            self._drain()
+            if self.shm_created == attached:
+                break
+        pending, slots = self._pending, self._slots
+        nxt = self._next_seq
+        while True:
+            if pending and pending[0][1] <= nxt:
+                self._arm_passthrough(pending.popleft()[0])
+                return True
+            if nxt >= head:
+                return False
+            if self._mode == "latest" and head - nxt > 1:
+                # Only the newest frame is wanted; a passthrough sent before
+                # it is still delivered first.
+                nxt = head - 1
+                self._next_seq = nxt
+                continue
+            if self._on_full == "drop" and head - nxt > slots:
+                # Lapped by the sender: everything older than a ring is gone.
+                nxt = head - slots
+                self._next_seq = nxt
+                continue
+            armed = self._arm_slot(nxt)
+            nxt += 1
+            self._next_seq = nxt
+            if armed:
+                return True
+            if self._mode == "latest":
+                # Overwritten while we copied it: there is a newer one.
+                head = int(self._hdr[_HDR_HEAD])
+                _ordered()
+
+    def _drain(self):
+        # Before attaching, the OS pipe is all there is; afterwards MSGS says
+        # how many messages are waiting, so an empty pipe costs no syscall.
+        if self.shm_created:
+            for _ in range(int(self._rdr[_RDR_MSGS]) - self._n_recv):
+                self._take(self._p_in.recv())
+            return
+        while not self.shm_created and self._p_in.poll():
+            self._take(self._p_in.recv())
+
+    def _take(self, p_data):
+        "Consume one ring-mode OS-pipe message."
+        self._n_recv += 1
+        if p_data == _WAKE:
+            return
+        if p_data[0] == _PASSTHROUGH:
+            self._pending.append((p_data[1], p_data[2]))
+        elif not self.shm_created:
+            # Shape/dtype init tuple: (shape, dtype, nbytes, name, schema, base)
+            self._init_shm(shape=p_data[0], dtype=p_data[1], nbytes=p_data[2], name=p_data[3],
+                           schema=p_data[4] if len(p_data) > 4 else None,
+                           base=p_data[5] if len(p_data) > 5 else None)
+
+    def _arm_slot(self, seq):
+        self._discard_armed()
+        slot = seq % self._slots
+        if self._on_full == "drop":
+            # The sender may overwrite any slot at any time: copy the frame out
+            # now and keep it only if its stamp did not change meanwhile.
+            stamp = 2 * seq + 2
+            if self._stamps[slot] != stamp:
+                return False
+            _ordered()
+            t0 = time.monotonic_ns() if self._cnt is not None else 0
+            try:
+                data = self._with_meta(self._read_slot(slot).copy(), slot)
+                published = self._recs[slot, _SLOT_TIME]
+            except (ValueError, TypeError):
+                # A record torn by a concurrent overwrite can describe an
+                # impossible frame; only an intact one is a real error.
+                if self._stamps[slot] == stamp:
+                    raise
+                return False
+            _ordered()
+            if self._stamps[slot] != stamp:
+                return False
+            self._release_seq(seq)
+            self._frame = data
+            if self._cnt is not None:
+                self._frame_times = (time.monotonic_ns() - t0, published)
+        else:
+            self._rd_seq = seq
+        self.skipped = seq - self._last_seq - 1
+        self._last_seq = seq
+        self._is_passthrough = False
+        self._armed()
+        return True
+
+    def _discard_armed(self):
+        # A second poll() without recv() drops the first message; in ring mode
+        # its slot must still be handed back to the sender.
+        if self._rd_seq is not None:
+            self._release_seq(self._rd_seq)
+            self._rd_seq = None
+
+    def close_send_end(self):
+        """
+        Close this process's handle on the sending end, once the pipe has
+        been handed to the process that sends on it. The OS pipe only
+        reports EOF when no process holds that end any more, so until then
+        recv() cannot raise EOFError, wait() keeps waiting and `async for`
+        never ends when the sender closes the pipe or exits. This end can
+        still receive, but must not send any more.
+        """
+        for conn in [self._p_out, *self._outs]:
+            if conn is not None:
+                conn.close()
+
     def close(self):
+        # A view or reservation on a single-slot pipe also holds the lock;
+        # let go of it so the other end is not left blocked.
+        held = getattr(self, "_held", None)
+        if held and held[0][0] is None:
+            held.clear()
+            self._lock.release()
+        if getattr(self, "_reserved", None) == -1:
+            self._abort()
+        # Drop our views first: SharedMemory.close() refuses to unmap while
+        # ndarrays still export its buffer.
+        self._detach()
+        self._close_spill_out()
+        self._close_spill_in()
+        # One-off spill segments this end received but never read.
+        for value, _ in getattr(self, "_pending", ()):
+            if isinstance(value, _Spilled) and value.gen is None:
+                _unlink_segment(value.name)
         shm = getattr(self, "_shm", None)
+        if getattr(self, "_borrowed_shm", False):
+            shm = self._shm = None
+        block, self._pool_block = getattr(self, "_pool_block", None), None
+        if block is not None:
+            self._pool._release(*block)
         if shm is not None:
             try:
                 shm.close()
@@ -142,18 +1850,84 @@ class MemPipe:
                 except Exception:
                     pass
 
+    def __getstate__(self):
+        # The mapping and the view over it are process-local; the receiving
+        # side re-attaches by name in __setstate__.
+        state = self.__dict__.copy()
+        for attr in ("_shm", "_spill_out", "_spill_gen", "_spill_in", "_spill_once", "_pool",
+                     "_pool_block"):
+            state.pop(attr, None)
+        for attr in _VIEW_ATTRS:
+            state.pop(attr, None)
+        return state
+
     def __setstate__(self, state):
         # When a MemPipe is pickled (e.g. during Process.start), the receiving
         # side must not inherit ownership of the shared memory.
         self.__dict__.update(state)
         self._owns_shm = False
+        self._borrowed_shm = False
         if '_is_passthrough' not in self.__dict__:
             self._is_passthrough = False
         if '_passthrough_val' not in self.__dict__:
             self._passthrough_val = None
+        for attr, default in _STATE_DEFAULTS.items():
+            self.__dict__.setdefault(attr, copy(default))
+        self._shm = None
+        self._detach()
+        if self.__dict__.get("shm_created"):
+            self._attach()
+        if self._counters:
+            _counted.add(self)
 
     def __del__(self):
         try:
             self.close()
         except Exception:
             pass
+
+
+def snapshot():
+    """
+    stats() of every pipe with counters that this process holds an end of,
+    keyed by the name of its segment (with "+offset" for a pipe in a
+    MemPool). The counters live in shared memory, so the process that made
+    a Pipeline sees what its stages have done.
+    """
+    out = {}
+    for pipe in list(_counted):
+        if pipe._cnt is not None:
+            key = pipe._shm_name if not pipe._base else f"{pipe._shm_name}+{pipe._base}"
+            out.setdefault(key, pipe.stats())
+    return out
+
+
+def wait(pipes, timeout=None):
+    """
+    Wait up to timeout seconds (forever if None) until at least one of
+    `pipes` (MemPipes or MemBroadcast readers) has a message, like
+    multiprocessing.connection.wait(), and return the ready ones in the
+    order given. Each returned pipe has its message armed: call recv() on
+    it, not poll(), which would drop it. A pipe that poll() had already
+    armed is ready, and so is one whose sender hung up (seen only after
+    close_send_end() in this process); its recv() raises EOFError. Spins
+    first on the ring pipes for the longest spin budget among them, then
+    sleeps on the OS pipes of all of them.
+    """
+    pipes = list(pipes)
+    deadline = None if timeout is None else time.perf_counter() + timeout
+
+    def ready():
+        return [pipe for pipe in pipes if pipe._arm_ready()]
+
+    found = ready()
+    if found:
+        return found
+    rings = [pipe for pipe in pipes if pipe._slots is not None]
+    # Spin on the ring headers only: polling a single-slot pipe, or looking
+    # for a hung-up sender, costs a syscall.
+    found = _spin(lambda: [pipe for pipe in rings if pipe._polled or pipe._try_arm()],
+                  max((pipe._spin_s for pipe in rings), default=0.0), deadline)
+    if found or (timeout is not None and timeout <= 0):
+        return found
+    return _sleep_until(ready, pipes, deadline)
@@ -0,0 +1,94 @@
+"NUMA: which memory node a segment lives on, and binding it to one (Linux only)."
+
+from collections import Counter
+import ctypes
+import ctypes.util
+import mmap
+import os
+import platform
+
+# mbind() and move_pages() have no wrappers in Python or libc proper, so they
+# are called by number. Elsewhere binding is skipped and nodes are unknown.
+_SYSCALLS = {"x86_64": (237, 279), "aarch64": (235, 239)}
+_SYS_MBIND, _SYS_MOVE_PAGES = _SYSCALLS.get(platform.machine(), (None, None))
+_MPOL_BIND = 2
+_MPOL_MF_MOVE = 2
+
+_libc = None
+
+
+def _syscall(*args):
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+    if _libc.syscall(*args) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+def _parse_list(text):
+    "'0-2,4' -> [0, 1, 2, 4], as in /sys/devices/system/node/online."
+    out = []
+    for part in text.strip().split(","):
+        if part:
+            lo, _, hi = part.partition("-")
+            out.extend(range(int(lo), int(hi or lo) + 1))
+    return out
+
+
+def numa_nodes():
+    "The online NUMA nodes; [0] on machines (and systems) that do not have several."
+    try:
+        with open("/sys/devices/system/node/online") as f:
+            return _parse_list(f.read()) or [0]
+    except OSError:
+        return [0]
+
+
+def cpu_node(cpu):
+    "The NUMA node of a CPU number, or None if the system does not say."
+    try:
+        entries = os.listdir(f"/sys/devices/system/cpu/cpu{int(cpu)}")
+    except OSError:
+        return None
+    nodes = [int(e[4:]) for e in entries if e.startswith("node") and e[4:].isdigit()]
+    return nodes[0] if nodes else None
+
+
+def _bind(address, length, node):
+    """
+    Put the pages of [address, address + length) on `node`, including those
+    of a shared segment that other processes fault in later. Best effort:
+    returns False where there is nothing to choose between (one node, or no
+    mbind()) and where the system refuses, as seccomp filters in containers
+    do with EPERM.
+    """
+    if len(numa_nodes()) < 2 or _SYS_MBIND is None:
+        return False
+    words = node // 64 + 1
+    mask = (ctypes.c_ulong * words)()
+    mask[node // 64] = 1 << node % 64
+    # The kernel reads maxnode - 1 bits of the mask.
+    try:
+        _syscall(_SYS_MBIND, ctypes.c_void_p(address), ctypes.c_ulong(length), _MPOL_BIND,
+                 mask, ctypes.c_ulong(words * 64 + 1), _MPOL_MF_MOVE)
+    except OSError:
+        return False
+    return True
+
+
+def _page_nodes(address, length):
+    "Counter of node -> this process's resident pages of the range; empty if the system will not say."
+    if _SYS_MOVE_PAGES is None:
+        return Counter()
+    first = address - address % mmap.PAGESIZE
+    n = -(-(address + length - first) // mmap.PAGESIZE)
+    pages = (ctypes.c_void_p * n)(*range(first, first + n * mmap.PAGESIZE, mmap.PAGESIZE))
+    status = (ctypes.c_int * n)()
+    # Without target nodes move_pages() moves nothing and reports where each
+    # page is, or a negative errno for pages not faulted in.
+    try:
+        _syscall(_SYS_MOVE_PAGES, 0, ctypes.c_ulong(n), pages, None, status, 0)
+    except OSError:
+        return Counter()
+    return Counter(s for s in status if s >= 0)
@@ -0,0 +1,340 @@
+"Pipeline: a chain of worker processes connected by MemPipes."
+
+from collections import deque
+from multiprocessing import Event, Process
+from multiprocessing.pool import RemoteTraceback
+from multiprocessing.shared_memory import SharedMemory
+from queue import Full
+import os
+import pickle
+import time
+import traceback
+
+import numpy as np
+
+from .mempipe import _TR_WORK, MemPipe, _align, _map_segment, _posixshmem
+from .numa import cpu_node
+
+
+class _Stop:
+    "Shutdown sentinel; each stage appends its statistics on the way through."
+
+    def __init__(self):
+        self.stats = []
+
+
+class _Failed:
+    "A stage's exception, travelling downstream in place of its result."
+
+    def __init__(self, stage, exc, buffer=None):
+        # Pickling drops tracebacks and causes, so keep the worker's one as
+        # text and attach it on the receiving end, as multiprocessing.Pool does.
+        self.tb = '\n"""\n%s"""' % "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+        try:
+            pickle.dumps(exc)
+        except Exception:
+            exc = RuntimeError(f"{type(exc).__name__}: {exc}")
+        self.stage = stage
+        self.exc = exc
+        # In-place mode: the buffer the failed message was in.
+        self.buffer = buffer
+
+    def error(self):
+        self.exc.__cause__ = RemoteTraceback(self.tb)
+        return self.exc
+
+
+class _Buffers:
+    """Equal-sized frames in one shared segment, addressed by index. The
+    pipeline's process creates and unlinks it; the stages map it."""
+
+    def __init__(self, ex_array, n):
+        self.shape, self.dtype, self.n = ex_array.shape, ex_array.dtype, n
+        self.stride = _align(max(ex_array.nbytes, 1))
+        self._shm = SharedMemory(create=True, size=self.stride * n)
+        self.name = self._shm.name
+        self._attach(self._shm.buf)
+
+    def _attach(self, buf):
+        strides = np.empty(self.shape, dtype=self.dtype).strides
+        self.frames = np.ndarray((self.n,) + self.shape, dtype=self.dtype, buffer=buf,
+                                 strides=(self.stride,) + strides)
+
+    def close(self):
+        self.frames = None
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                pass    # a recv(copy=False) view is still alive; unlink anyway
+            self._shm.unlink()
+            self._shm = None
+        elif self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __getstate__(self):
+        return {k: self.__dict__[k] for k in ("shape", "dtype", "n", "stride", "name")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = None
+        if _posixshmem is not None:
+            self._map = _map_segment(self.name)
+            self._attach(self._map)
+        else:
+            self._map = SharedMemory(name=self.name)
+            self._attach(self._map.buf)
+
+
+def _cpus_node(cpus):
+    "The NUMA node of a set of CPUs, or None if they span several (or are unknown)."
+    nodes = {cpu_node(c) for c in cpus or ()}
+    return nodes.pop() if len(nodes) == 1 else None
+
+
+def _stage_name(fn, index):
+    return f"{index}:{getattr(fn, '__qualname__', type(fn).__name__)}"
+
+
+def _run_stage(index, fn, p_in, p_out, cpus, done, copy, buffers):
+    if cpus is not None:
+        os.sched_setaffinity(0, cpus)
+    n, busy_s, t_first, t_last = 0, 0.0, None, None
+    tracer = p_in._tracer
+    while True:
+        p_in.poll(timeout=None)
+        # The work on a frame is recorded under the frame it came in as.
+        traced = tracer is not None and not p_in._is_passthrough
+        msg = p_in.recv(copy=copy)
+        if isinstance(msg, _Stop):
+            elapsed_s = 0.0 if t_first is None else t_last - t_first
+            msg.stats.append({"stage": _stage_name(fn, index), "messages": n, "busy_s": busy_s,
+                              "elapsed_s": elapsed_s,
+                              "per_s": n / elapsed_s if elapsed_s > 0 else float("nan")})
+            p_out.send(msg)
+            break
+        if not isinstance(msg, _Failed):
+            t0 = time.perf_counter()
+            if t_first is None:
+                t_first = t0
+            w0 = time.monotonic_ns() if traced else 0
+            if buffers is not None:
+                # In-place mode: msg holds the index of the frame to work on,
+                # and passing the index on hands the frame to the next stage.
+                frame = buffers.frames[msg[0]]
+                try:
+                    out = fn(frame)
+                    if out is not None and out is not frame:
+                        frame[...] = out
+                    out = msg
+                except Exception as exc:
+                    out = _Failed(index, exc, int(msg[0]))
+            else:
+                try:
+                    out = fn(msg)
+                except Exception as exc:
+                    out = _Failed(index, exc)
+            t_last = time.perf_counter()
+            busy_s += t_last - t0
+            if traced:
+                tracer._record(_TR_WORK, p_in._trace_id, p_in._last_seq, w0, time.monotonic_ns())
+            n += 1
+            msg = out
+        p_out.send(msg)
+        if not copy and p_in._held:
+            p_in.release()
+    # The next stage may not have copied our last values out of their spill
+    # segments yet, and close() would unlink them; wait for the whole chain.
+    done.wait()
+
+
+class Pipeline:
+    def __init__(self, stages, ex_array=None, slots: int | None = 4, cpus=None,
+                 copy: bool = True, inplace: bool = False, buffers: int | None = None,
+                 **pipe_kwargs):
+        """
+        Run each of `stages` in a process of its own, connected in order by
+        MemPipes. A stage is a callable that takes a message and returns the
+        message for the next stage; under the spawn start method it must be
+        picklable (e.g. a module-level function). send() feeds the first
+        stage and poll()/recv() read what the last one returns.
+        An exception raised by a stage takes the place of that message's
+        result: later stages pass it along and recv() raises it, with the
+        worker's traceback as its __cause__. The pipeline keeps running.
+        close() sends a shutdown sentinel down the chain, discarding results
+        that were not received, and returns per-stage statistics: messages
+        handled, time spent in the stage function (busy_s), time from its
+        first message to its last (elapsed_s) and messages per second.
+        ex_array sizes every pipe; without one each pipe takes its size from
+        its first frame. slots: ring depth of every pipe; the default keeps a
+        fast stage from overwriting frames a slow one has not read, which a
+        single-slot pipe (slots=None) would do. cpus: one entry per stage,
+        each None, a CPU number or a set of them, to pin that stage's
+        process (Linux only). Unless numa_node is given, each pipe's
+        segment goes on the NUMA node of the stage that reads it. copy=False hands each stage a read-only view
+        into shared memory that is released once its result is sent, so a
+        stage must not keep it.
+        inplace=True moves frames without copying them between stages:
+        `buffers` frames shaped like ex_array (by default one per stage plus
+        two) live in one shared segment, and the pipes only carry a frame's
+        index. send() copies a frame into a free buffer, each stage gets that
+        buffer as a writable array to modify in place and returns None or
+        the array (anything else is copied into it), and recv() copies the
+        result out and frees the buffer. recv(copy=False) returns the buffer
+        itself, read-only, until release(). send() raises queue.Full when
+        every buffer is in flight, and only takes ndarrays of ex_array's
+        shape. Other keyword arguments go to every MemPipe; with
+        trace=tracer the stages also record the work they do on each frame,
+        and the pipes are labelled after the stages they connect.
+        The processes start right away; use the pipeline as a context
+        manager or call close().
+        """
+        stages = list(stages)
+        if not stages:
+            raise ValueError("a Pipeline needs at least one stage")
+        if cpus is None:
+            cpus = [None] * len(stages)
+        cpus = [None if c is None else {c} if isinstance(c, int) else set(c) for c in cpus]
+        if len(cpus) != len(stages):
+            raise ValueError(f"cpus has {len(cpus)} entries for {len(stages)} stages")
+        if any(c is not None for c in cpus) and not hasattr(os, "sched_setaffinity"):
+            raise ValueError("pinning stages to CPUs needs os.sched_setaffinity (Linux)")
+        self.stats = None
+        self._buffers = None
+        self._held = deque()
+        if inplace:
+            if not isinstance(ex_array, np.ndarray):
+                raise ValueError("an in-place Pipeline needs ex_array to size its buffers")
+            n = len(stages) + 2 if buffers is None else buffers
+            if n < 1:
+                raise ValueError(f"buffers must be a positive integer, got {n}")
+            self._buffers = _Buffers(ex_array, n)
+            self._free = deque(range(n))
+            ex_array = np.zeros(1, dtype=np.int64)
+        # The pipe a stage reads from goes on the stage's node; the last one
+        # is read by us, wherever we run.
+        nodes = [_cpus_node(c) for c in cpus] + [None]
+        self._pipes = [MemPipe(ex_array, slots=slots, **{"numa_node": node, **pipe_kwargs})
+                       for node in nodes]
+        tracer = pipe_kwargs.get("trace")
+        if tracer is not None:
+            names = [_stage_name(fn, i) for i, fn in enumerate(stages)]
+            for pipe, src, dst in zip(self._pipes, ["send"] + names, names + ["recv"]):
+                tracer.label(pipe, f"{src} -> {dst}")
+        self._done = Event()
+        self._procs = []
+        for i, (fn, cpu_set) in enumerate(zip(stages, cpus)):
+            proc = Process(target=_run_stage, daemon=True, name=f"mempipe-stage-{i}",
+                           args=(i, fn, self._pipes[i], self._pipes[i + 1], cpu_set, self._done, copy,
+                                 self._buffers))
+            proc.start()
+            self._procs.append(proc)
+
+    def send(self, data, meta=None):
+        "Feed a message to the first stage."
+        buffers = self._buffers
+        if buffers is None:
+            self._pipes[0].send(data, meta)
+            return
+        if not isinstance(data, np.ndarray) or data.shape != buffers.shape or meta is not None:
+            raise ValueError(f"an in-place Pipeline sends ndarrays of shape {buffers.shape}")
+        if not self._free:
+            raise Full(f"all {buffers.n} buffers of the pipeline are in flight; recv() results first")
+        i = self._free.popleft()
+        buffers.frames[i] = data
+        self._pipes[0].send(np.array([i], dtype=np.int64))
+
+    def poll(self, timeout=0.0):
+        "Wait up to timeout seconds (forever if None) for a result, as MemPipe.poll()."
+        return self._pipes[-1].poll(timeout)
+
+    def recv(self, copy: bool = True):
+        """
+        Return the result armed by the last successful poll(), or None.
+        Raises the exception of a stage that failed on this message.
+        copy=False returns a frame as a read-only view, valid until
+        release(), as MemPipe.recv() does.
+        """
+        buffers = self._buffers
+        if buffers is None:
+            msg = self._pipes[-1].recv(copy=copy)
+        else:
+            msg = self._pipes[-1].recv()
+            if isinstance(msg, np.ndarray):
+                i = int(msg[0])
+                if copy:
+                    self._free.append(i)
+                    return buffers.frames[i].copy()
+                self._held.append(i)
+                view = buffers.frames[i].view()
+                view.flags.writeable = False
+                return view
+        if isinstance(msg, _Failed):
+            if msg.buffer is not None:
+                self._free.append(msg.buffer)
+            raise msg.error()
+        return msg
+
+    def release(self):
+        "Hand back the oldest frame returned by recv(copy=False)."
+        if self._buffers is None:
+            self._pipes[-1].release()
+        elif not self._held:
+            raise ValueError("no view to release")
+        else:
+            self._free.append(self._held.popleft())
+
+    def pipe_stats(self):
+        """
+        stats() of every pipe in the chain, from the one feeding the first
+        stage to the one the results come out of; needs counters=True.
+        """
+        return [pipe.stats() for pipe in self._pipes]
+
+    def close(self, timeout: float = 10.0):
+        """
+        Shut the stages down and return their statistics (also kept in
+        .stats). Stages still running after timeout seconds are killed,
+        and their statistics are missing.
+        """
+        if self.stats is not None or not self._procs:
+            return self.stats
+        deadline = time.perf_counter() + timeout
+        self.stats = []
+        try:
+            self._pipes[0].send(_Stop())
+            sink = self._pipes[-1]
+            while time.perf_counter() < deadline:
+                if not sink.poll(timeout=min(0.1, max(deadline - time.perf_counter(), 0))):
+                    if not all(proc.is_alive() for proc in self._procs):
+                        break
+                    continue
+                msg = sink.recv()
+                if isinstance(msg, _Stop):
+                    self.stats = msg.stats
+                    break
+        finally:
+            self._done.set()
+            for proc in self._procs:
+                proc.join(max(deadline - time.perf_counter(), 0.1))
+                if proc.is_alive():
+                    proc.terminate()
+                    proc.join()
+            for pipe in self._pipes:
+                pipe.close()
+            if self._buffers is not None:
+                self._buffers.close()
+        return self.stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,99 @@
+"Pool: one pre-faulted shared segment that MemPipes borrow their frames from."
+
+import mmap
+import os
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+# Blocks are handed out in size classes: at least _MIN_BLOCK bytes, and above
+# that in steps of an eighth of the next lower power of two, so a block wastes
+# at most 12.5% of its size and a pipe rebuilt with the same frames gets the
+# very block its predecessor gave back.
+_MIN_BLOCK = 64 * 1024
+_PAGE = mmap.PAGESIZE
+
+
+def _size_class(nbytes):
+    if nbytes <= _MIN_BLOCK:
+        return _MIN_BLOCK
+    step = max(1 << (nbytes.bit_length() - 4), _PAGE)
+    return -(-nbytes // step) * step
+
+
+class MemPool:
+    def __init__(self, size: int, prefault: bool = True):
+        """
+        A shared segment of `size` bytes, created once, that MemPipes made
+        with pool=... take their frames from instead of creating a segment
+        each. Closing such a pipe gives its block back to the pool for the
+        next pipe of that size, so pipelines that are torn down and rebuilt
+        skip shm_open/ftruncate/mmap/unlink and, with prefault=True, the
+        page faults on fresh memory: every page is touched once here.
+        Blocks come in size classes of at least 64 KiB. A pipe whose
+        segment does not fit in what is left raises MemoryError.
+        Only the process that made the pool hands out blocks: a pipe first
+        sent on in another process makes a segment of its own, and receivers
+        just map the whole pool. A block is only safe to reuse once every
+        process is done with its pipe; close the pool itself last.
+        """
+        if size < 1:
+            raise ValueError(f"size must be a positive integer, got {size}")
+        self._shm = SharedMemory(create=True, size=size)
+        self.name = self._shm.name
+        self.size = self._shm.size
+        self._pid = os.getpid()
+        self._top = 0
+        self._free = {}     # size class -> offsets of returned blocks
+        if prefault:
+            np.ndarray(self.size, dtype=np.uint8, buffer=self._shm.buf)[::_PAGE] = 0
+
+    @property
+    def free_bytes(self):
+        "Bytes not handed out: never used, or given back by a closed pipe."
+        returned = sum(cls * len(offsets) for cls, offsets in self._free.items())
+        return self.size - self._top + returned
+
+    def _alloc(self, nbytes):
+        "Offset of a free block of at least nbytes."
+        if self._shm is None:
+            raise ValueError("the MemPool is closed")
+        cls = _size_class(nbytes)
+        offsets = self._free.get(cls)
+        if offsets:
+            return offsets.pop(), cls
+        if self._top + cls > self.size:
+            raise MemoryError(f"MemPool has no free block of {cls} bytes for a {nbytes}-byte "
+                              f"segment ({self.size - self._top} bytes never used)")
+        offset = self._top
+        self._top += cls
+        return offset, cls
+
+    def _release(self, offset, cls):
+        self._free.setdefault(cls, []).append(offset)
+
+    def close(self):
+        "Unmap and unlink the pool's segment."
+        shm, self._shm = getattr(self, "_shm", None), None
+        if shm is None:
+            return
+        try:
+            shm.close()
+        except BufferError:
+            pass    # a pipe still has views on it; unlink anyway
+        shm.unlink()
+
+    def __getstate__(self):
+        raise TypeError("a MemPool stays in the process that made it; pass its pipes instead")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,307 @@
+"Tracer: per-thread event rings in shared memory, merged into a Chrome trace."
+
+import json
+from multiprocessing import Lock, current_process
+from multiprocessing.shared_memory import SharedMemory
+import os
+import struct
+import threading
+import weakref
+
+import numpy as np
+
+from .mempipe import _TR_ARMED, _TR_RECV, _TR_SEND, _TR_WORK, _map_segment, _posixshmem
+
+# Segment layout: a header line, then `rings` rings of int64 words. Each ring
+# belongs to one thread of one process, which alone writes it: a header line
+# (records written, pid, tid, and the process name in the last 40 bytes),
+# then `capacity` records of _REC_WORDS words. A record is written before
+# the count that covers it, so a reader that copies the ring between two
+# reads of the count knows which records are whole. Claiming a ring, and
+# numbering a pipe, takes the tracer's lock; recording an event does not.
+_HDR_PIPES = 0      # pipe ids handed out
+_HDR_RINGS = 1      # rings claimed
+_HDR_LOST = 2       # threads that found no free ring
+_HDR_WORDS = 8
+_RING_COUNT = 0
+_RING_PID = 1
+_RING_TID = 2
+_RING_NAME = 3
+_RING_HDR = 8
+_REC_T0 = 0         # monotonic_ns() when the call started
+_REC_T1 = 1         # ... and when it returned
+_REC_PIPE = 2
+_REC_SEQ = 3        # sequence number of the (first) frame
+_REC_N = 4          # frames covered
+_REC_EVENT = 5
+_REC_WORDS = 6
+# A record, and the count, are each written with one pack_into(): quicker
+# than storing the words one by one.
+_REC = struct.Struct("6q")
+_COUNT = struct.Struct("q")
+
+# Names of the event codes in records() and in the trace.
+EVENTS = {_TR_SEND: "send", _TR_RECV: "recv", _TR_ARMED: "armed", _TR_WORK: "work"}
+
+RECORD_DTYPE = np.dtype([("t0_ns", "i8"), ("t1_ns", "i8"), ("pipe", "i8"), ("seq", "i8"),
+                         ("n", "i8"), ("event", "i8"), ("pid", "i8"), ("tid", "i8")])
+
+# Tracers mapped in this process by segment name: unpickling a tracer that
+# is already here returns the same object, so a thread records into one
+# ring however many traced pipes it uses.
+_tracers = weakref.WeakValueDictionary()
+
+
+def _forked():
+    # A forked child inherits the threads' rings of its parent; it must
+    # claim rings of its own.
+    for tracer in list(_tracers.values()):
+        tracer._local = threading.local()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forked)
+
+
+def _attached(name, capacity, rings, lock, labels):
+    tracer = _tracers.get(name)
+    if tracer is None:
+        tracer = Tracer.__new__(Tracer)
+        tracer._setup(name, capacity, rings, lock, labels)
+        if _posixshmem is not None:
+            tracer._map = _map_segment(name)
+            tracer._words = memoryview(tracer._map).cast("q")
+        else:
+            tracer._map = SharedMemory(name=name)
+            tracer._words = tracer._map.buf.cast("q")
+    return tracer
+
+
+class Tracer:
+    def __init__(self, capacity: int = 65536, rings: int = 64):
+        """
+        A shared segment of event rings for tracing MemPipes made with
+        trace=tracer. Each thread that sends or receives on such a pipe, in
+        any process, claims a ring the first time and from then on records
+        (pipe, frame sequence number, event, start and end in monotonic ns)
+        into it without locking. The events are send() and recv() calls,
+        frames armed by poll(), and the work of each Pipeline stage. A ring
+        keeps its last `capacity` events; threads beyond the first `rings`
+        are not traced.
+        records() merges the rings into one array, and chrome_trace() or
+        dump() turn them into a timeline for chrome://tracing or Perfetto,
+        with an arrow from each frame's send() to its recv(). Pass the
+        tracer (or its pipes) to other processes like a pipe; the process
+        that made it unlinks the segment on close().
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity must be a positive integer, got {capacity}")
+        if rings < 1:
+            raise ValueError(f"rings must be a positive integer, got {rings}")
+        size = (_HDR_WORDS + rings * (_RING_HDR + capacity * _REC_WORDS)) * 8
+        shm = SharedMemory(create=True, size=size)
+        self._setup(shm.name, capacity, rings, Lock(), {})
+        self._shm = shm
+        self._map = None
+        self._words = shm.buf.cast("q")
+        self._owner = os.getpid()
+
+    def _setup(self, name, capacity, rings, lock, labels):
+        self.name = name
+        self.capacity = capacity
+        self.rings = rings
+        self._lock = lock
+        # pipe id -> name given by label(), in the process that gave it.
+        self._labels = labels
+        self._local = threading.local()
+        # The [ring bytes, count] of every ring this process claimed.
+        self._views = []
+        self._shm = None
+        self._owner = None
+        _tracers[name] = self
+
+    def _new_pipe_id(self):
+        with self._lock:
+            pipe = self._words[_HDR_PIPES]
+            self._words[_HDR_PIPES] = pipe + 1
+        return pipe
+
+    def label(self, pipe, name: str):
+        "Name a traced pipe (or pipe id) in the timelines this process makes."
+        self._labels[getattr(pipe, "_trace_id", pipe)] = name
+
+    def _claim(self):
+        "This thread's [ring bytes, records written], or False if it gets no ring."
+        words = self._words
+        if words is None:
+            return False
+        with self._lock:
+            i = words[_HDR_RINGS]
+            if i >= self.rings:
+                words[_HDR_LOST] += 1
+                ring = False
+            else:
+                words[_HDR_RINGS] = i + 1
+                start = _HDR_WORDS + i * (_RING_HDR + self.capacity * _REC_WORDS)
+                ring = words[start:start + _RING_HDR + self.capacity * _REC_WORDS]
+                ring[_RING_COUNT] = 0
+                ring[_RING_PID] = os.getpid()
+                ring[_RING_TID] = threading.get_native_id()
+                name = current_process().name
+                if threading.current_thread() is not threading.main_thread():
+                    name = f"{name}/{threading.current_thread().name}"
+                name = name.encode()[:(_RING_HDR - _RING_NAME) * 8]
+                ring[_RING_NAME:_RING_HDR] = memoryview(
+                    name.ljust((_RING_HDR - _RING_NAME) * 8, b"\0")).cast("q")
+                ring = [ring.cast("B"), 0]
+                self._views.append(ring)
+        self._local.ring = ring
+        return ring
+
+    def _record(self, event, pipe, seq, t0, t1, n=1):
+        ring = getattr(self._local, "ring", None)
+        if ring is None:
+            ring = self._claim()
+        if ring is False:
+            return
+        buf, i = ring
+        _REC.pack_into(buf, (_RING_HDR + (i % self.capacity) * _REC_WORDS) * 8,
+                       t0, t1, pipe, seq, n, event)
+        ring[1] = i + 1
+        _COUNT.pack_into(buf, _RING_COUNT * 8, i + 1)
+
+    def _rings(self):
+        "[(pid, tid, process name, records)] of every claimed ring."
+        words = np.frombuffer(self._words, dtype=np.int64)
+        cap, stride = self.capacity, _RING_HDR + self.capacity * _REC_WORDS
+        out = []
+        for r in range(min(int(words[_HDR_RINGS]), self.rings)):
+            ring = words[_HDR_WORDS + r * stride:_HDR_WORDS + (r + 1) * stride]
+            before = int(ring[_RING_COUNT])
+            recs = ring[_RING_HDR:].reshape(cap, _REC_WORDS).copy()
+            after = int(ring[_RING_COUNT])
+            # Whole records: those counted before the copy that the writer
+            # cannot have started to overwrite before it ended.
+            first = max(after - cap + 1, 0)
+            idx = np.arange(first, before) % cap
+            name = ring[_RING_NAME:_RING_HDR].tobytes().rstrip(b"\0").decode(errors="replace")
+            out.append((int(ring[_RING_PID]), int(ring[_RING_TID]), name, recs[idx]))
+        return out
+
+    @property
+    def lost_threads(self):
+        "Threads that recorded nothing because every ring was taken."
+        return int(self._words[_HDR_LOST])
+
+    def records(self):
+        """
+        Every event still in the rings, oldest first, as a structured array
+        of RECORD_DTYPE: t0_ns and t1_ns (monotonic_ns() at the start and end
+        of the call; equal for "armed"), pipe id, seq and n (the first frame
+        and how many frames, for batches), event (a key of EVENTS), and
+        the pid and native thread id that recorded it.
+        """
+        rings = self._rings()
+        out = np.empty(sum(len(recs) for *_, recs in rings), dtype=RECORD_DTYPE)
+        at = 0
+        for pid, tid, _, recs in rings:
+            part = out[at:at + len(recs)]
+            for field, col in (("t0_ns", _REC_T0), ("t1_ns", _REC_T1), ("pipe", _REC_PIPE),
+                               ("seq", _REC_SEQ), ("n", _REC_N), ("event", _REC_EVENT)):
+                part[field] = recs[:, col]
+            part["pid"], part["tid"] = pid, tid
+            at += len(recs)
+        return out[np.argsort(out["t0_ns"], kind="stable")]
+
+    def chrome_trace(self):
+        """
+        The recorded events as a Chrome trace (the JSON object format that
+        chrome://tracing and ui.perfetto.dev load): a track per traced
+        thread, named after its process, with a slice per send(), recv() and
+        stage, an instant per armed frame, and a flow arrow from the send()
+        of each frame to the recv() that returned it.
+        """
+        events = []
+        names = {}
+        for pid, tid, name, _ in self._rings():
+            if pid not in names:
+                names[pid] = name.split("/")[0]
+                events.append({"ph": "M", "name": "process_name", "pid": pid, "tid": tid,
+                               "args": {"name": f"{names[pid]} ({pid})"}})
+            events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+                           "args": {"name": name}})
+        recs = self.records()
+        # (pipe, seq) -> the recv that returned the frame, for the arrows.
+        received = {}
+        for r in recs[recs["event"] == _TR_RECV]:
+            for seq in range(r["seq"], r["seq"] + r["n"]):
+                received[int(r["pipe"]), seq] = r
+        flow = 0
+        for r in recs:
+            pipe, seq, event = int(r["pipe"]), int(r["seq"]), int(r["event"])
+            base = {"name": EVENTS[event], "cat": self._labels.get(pipe, f"pipe {pipe}"),
+                    "pid": int(r["pid"]), "tid": int(r["tid"]), "ts": r["t0_ns"] / 1e3}
+            args = {"pipe": base["cat"], "seq": seq}
+            if r["n"] != 1:
+                args["n"] = int(r["n"])
+            if event == _TR_ARMED:
+                events.append({**base, "ph": "i", "s": "t", "args": args})
+                continue
+            events.append({**base, "ph": "X", "dur": (r["t1_ns"] - r["t0_ns"]) / 1e3, "args": args})
+            if event == _TR_SEND:
+                dest = received.get((pipe, seq))
+                if dest is not None and dest["t0_ns"] >= r["t0_ns"]:
+                    flow += 1
+                    events.append({"ph": "s", "name": "frame", "cat": "flow", "id": flow,
+                                   "pid": base["pid"], "tid": base["tid"], "ts": r["t1_ns"] / 1e3})
+                    events.append({"ph": "f", "bp": "e", "name": "frame", "cat": "flow", "id": flow,
+                                   "pid": int(dest["pid"]), "tid": int(dest["tid"]),
+                                   "ts": dest["t0_ns"] / 1e3})
+        return {"traceEvents": events, "displayTimeUnit": "ns"}
+
+    def dump(self, path):
+        "Write chrome_trace() to path as JSON."
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def close(self):
+        "Unmap the segment, and unlink it in the process that made the tracer."
+        self._local = threading.local()
+        # Every view must go before the mapping can be closed.
+        for ring in getattr(self, "_views", ()):
+            ring[0].release()
+        self._views = []
+        words, self._words = getattr(self, "_words", None), None
+        if words is not None:
+            words.release()
+        if _tracers.get(self.name) is self:
+            del _tracers[self.name]
+        shm, self._shm = getattr(self, "_shm", None), None
+        if shm is not None:
+            try:
+                shm.close()
+            except BufferError:
+                pass    # a ring view is still alive; unlink anyway
+            if self._owner == os.getpid():
+                shm.unlink()
+        mapping, self._map = getattr(self, "_map", None), None
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                pass
+
+    def __reduce__(self):
+        return _attached, (self.name, self.capacity, self.rings, self._lock, self._labels)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
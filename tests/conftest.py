@@ -3,24 +3,53 @@ import pytest
 import mempipe
 
 
-@pytest.fixture
-def make_pipe():
-    """Construct a MemPipe and guarantee close() is called afterwards.
+def poll_recv(pipe, timeout=1.0, **kwargs):
+    """Poll then recv, asserting poll() armed a value."""
+    assert pipe.poll(timeout=timeout) is True
+    return pipe.recv(**kwargs)
+
+
+def _factory(cls):
+    """Construct pipes of `cls` and guarantee close() is called afterwards.
 
     MemPipe.__del__ unlinks shared memory; without explicit close() on failure
     paths we can leak resources between tests.
     """
     created = []
 
-    def _make(ex_array):
-        mp = mempipe.MemPipe(ex_array)
+    def _make(ex_array=None, **kwargs):
+        mp = cls(ex_array, **kwargs)
         created.append(mp)
         return mp
 
-    yield _make
+    return _make, created
 
+
+def _close_all(created):
     for mp in created:
         try:
             mp.close()
         except Exception:
             pass
+
+
+@pytest.fixture
+def make_pipe():
+    """MemPipe factory; keyword arguments (slots=, on_full=, ...) are passed through."""
+    make, created = _factory(mempipe.MemPipe)
+    yield make
+    _close_all(created)
+
+
+@pytest.fixture
+def make_bc():
+    make, created = _factory(mempipe.MemBroadcast)
+    yield make
+    _close_all(created)
+
+
+@pytest.fixture
+def make_fan():
+    make, created = _factory(mempipe.MemFanIn)
+    yield make
+    _close_all(created)
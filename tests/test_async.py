@@ -0,0 +1,119 @@
+"""arecv() and `async for` on an asyncio event loop."""
+
+import asyncio
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+import mempipe
+
+
+def _run(coro, timeout=5.0):
+    return asyncio.run(asyncio.wait_for(coro, timeout))
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+def test_arecv_returns_queued_frame(make_pipe, slots):
+    pipe = make_pipe(np.zeros(8), slots=slots)
+    pipe.send(np.arange(8.0))
+    assert np.array_equal(_run(pipe.arecv()), np.arange(8.0))
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+def test_arecv_wakes_on_later_send(make_pipe, slots):
+    pipe = make_pipe(np.zeros(8), slots=slots)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, pipe.send, np.full(8, 3.0))
+        t0 = time.perf_counter()
+        frame = await pipe.arecv()
+        return frame, time.perf_counter() - t0
+
+    frame, elapsed = _run(main())
+    assert np.array_equal(frame, np.full(8, 3.0))
+    assert 0.03 <= elapsed < 1.0
+
+
+def test_arecv_keeps_order_with_passthrough(make_pipe):
+    pipe = make_pipe(np.zeros(4), slots=4)
+    pipe.send(np.ones(4))
+    pipe.send("between")
+    pipe.send(np.full(4, 2.0))
+
+    async def main():
+        return [await pipe.arecv() for _ in range(3)]
+
+    first, middle, last = _run(main())
+    assert np.array_equal(first, np.ones(4))
+    assert middle == "between"
+    assert np.array_equal(last, np.full(4, 2.0))
+
+
+def test_arecv_view(make_pipe):
+    pipe = make_pipe(np.zeros(4), slots=2)
+    pipe.send(np.arange(4.0))
+    view = _run(pipe.arecv(copy=False))
+    assert not view.flags.writeable
+    assert np.array_equal(view, np.arange(4.0))
+    pipe.release()
+
+
+def test_cancelled_arecv_clears_waiting(make_pipe):
+    pipe = make_pipe(np.zeros(4), slots=2)
+    pipe.send(np.zeros(4))
+    assert pipe.poll() and pipe.recv() is not None
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pipe.arecv(), 0.05)
+
+    _run(main())
+    assert pipe._rdr[mempipe.mempipe._RDR_WAITING] == 0
+    # The loop is gone; a plain poll() still sees the next frame.
+    pipe.send(np.ones(4))
+    assert pipe.poll(timeout=1.0)
+
+
+def test_broadcast_reader_arecv(make_bc):
+    bc = make_bc(np.zeros(4), n_readers=2, slots=2)
+    bc.send(np.arange(4.0))
+    for reader in bc.readers:
+        assert np.array_equal(_run(reader.arecv()), np.arange(4.0))
+    with pytest.raises(TypeError):
+        bc.arecv()
+
+
+def _send_then_close(pipe, n):
+    for i in range(n):
+        pipe.send(np.full(16, float(i)))
+    pipe.send("done")
+    pipe.close()
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+def test_async_for_ends_when_sender_closes(slots):
+    pipe = mempipe.MemPipe(np.zeros(16), slots=slots)
+    proc = multiprocessing.Process(target=_send_then_close, args=(pipe, 50))
+    proc.start()
+    pipe.close_send_end()
+
+    async def main():
+        return [msg async for msg in pipe]
+
+    try:
+        received = _run(main(), timeout=30)
+    finally:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
+        pipe.close()
+    assert len(received) == 51 and received[-1] == "done"
+    values = [float(frame[0]) for frame in received[:-1]]
+    if slots is None:
+        # One shared slot: each frame shows whatever was written last.
+        assert values[-1] == 49.0
+    else:
+        assert values == [float(i) for i in range(50)]
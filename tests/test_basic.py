@@ -40,3 +40,30 @@ def test_pipe_returns_self_self_tuple(make_pipe):
     p_in, p_out = mp.Pipe()
     assert p_in is mp
     assert p_out is mp
+
+
+def test_send_recv_reuse_the_same_mapping(make_pipe, monkeypatch):
+    """The segment is attached once; later send()/recv() calls must not
+    re-open it by name."""
+    import mempipe.mempipe as mm
+
+    mp = make_pipe(np.zeros((8, 8), dtype=np.float32))
+    p_in, p_out = mp.Pipe()
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("SharedMemory re-opened after init")
+
+    monkeypatch.setattr(mm, "SharedMemory", _fail)
+    for i in range(3):
+        payload = np.full((8, 8), i, dtype=np.float32)
+        p_in.send(payload)
+        assert p_in.poll(timeout=1.0) is True
+        assert np.array_equal(p_out.recv(), payload)
+
+
+def test_close_releases_mapping(make_pipe):
+    mp = make_pipe(np.zeros((4, 4), dtype=np.float64))
+    mp.send(np.ones((4, 4)))
+    mp.close()
+    assert mp._view is None
+    assert mp._shm is None
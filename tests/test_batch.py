@@ -0,0 +1,159 @@
+"""send_many() / recv_many(): moving batches of frames through a ring."""
+
+import multiprocessing
+from queue import Full
+
+import numpy as np
+import pytest
+
+import mempipe
+
+
+def test_stacked_round_trip(make_pipe):
+    pipe = make_pipe(np.zeros(4, dtype=np.float32), slots=8)
+    frames = np.arange(24, dtype=np.float32).reshape(6, 4)
+    pipe.send_many(frames)
+    got = pipe.recv_many()
+    assert got.shape == (6, 4) and got.dtype == np.float32
+    assert np.array_equal(got, frames)
+    assert pipe.recv_many() is None
+
+
+def test_batch_wraps_around_ring(make_pipe):
+    pipe = make_pipe(np.zeros(3), slots=4)
+    pipe.send_many(np.zeros((3, 3)))
+    assert pipe.recv_many().shape == (3, 3)
+    frames = np.arange(12.0).reshape(4, 3)
+    pipe.send_many(frames)
+    assert np.array_equal(pipe.recv_many(), frames)
+
+
+def test_max_n_leaves_the_rest_queued(make_pipe):
+    pipe = make_pipe(np.zeros(2), slots=8)
+    frames = np.arange(16.0).reshape(8, 2)
+    pipe.send_many(frames)
+    assert np.array_equal(pipe.recv_many(max_n=3), frames[:3])
+    assert np.array_equal(pipe.recv_many(max_n=10), frames[3:])
+    with pytest.raises(ValueError):
+        pipe.recv_many(max_n=0)
+
+
+def test_first_send_many_initialises_pipe(make_pipe):
+    pipe = make_pipe(slots=4)
+    frames = [np.full(5, float(i)) for i in range(3)]
+    pipe.send_many(frames)
+    assert np.array_equal(pipe.recv_many(), np.stack(frames))
+
+
+def test_send_many_publishes_once(make_pipe):
+    pipe = make_pipe(np.zeros(2), slots=8)
+    pipe.send(np.zeros(2))
+    assert pipe.recv_many().shape == (1, 2)
+    pipe._rdr[mempipe.mempipe._RDR_WAITING] = 1
+    n_msgs = int(pipe._rdr[mempipe.mempipe._RDR_MSGS])
+    pipe.send_many(np.ones((5, 2)))
+    # One doorbell for the whole batch.
+    assert int(pipe._rdr[mempipe.mempipe._RDR_MSGS]) == n_msgs + 1
+    assert pipe.recv_many().shape == (5, 2)
+
+
+def test_mixed_shapes_come_back_as_list(make_pipe):
+    pipe = make_pipe(np.zeros(6), slots=8)
+    frames = [np.ones(6), np.ones((2, 3)), np.zeros(4, dtype=np.int8), np.ones(6)]
+    pipe.send_many(frames)
+    got = pipe.recv_many()
+    assert isinstance(got, list) and len(got) == 4
+    for a, b in zip(got, frames):
+        assert a.shape == b.shape and a.dtype == b.dtype and np.array_equal(a, b)
+
+
+def test_passthrough_splits_batch_in_order(make_pipe):
+    pipe = make_pipe(np.zeros(2), slots=8)
+    pipe.send_many(np.zeros((2, 2)))
+    pipe.send("marker")
+    pipe.send_many(np.ones((2, 2)))
+    got = pipe.recv_many()
+    assert isinstance(got, list)
+    assert [type(m) for m in got] == [np.ndarray, np.ndarray, str, np.ndarray, np.ndarray]
+    assert got[2] == "marker"
+    assert np.array_equal(np.stack([got[0], got[1]]), np.zeros((2, 2)))
+    assert np.array_equal(np.stack([got[3], got[4]]), np.ones((2, 2)))
+
+
+def test_recv_many_takes_armed_message(make_pipe):
+    pipe = make_pipe(np.zeros(2), slots=4)
+    pipe.send_many(np.arange(6.0).reshape(3, 2))
+    assert pipe.poll()
+    assert np.array_equal(pipe.recv_many(), np.arange(6.0).reshape(3, 2))
+
+
+def test_batch_with_meta(make_pipe):
+    meta_dtype = [("t", "f8"), ("n", "i4")]
+    pipe = make_pipe(np.zeros(2), slots=4, meta_dtype=meta_dtype)
+    pipe.send_many(np.ones((3, 2)), metas=[(0.5, 1), {"n": 2}, None])
+    frames, records = pipe.recv_many()
+    assert frames.shape == (3, 2)
+    assert records.dtype == np.dtype(meta_dtype)
+    assert records["t"].tolist() == [0.5, 0.0, 0.0]
+    assert records["n"].tolist() == [1, 2, 0]
+    with pytest.raises(ValueError):
+        pipe.send_many(np.ones((2, 2)), metas=[None])
+
+
+def test_batch_larger_than_ring_raises_when_full(make_pipe):
+    pipe = make_pipe(np.zeros(2), slots=4, on_full="raise")
+    with pytest.raises(Full):
+        pipe.send_many(np.ones((6, 2)))
+    assert pipe.recv_many().shape == (4, 2)
+
+
+def test_batch_with_drop_keeps_newest(make_pipe):
+    pipe = make_pipe(np.zeros(1), slots=4, on_full="drop")
+    pipe.send_many(np.arange(10.0).reshape(10, 1))
+    assert pipe.recv_many()[:, 0].tolist() == [6.0, 7.0, 8.0, 9.0]
+
+
+def test_send_many_needs_ring(make_pipe):
+    pipe = make_pipe(np.zeros(2))
+    with pytest.raises(ValueError):
+        pipe.send_many(np.zeros((2, 2)))
+
+
+def test_send_many_rejects_tuple_messages(make_pipe):
+    pipe = make_pipe((np.zeros(2), np.zeros(3)), slots=4)
+    with pytest.raises(ValueError):
+        pipe.send_many([(np.zeros(2), np.zeros(3))])
+
+
+def test_recv_many_on_single_slot_pipe(make_pipe):
+    pipe = make_pipe(np.zeros(2))
+    pipe.send("a")
+    pipe.send(np.ones(2))
+    assert pipe.recv_many(timeout=1.0)[0] == "a"
+
+
+def _produce(pipe, n, batch):
+    frames = np.arange(n * 256, dtype=np.float32).reshape(n, 256)
+    for i in range(0, n, batch):
+        pipe.send_many(frames[i:i + batch])
+
+
+def test_cross_process_batches():
+    n = 2000
+    pipe = mempipe.MemPipe(np.zeros(256, dtype=np.float32), slots=32)
+    proc = multiprocessing.Process(target=_produce, args=(pipe, n, 50))
+    proc.start()
+    try:
+        chunks, got = [], 0
+        while got < n:
+            frames = pipe.recv_many(timeout=10.0)
+            assert frames is not None
+            chunks.append(frames)
+            got += len(frames)
+    finally:
+        proc.join(timeout=10)
+        if proc.is_alive():
+            proc.terminate()
+        pipe.close()
+    assert np.array_equal(np.concatenate(chunks),
+                          np.arange(n * 256, dtype=np.float32).reshape(n, 256))
@@ -0,0 +1,127 @@
+"""Fan-out: MemBroadcast delivers every frame to every reader from one segment."""
+
+import multiprocessing
+import queue
+import time
+
+import numpy as np
+import pytest
+
+import mempipe
+from conftest import poll_recv
+
+
+def test_every_reader_gets_every_frame(make_bc):
+    bc = make_bc(np.zeros(4), n_readers=3, slots=4)
+    sent = [np.full(4, float(i)) for i in range(4)]
+    for frame in sent:
+        bc.send(frame)
+    for reader in bc.readers:
+        for frame in sent:
+            assert np.array_equal(poll_recv(reader), frame)
+        assert reader.poll(timeout=0) is False
+
+
+def test_slot_is_reused_only_after_all_readers_release(make_bc):
+    bc = make_bc(np.zeros(4), n_readers=2, slots=1, on_full="raise")
+    fast, slow = bc.readers
+    bc.send(np.ones(4))
+    poll_recv(fast)
+    with pytest.raises(queue.Full):
+        bc.send(np.zeros(4))
+
+    assert slow.poll(timeout=1.0) is True
+    with slow.recv_view() as view:
+        assert np.array_equal(view, np.ones(4))
+        with pytest.raises(queue.Full):
+            bc.send(np.zeros(4))
+    bc.send(np.zeros(4))
+
+
+def test_passthrough_and_deferred_init_reach_all_readers(make_bc):
+    bc = make_bc(n_readers=2, slots=2)
+    bc.send("start")
+    bc.send(np.arange(5))
+    for reader in bc.readers:
+        assert poll_recv(reader) == "start"
+        assert np.array_equal(poll_recv(reader), np.arange(5))
+
+
+def test_interleaved_readers_keep_their_own_state(make_bc):
+    bc = make_bc(np.zeros(2), n_readers=2, slots=4)
+    r0, r1 = bc.readers
+    assert r0._held is not r1._held and r0._pending is not bc._pending
+    bc.send("a")
+    bc.send("b")
+    bc.send(np.ones(2))
+    got = {0: [], 1: []}
+    for _ in range(2):
+        for i, reader in enumerate(bc.readers):
+            got[i].append(poll_recv(reader))
+    assert got == {0: ["a", "b"], 1: ["a", "b"]}
+
+    assert r0.poll(timeout=1.0) and r1.poll(timeout=1.0)
+    v0, v1 = r0.recv(copy=False), r1.recv(copy=False)
+    r0.release()
+    with pytest.raises(ValueError):
+        r0.release()
+    assert np.array_equal(v1, np.ones(2))
+    r1.release()
+
+
+def test_segment_is_shared_not_copied(make_bc):
+    bc = make_bc(np.zeros(4), n_readers=2, slots=2)
+    bc.send(np.ones(4))
+    for reader in bc.readers:
+        assert reader._shm_name == bc._shm_name
+        assert reader.poll(timeout=1.0)
+        assert np.shares_memory(reader.recv(copy=False), reader._ring)
+        reader.release()
+
+
+def test_subscribe_hands_out_each_reader_once(make_bc):
+    bc = make_bc(np.zeros(4), n_readers=2)
+    assert [bc.subscribe(), bc.subscribe()] == list(bc.readers)
+    with pytest.raises(ValueError):
+        bc.subscribe()
+
+
+def test_broadcast_itself_cannot_receive(make_bc):
+    bc = make_bc(np.zeros(4), n_readers=1)
+    with pytest.raises(TypeError):
+        bc.poll()
+    with pytest.raises(ValueError):
+        mempipe.MemBroadcast(np.zeros(4), n_readers=0)
+
+
+def _summing_reader(reader, result, n):
+    total = 0.0
+    deadline = time.perf_counter() + 30
+    received = 0
+    while received < n and time.perf_counter() < deadline:
+        if reader.poll(timeout=0.1):
+            with reader.recv_view() as frame:
+                total += float(frame.sum())
+            received += 1
+    result.put((received, total))
+
+
+def test_broadcast_across_processes():
+    n, n_readers = 25, 3
+    bc = mempipe.MemBroadcast(np.zeros((16, 16)), n_readers=n_readers, slots=2)
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_summing_reader, args=(r, results, n))
+             for r in bc.readers]
+    for p in procs:
+        p.start()
+    try:
+        for i in range(n):
+            bc.send(np.full((16, 16), float(i)))
+        expected = (n, 256.0 * sum(range(n)))
+        assert [results.get(timeout=30) for _ in procs] == [expected] * n_readers
+    finally:
+        for p in procs:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        bc.close()
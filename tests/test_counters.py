@@ -0,0 +1,103 @@
+"""counters=True: per-pipe performance counters in shared memory."""
+
+import math
+
+import numpy as np
+import pytest
+
+import mempipe
+from conftest import poll_recv
+
+
+def add_one(x):
+    return x + 1
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+def test_counts_frames_and_bytes(make_pipe, slots):
+    pipe = make_pipe(np.zeros(100), slots=slots, counters=True)
+    for i in range(3):
+        pipe.send(np.full(100, float(i)))
+        poll_recv(pipe)
+    pipe.send(np.zeros(10))
+    pipe.send("passthroughs are not frames")
+    stats = pipe.stats()
+    assert stats["frames_sent"] == 4 and stats["bytes_sent"] == 3 * 800 + 80
+    assert stats["frames_received"] == 3 and stats["bytes_received"] == 3 * 800
+    assert stats["depth"] == 1
+    assert stats["latency_hist"].sum() == 3
+    assert 0 < stats["latency_p50_s"] <= stats["latency_p99_s"] < 10
+    assert stats["send_copy_s"] >= 0 and stats["recv_copy_s"] > 0
+
+
+def test_no_counters_by_default(make_pipe):
+    plain = make_pipe(np.zeros(100), slots=4)
+    counted = make_pipe(np.zeros(100), slots=4, counters=True)
+    assert plain._cnt is None and counted._shm_size > plain._shm_size
+    with pytest.raises(ValueError):
+        plain.stats()
+
+
+def test_stats_before_first_send(make_pipe):
+    stats = make_pipe(counters=True).stats()
+    assert stats["frames_sent"] == 0 and stats["depth"] == 0
+    assert math.isnan(stats["latency_p50_s"])
+
+
+def test_batches_views_and_reservations(make_pipe):
+    pipe = make_pipe(np.zeros(8, dtype=np.float32), slots=8, counters=True)
+    pipe.send_many(np.ones((5, 8), dtype=np.float32))
+    with pipe.reserve() as buf:
+        buf[...] = 2.0
+    assert pipe.recv_many(timeout=1.0).shape == (6, 8)
+    pipe.send(np.ones(8, dtype=np.float32))
+    poll_recv(pipe, copy=False)
+    pipe.release()
+    stats = pipe.stats()
+    assert stats["frames_sent"] == stats["frames_received"] == 7
+    assert stats["bytes_received"] == 7 * 32
+    assert stats["latency_hist"].sum() == 7
+
+
+@pytest.mark.parametrize("kwargs", [dict(on_full="drop", slots=2), dict(mode="latest")])
+def test_dropped_frames_leave_the_depth(make_pipe, kwargs):
+    pipe = make_pipe(np.zeros(4), counters=True, **kwargs)
+    for i in range(6):
+        pipe.send(np.full(4, float(i)))
+    assert pipe.stats()["depth"] <= pipe._slots
+    poll_recv(pipe)
+    stats = pipe.stats()
+    assert stats["frames_sent"] == 6 and 1 <= stats["frames_received"] < 6
+
+
+def test_tuple_messages_with_meta(make_pipe):
+    ex = {"a": np.zeros(3), "b": np.zeros(2, dtype=np.int32)}
+    pipe = make_pipe(ex, slots=2, meta_dtype=[("t", "f8")], counters=True)
+    pipe.send(ex, meta=(1.0,))
+    poll_recv(pipe)
+    stats = pipe.stats()
+    assert stats["bytes_sent"] == stats["bytes_received"] == pipe._capacity
+
+
+def test_snapshot_covers_live_pipes(make_pipe):
+    a = make_pipe(np.zeros(4), counters=True)
+    b = make_pipe(np.zeros(4), slots=2, counters=True)
+    make_pipe(np.zeros(4), slots=2)
+    a.send(np.ones(4))
+    snap = mempipe.snapshot()
+    assert snap[a._shm_name]["frames_sent"] == 1
+    assert snap[b._shm_name]["frames_sent"] == 0
+    b.close()
+    assert b._shm_name not in mempipe.snapshot()
+
+
+def test_pipeline_counters_seen_from_parent():
+    with mempipe.Pipeline([add_one, add_one], ex_array=np.zeros(16), counters=True) as pipeline:
+        for _ in range(5):
+            pipeline.send(np.zeros(16))
+            poll_recv(pipeline, timeout=10.0)
+        stats = pipeline.pipe_stats()
+        assert [s["frames_received"] for s in stats] == [5, 5, 5]
+        assert all(s["latency_hist"].sum() == 5 for s in stats)
+        snap = mempipe.snapshot()
+        assert all(pipe._shm_name in snap for pipe in pipeline._pipes)
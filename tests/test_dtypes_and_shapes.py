@@ -1,4 +1,4 @@
-"""Data-shape coverage: dtypes, ndim, fixed-shape invariant, deferred init."""
+"""Data-shape coverage: dtypes, ndim, capacity invariant, variable frames, deferred init."""
 
 import numpy as np
 import pytest
@@ -80,9 +80,89 @@ def test_no_ex_array_infers_from_first_send():
 
 
 def test_mismatched_shape_after_init_raises(make_pipe):
-    """Once the shape is locked (first send or ex_array), a differently-shaped send must raise."""
+    """Once the capacity is locked (first send or ex_array), a larger send must raise."""
     mp = make_pipe(np.zeros((4, 4), dtype=np.float64))
     p_in, _ = mp.Pipe()
     p_in.send(np.ones((4, 4)))
     with pytest.raises(AssertionError):
         p_in.send(np.ones((5, 5)))
+
+
+@pytest.mark.parametrize("slots", [None, 2])
+@pytest.mark.parametrize(
+    "sent",
+    [
+        np.arange(6, dtype=np.float64).reshape(2, 3),
+        np.arange(16, dtype=np.float64),
+        np.arange(8, dtype=np.int16).reshape(2, 2, 2),
+        np.array(3.5),
+        np.zeros((0, 4)),
+    ],
+    ids=["smaller-2d", "same-size-1d", "other-dtype", "0d", "empty"],
+)
+def test_variable_frames_within_capacity(slots, sent):
+    """ex_array is a capacity: anything up to its nbytes round-trips with its
+    own shape and dtype."""
+    mp = mempipe.MemPipe(np.zeros((4, 4), dtype=np.float64), slots=slots)
+    try:
+        mp.send(sent)
+        assert mp.poll(timeout=1.0) is True
+        received = mp.recv()
+        assert received.shape == sent.shape
+        assert received.dtype == sent.dtype
+        assert np.array_equal(received, sent)
+
+        # The next full-size frame goes back to the pipe's own shape.
+        full = np.random.rand(4, 4)
+        mp.send(full)
+        assert mp.poll(timeout=1.0) is True
+        assert np.array_equal(mp.recv(), full)
+    finally:
+        mp.close()
+
+
+def test_variable_frames_queue_in_ring():
+    mp = mempipe.MemPipe(np.zeros(100, dtype=np.float32), slots=4)
+    try:
+        sent = [np.arange(n, dtype=np.float32) for n in (5, 100, 1, 37)]
+        for frame in sent:
+            mp.send(frame)
+        for frame in sent:
+            assert mp.poll(timeout=1.0) is True
+            assert np.array_equal(mp.recv(), frame)
+    finally:
+        mp.close()
+
+
+def test_non_contiguous_frame(make_pipe):
+    mp = make_pipe(np.zeros((4, 4), dtype=np.float64))
+    sent = np.random.rand(4, 4)[:, ::2]
+    mp.send(sent)
+    assert mp.poll(timeout=1.0) is True
+    assert np.array_equal(mp.recv(), sent)
+
+
+def test_ring_rejects_structured_dtype_change():
+    mp = mempipe.MemPipe(np.zeros(8, dtype=np.float64), slots=2)
+    try:
+        with pytest.raises(ValueError):
+            mp.send(np.zeros(2, dtype=[("a", "f4"), ("b", "i4")]))
+    finally:
+        mp.close()
+
+
+@pytest.mark.parametrize("slots", [None, 2])
+def test_reserve_smaller_frame(slots):
+    mp = mempipe.MemPipe(np.zeros((4, 4), dtype=np.float64), slots=slots)
+    try:
+        with mp.reserve(shape=(3,), dtype=np.int32) as buf:
+            buf[:] = [1, 2, 3]
+        assert mp.poll(timeout=1.0) is True
+        received = mp.recv()
+        assert received.dtype == np.int32
+        assert np.array_equal(received, [1, 2, 3])
+
+        with pytest.raises(ValueError):
+            mp.reserve(shape=(5, 5))
+    finally:
+        mp.close()
@@ -0,0 +1,128 @@
+"""Fan-in: MemFanIn collects frames from several producers through one segment."""
+
+import multiprocessing
+import multiprocessing.shared_memory
+import queue
+import time
+
+import numpy as np
+import pytest
+
+import mempipe
+from conftest import poll_recv
+
+
+def test_recv_reports_the_producer(make_fan):
+    fan = make_fan(np.zeros(4), n_producers=3, slots=2)
+    fan.producers[2].send(np.full(4, 2.0))
+    fan.producers[0].send(np.full(4, 0.0))
+    got = {}
+    for _ in range(2):
+        pid, frame = poll_recv(fan)
+        got[pid] = frame
+    assert sorted(got) == [0, 2]
+    for pid, frame in got.items():
+        assert np.array_equal(frame, np.full(4, float(pid)))
+    assert fan.poll(timeout=0) is False
+
+
+def test_ready_producers_are_served_in_turn(make_fan):
+    fan = make_fan(np.zeros(1), n_producers=2, slots=4)
+    for i in range(3):
+        fan.producers[0].send(np.array([i]))
+        fan.producers[1].send(np.array([i]))
+    order = [poll_recv(fan)[0] for _ in range(6)]
+    assert order == [0, 1, 0, 1, 0, 1]
+
+
+def test_passthrough_keeps_per_producer_order(make_fan):
+    fan = make_fan(np.zeros(2), n_producers=2)
+    p0 = fan.producers[0]
+    p0.send(np.ones(2))
+    p0.send("done")
+    pid, frame = poll_recv(fan)
+    assert pid == 0 and np.array_equal(frame, np.ones(2))
+    assert poll_recv(fan) == (0, "done")
+
+
+def test_poll_keeps_armed_message(make_fan):
+    fan = make_fan(np.zeros(2), n_producers=2)
+    fan.producers[1].send(np.ones(2))
+    fan.producers[0].send(np.zeros(2))
+    assert fan.poll(timeout=1.0) and fan.poll(timeout=1.0)
+    first = fan.recv()[0]
+    assert fan.recv() is None
+    assert {first, poll_recv(fan)[0]} == {0, 1}
+    assert fan.poll(timeout=0) is False
+
+
+def test_views_are_released_oldest_first(make_fan):
+    fan = make_fan(np.zeros(2), n_producers=2, slots=1, on_full="raise")
+    a, b = fan.producers
+    a.send(np.ones(2))
+    b.send(np.ones(2))
+    pids = [poll_recv(fan, copy=False)[0] for _ in range(2)]
+    fan.release()
+    fan.producers[pids[0]].send(np.zeros(2))
+    with pytest.raises(queue.Full):
+        fan.producers[pids[1]].send(np.zeros(2))
+    fan.release()
+    with pytest.raises(ValueError):
+        fan.release()
+
+
+def test_segment_is_shared_and_unlinked_on_close():
+    fan = mempipe.MemFanIn(np.zeros(8), n_producers=3)
+    names = {p._shm_name for p in fan.producers}
+    assert names == {fan._shm.name}
+    fan.close()
+    with pytest.raises(FileNotFoundError):
+        multiprocessing.shared_memory.SharedMemory(name=names.pop())
+
+
+def test_producers_share_one_mapping(make_fan):
+    fan = make_fan(np.zeros(8), n_producers=3)
+    assert all(p._shm is fan._shm for p in fan.producers)
+    fan.producers[1].send(np.ones(8))
+    assert poll_recv(fan)[0] == 1
+
+
+def test_fan_in_needs_ex_array():
+    with pytest.raises(ValueError):
+        mempipe.MemFanIn(None)
+    with pytest.raises(ValueError):
+        mempipe.MemFanIn(np.zeros(2), n_producers=0)
+
+
+def _worker(producer, wid, n):
+    for i in range(n):
+        producer.send(np.full((8, 8), float(wid * 1000 + i)))
+    producer.send("done")
+
+
+def test_fan_in_across_processes():
+    n, n_producers = 30, 3
+    fan = mempipe.MemFanIn(np.zeros((8, 8)), n_producers=n_producers, slots=2)
+    procs = [multiprocessing.Process(target=_worker, args=(p, wid, n))
+             for wid, p in enumerate(fan.producers)]
+    for p in procs:
+        p.start()
+    try:
+        seen = {wid: [] for wid in range(n_producers)}
+        done = 0
+        deadline = time.perf_counter() + 30
+        while done < n_producers and time.perf_counter() < deadline:
+            if not fan.poll(timeout=0.1):
+                continue
+            with fan.recv_view() as (wid, msg):
+                if isinstance(msg, str):
+                    done += 1
+                else:
+                    seen[wid].append(int(msg[0, 0]) - wid * 1000)
+        assert seen == {wid: list(range(n)) for wid in range(n_producers)}
+    finally:
+        for p in procs:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        fan.close()
@@ -0,0 +1,113 @@
+"""max_inflight=, send(block=, timeout=) and try_send(): bounded in-flight messages."""
+
+import multiprocessing
+from queue import Full
+import time
+
+import numpy as np
+import pytest
+
+import mempipe
+from conftest import poll_recv
+
+
+@pytest.mark.parametrize("slots", [None, 8])
+def test_credits_bound_messages_in_flight(make_pipe, slots):
+    pipe = make_pipe(np.zeros(4), slots=slots, max_inflight=2)
+    assert pipe.try_send(np.zeros(4)) is True
+    pipe.send("passthroughs count too")
+    assert pipe.try_send(np.ones(4)) is False
+    with pytest.raises(Full):
+        pipe.send(np.ones(4), block=False)
+    t0 = time.perf_counter()
+    with pytest.raises(Full):
+        pipe.send(np.ones(4), timeout=0.05)
+    assert time.perf_counter() - t0 >= 0.05
+    poll_recv(pipe)
+    assert pipe.try_send(np.ones(4)) is True
+    assert poll_recv(pipe) == "passthroughs count too"
+    assert np.array_equal(poll_recv(pipe), np.ones(4))
+
+
+def test_dropped_armed_message_returns_its_credit(make_pipe):
+    pipe = make_pipe(np.zeros(4), max_inflight=2)
+    pipe.send("a")
+    pipe.send("b")
+    assert pipe.poll() and pipe.poll()      # "a" is dropped
+    assert pipe.try_send("c") is True
+    assert pipe.recv() == "b"
+    assert poll_recv(pipe) == "c"
+    assert pipe.try_send("d") and pipe.try_send("e")
+
+
+def test_recv_many_returns_credits(make_pipe):
+    pipe = make_pipe(np.zeros(4), slots=8, max_inflight=4)
+    for i in range(4):
+        pipe.send(np.full(4, float(i)))
+    assert pipe.recv_many(timeout=1.0).shape == (4, 4)
+    for i in range(4):
+        assert pipe.try_send(np.full(4, float(i)))
+
+
+def test_full_ring_returns_credit(make_pipe):
+    pipe = make_pipe(np.zeros(4), slots=2, max_inflight=3)
+    pipe.send(np.zeros(4))
+    pipe.send(np.zeros(4))
+    assert pipe.try_send(np.zeros(4)) is False     # out of slots, not credits
+    assert pipe.try_send("x") is True
+    assert pipe.try_send("y") is False
+
+
+@pytest.mark.parametrize("slots", [2, 4])
+def test_ring_full_without_limit(make_pipe, slots):
+    pipe = make_pipe(np.zeros(4), slots=slots)
+    for _ in range(slots):
+        pipe.send(np.zeros(4))
+    assert pipe.try_send(np.zeros(4)) is False
+    with pytest.raises(Full):
+        pipe.send(np.zeros(4), timeout=0.01)
+    poll_recv(pipe)
+    assert pipe.try_send(np.zeros(4)) is True
+
+
+def test_reservation_takes_credit(make_pipe):
+    pipe = make_pipe(np.zeros(4), slots=4, max_inflight=1)
+    with pytest.raises(RuntimeError):
+        with pipe.reserve():
+            raise RuntimeError
+    with pipe.reserve() as buf:
+        buf[...] = 7.0
+    assert pipe.try_send(np.zeros(4)) is False
+    assert np.array_equal(poll_recv(pipe), np.full(4, 7.0))
+    assert pipe.try_send(np.zeros(4)) is True
+
+
+@pytest.mark.parametrize("kwargs", [dict(max_inflight=0), dict(max_inflight=2, on_full="drop"),
+                                    dict(max_inflight=2, mode="latest")])
+def test_invalid_limits(kwargs):
+    with pytest.raises(ValueError):
+        mempipe.MemPipe(slots=4, **kwargs)
+
+
+def _count_up(pipe, n):
+    for i in range(n):
+        pipe.send(np.full(1 << 14, float(i)))
+
+
+@pytest.mark.parametrize("slots", [None, 2])
+def test_fast_producer_is_held_back(slots):
+    # A single-slot pipe would overwrite frames the receiver has not read
+    # without the credit.
+    n = 200
+    pipe = mempipe.MemPipe(np.zeros(1 << 14), slots=slots, max_inflight=1)
+    proc = multiprocessing.Process(target=_count_up, args=(pipe, n))
+    proc.start()
+    try:
+        for i in range(n):
+            frame = poll_recv(pipe, timeout=10.0)
+            assert frame.min() == frame.max() == i
+    finally:
+        proc.join(timeout=10)
+        if proc.is_alive():
+            proc.terminate()
+        pipe.close()
@@ -0,0 +1,97 @@
+"""mode="latest": a conflating channel that only delivers the newest frame."""
+
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import mempipe
+from conftest import poll_recv
+
+
+def test_recv_returns_newest_frame(make_pipe):
+    pipe = make_pipe(np.zeros(4), mode="latest")
+    for i in range(10):
+        pipe.send(np.full(4, float(i)))
+    assert np.array_equal(poll_recv(pipe), np.full(4, 9.0))
+    assert pipe.skipped == 9
+    assert pipe.poll() is False
+    pipe.send(np.full(4, 10.0))
+    assert np.array_equal(poll_recv(pipe), np.full(4, 10.0))
+    assert pipe.skipped == 0
+
+
+def test_defaults_to_triple_buffer(make_pipe):
+    pipe = make_pipe(np.zeros(4), mode="latest")
+    assert pipe._slots == 3 and pipe._on_full == "drop"
+
+
+def test_sender_never_blocks(make_pipe):
+    pipe = make_pipe(np.zeros(16), mode="latest", slots=2)
+    for i in range(1000):
+        pipe.send(np.full(16, float(i)))
+    assert poll_recv(pipe)[0] == 999.0
+
+
+def test_passthrough_before_newest_frame_is_kept(make_pipe):
+    pipe = make_pipe(np.zeros(4), mode="latest")
+    pipe.send(np.zeros(4))
+    pipe.send("marker")
+    pipe.send(np.ones(4))
+    pipe.send(np.full(4, 2.0))
+    assert poll_recv(pipe) == "marker"
+    assert np.array_equal(poll_recv(pipe), np.full(4, 2.0))
+    assert pipe.skipped == 2
+
+
+def test_meta_and_recv_many(make_pipe):
+    pipe = make_pipe(np.zeros(4), mode="latest", meta_dtype=[("i", "i8")])
+    for i in range(5):
+        pipe.send(np.full(4, float(i)), meta=(i,))
+    frames, metas = pipe.recv_many(timeout=1.0)
+    assert frames.shape == (1, 4) and frames[0, 0] == 4.0
+    assert metas["i"].tolist() == [4]
+
+
+@pytest.mark.parametrize("kwargs", [dict(slots=1), dict(on_full="block"), dict(on_full="raise")])
+def test_invalid_latest_options(kwargs):
+    with pytest.raises(ValueError):
+        mempipe.MemPipe(mode="latest", **kwargs)
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        mempipe.MemPipe(mode="newest")
+
+
+def _stream(pipe, n):
+    # Every frame is uniform, so a torn one would show two values.
+    frame = np.empty(1 << 16)
+    for i in range(n):
+        frame.fill(i)
+        pipe.send(frame)
+    pipe.send("done")
+
+
+def test_no_torn_frames_across_processes():
+    n = 2000
+    pipe = mempipe.MemPipe(np.zeros(1 << 16), mode="latest", slots=2)
+    proc = multiprocessing.Process(target=_stream, args=(pipe, n))
+    proc.start()
+    try:
+        last = -1.0
+        while True:
+            assert pipe.poll(timeout=10)
+            frame = pipe.recv()
+            if isinstance(frame, str):
+                break
+            assert frame.min() == frame.max()
+            assert frame[0] > last
+            assert pipe.skipped == frame[0] - last - 1
+            last = frame[0]
+        assert last == n - 1
+    finally:
+        proc.join(timeout=10)
+        if proc.is_alive():
+            proc.terminate()
+        pipe.close()
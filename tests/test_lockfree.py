@@ -0,0 +1,122 @@
+"""Lock-free ring protocol: header counters instead of Lock + per-frame token."""
+
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+import mempipe
+
+
+class _NoLock:
+    def __enter__(self):
+        raise AssertionError("ring mode must not take the pipe lock")
+
+    def __exit__(self, *exc):
+        return False
+
+    acquire = release = __enter__
+
+
+@pytest.fixture
+def ring():
+    mp = mempipe.MemPipe(np.zeros((8, 8), dtype=np.float32), slots=4)
+    yield mp
+    mp.close()
+
+
+def test_frames_use_no_lock_and_no_pipe_token(ring):
+    ring._lock = _NoLock()
+    for i in range(6):
+        ring.send(np.full((8, 8), i, dtype=np.float32))
+        if i % 2:
+            for j in (i - 1, i):
+                assert ring.poll(timeout=1.0) is True
+                assert ring.recv()[0, 0] == j
+    # Nothing was written to the OS pipe for those frames.
+    assert ring._p_in.poll(0) is False
+
+
+def test_deferred_init_after_passthrough():
+    mp = mempipe.MemPipe(slots=2)
+    try:
+        mp.send("hello")
+        mp.send(np.arange(3.0))
+        mp.send("bye")
+        assert mp.poll(timeout=1.0) and mp.recv() == "hello"
+        assert mp.poll(timeout=1.0) and np.array_equal(mp.recv(), np.arange(3.0))
+        assert mp.poll(timeout=1.0) and mp.recv() == "bye"
+        assert mp.poll(timeout=0) is False
+    finally:
+        mp.close()
+
+
+def _late_sender(out_conn, delay):
+    time.sleep(delay)
+    out_conn.send(np.ones((8, 8), dtype=np.float32))
+
+
+def test_sleeping_receiver_is_woken(ring):
+    """A receiver that has given up spinning and sleeps in poll() is woken by
+    the sender's doorbell rather than by its own timeout."""
+    proc = multiprocessing.Process(target=_late_sender, args=(ring, 0.2))
+    proc.start()
+    try:
+        t0 = time.perf_counter()
+        assert ring.poll(timeout=10) is True
+        assert time.perf_counter() - t0 < 5
+        assert np.array_equal(ring.recv(), np.ones((8, 8)))
+        assert ring._rdr[mempipe.mempipe._RDR_WAITING] == 0
+    finally:
+        proc.join(timeout=2.0)
+
+
+def _interleaved_sender(out_conn, n):
+    for i in range(n):
+        out_conn.send(np.full((8, 8), i, dtype=np.float32))
+        if i % 3 == 0:
+            out_conn.send(f"after-{i}")
+
+
+def test_passthrough_order_across_processes(ring):
+    n = 30
+    expected = []
+    for i in range(n):
+        expected.append(float(i))
+        if i % 3 == 0:
+            expected.append(f"after-{i}")
+
+    proc = multiprocessing.Process(target=_interleaved_sender, args=(ring, n))
+    proc.start()
+    try:
+        received = []
+        deadline = time.perf_counter() + 20
+        while len(received) < len(expected) and time.perf_counter() < deadline:
+            if ring.poll(timeout=0.1):
+                msg = ring.recv()
+                received.append(float(msg[0, 0]) if isinstance(msg, np.ndarray) else msg)
+        assert received == expected
+    finally:
+        proc.join(timeout=2.0)
+        if proc.is_alive():
+            proc.terminate()
+
+
+@pytest.mark.parametrize("on_full", ["block", "drop"])
+def test_weakly_ordered_cpus_fence_hand_overs(make_pipe, monkeypatch, on_full):
+    # As on arm64: every slot hand-over (claim, publish, arm, release) fences.
+    fences = []
+    monkeypatch.setattr(mempipe.mempipe, "_WEAKLY_ORDERED", True)
+    monkeypatch.setattr(mempipe.mempipe, "_fence", lambda: fences.append(1))
+    pipe = make_pipe(np.zeros(4), slots=2, on_full=on_full)
+    pipe.send(np.ones(4))
+    sent = len(fences)
+    assert sent >= 2
+    assert pipe.poll() and np.array_equal(pipe.recv(), np.ones(4))
+    assert len(fences) >= sent + 2
+    monkeypatch.setattr(mempipe.mempipe, "_WEAKLY_ORDERED", False)
+    del fences[:]
+    pipe.send(np.ones(4))
+    assert pipe.poll() and np.array_equal(pipe.recv(), np.ones(4))
+    assert fences == [1]        # only the sleep handshake's, after publishing
@@ -0,0 +1,122 @@
+"""Per-frame metadata records written next to each frame in shared memory."""
+
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import mempipe
+from conftest import poll_recv
+
+
+META = np.dtype([("t", "f8"), ("seq", "i8"), ("mask", "u4"), ("trial", "i4")])
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+def test_meta_round_trip(make_pipe, slots):
+    pipe = make_pipe(np.zeros(8), slots=slots, meta_dtype=META)
+    pipe.send(np.ones(8), meta=(1.5, 7, 0b101, 3))
+    frame, meta = poll_recv(pipe)
+    assert np.array_equal(frame, np.ones(8))
+    assert meta.dtype == META
+    assert (meta["t"], meta["seq"], meta["mask"], meta["trial"]) == (1.5, 7, 5, 3)
+
+
+def test_meta_from_dict_zeroes_missing_fields(make_pipe):
+    pipe = make_pipe(np.zeros(2), slots=2, meta_dtype=META)
+    pipe.send(np.zeros(2), meta=(9.0, 9, 9, 9))
+    pipe.send(np.zeros(2), meta={"trial": 4})
+    poll_recv(pipe)
+    _, meta = poll_recv(pipe)
+    assert meta["trial"] == 4 and meta["seq"] == 0 and meta["t"] == 0.0
+
+
+def test_each_slot_keeps_its_own_meta(make_pipe):
+    pipe = make_pipe(np.zeros(2), slots=3, meta_dtype=META)
+    for i in range(3):
+        pipe.send(np.full(2, float(i)), meta={"seq": i})
+    for i in range(3):
+        frame, meta = poll_recv(pipe, copy=False)
+        assert frame[0] == i and meta["seq"] == i
+    for _ in range(3):
+        pipe.release()
+
+
+def test_meta_is_a_copy_even_for_views(make_pipe):
+    pipe = make_pipe(np.zeros(2), slots=1, meta_dtype=META)
+    pipe.send(np.zeros(2), meta={"seq": 1})
+    assert pipe.poll(timeout=1.0) is True
+    with pipe.recv_view() as (_, meta):
+        pass
+    pipe.send(np.zeros(2), meta={"seq": 2})
+    assert meta["seq"] == 1
+
+
+@pytest.mark.parametrize("slots", [None, 2])
+def test_reserve_and_commit_meta(make_pipe, slots):
+    pipe = make_pipe(np.zeros(2), slots=slots, meta_dtype=META)
+    with pipe.reserve(meta={"trial": 1}) as buf:
+        buf[:] = 1
+    assert poll_recv(pipe)[1]["trial"] == 1
+    res = pipe.reserve()
+    res.array[:] = 2
+    pipe.commit(meta={"trial": 2, "seq": 5})
+    frame, meta = poll_recv(pipe)
+    assert frame[0] == 2 and meta["trial"] == 2 and meta["seq"] == 5
+
+
+def test_meta_with_dropped_frames(make_pipe):
+    pipe = make_pipe(np.zeros(2), slots=2, on_full="drop", meta_dtype=META)
+    for i in range(5):
+        pipe.send(np.full(2, float(i)), meta={"seq": i})
+    got = [poll_recv(pipe) for _ in range(2)]
+    assert [(f[0], m["seq"]) for f, m in got] == [(3.0, 3), (4.0, 4)]
+
+
+def test_meta_through_broadcast_and_fan_in(make_bc, make_fan):
+    bc = make_bc(np.zeros(2), n_readers=2, meta_dtype=META)
+    bc.send(np.ones(2), meta={"seq": 3})
+    for reader in bc.readers:
+        assert poll_recv(reader)[1]["seq"] == 3
+    fan = make_fan(np.zeros(2), n_producers=2, meta_dtype=META)
+    fan.producers[1].send(np.ones(2), meta={"seq": 4})
+    pid, (_, meta) = poll_recv(fan)
+    assert pid == 1 and meta["seq"] == 4
+
+
+def test_meta_errors(make_pipe):
+    plain = make_pipe(np.zeros(2), slots=2)
+    with pytest.raises(ValueError):
+        plain.send(np.zeros(2), meta=(1,))
+    pipe = make_pipe(np.zeros(2), slots=2, meta_dtype=META)
+    with pytest.raises(ValueError):
+        pipe.send("hello", meta={"seq": 1})
+    with pytest.raises(ValueError):
+        make_pipe(np.zeros(2), meta_dtype=[("x", object)])
+
+
+def test_passthrough_is_not_wrapped(make_pipe):
+    pipe = make_pipe(np.zeros(2), slots=2, meta_dtype=META)
+    pipe.send("hello")
+    assert poll_recv(pipe) == "hello"
+
+
+def _stamp_frames(out_conn, n):
+    for i in range(n):
+        out_conn.send(np.full(4, float(i)), meta={"seq": i, "trial": 100 + i})
+
+
+def test_meta_across_processes():
+    n = 20
+    pipe = mempipe.MemPipe(slots=2, meta_dtype=META)
+    proc = multiprocessing.Process(target=_stamp_frames, args=(pipe, n))
+    proc.start()
+    try:
+        for i in range(n):
+            frame, meta = poll_recv(pipe, timeout=5.0)
+            assert frame[0] == i and meta["seq"] == i and meta["trial"] == 100 + i
+    finally:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
+        pipe.close()
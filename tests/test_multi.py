@@ -0,0 +1,149 @@
+"""Tuple and dict messages: several ndarrays laid out in one frame."""
+
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import mempipe
+from conftest import poll_recv
+
+
+def _message(i=0):
+    return {"samples": np.full((4, 16), float(i), dtype=np.float32),
+            "t": np.arange(4, dtype=np.int64) + i,
+            "labels": np.array([i, -i], dtype=np.int8)}
+
+
+def _assert_same(got, want):
+    assert type(got) is type(want)
+    if isinstance(want, dict):
+        assert list(got) == list(want)
+        got, want = got.values(), want.values()
+    for g, w in zip(got, want):
+        assert g.dtype == w.dtype and np.array_equal(g, w)
+
+
+@pytest.mark.parametrize("slots", [None, 3])
+def test_dict_round_trip_from_example(make_pipe, slots):
+    pipe = make_pipe(_message(), slots=slots)
+    pipe.send(_message(5))
+    _assert_same(poll_recv(pipe), _message(5))
+
+
+@pytest.mark.parametrize("slots", [None, 3])
+def test_tuple_schema_inferred_on_first_send(make_pipe, slots):
+    pipe = make_pipe(slots=slots)
+    msg = (np.ones(3), np.arange(5, dtype=np.uint16))
+    pipe.send(msg)
+    _assert_same(poll_recv(pipe), msg)
+    assert pipe._shm_dtype == np.uint8
+
+
+def test_fields_are_aligned_and_share_one_frame(make_pipe):
+    pipe = make_pipe(_message(), slots=2)
+    offsets = [off for _, _, off in pipe._schema[1]]
+    assert all(off % 64 == 0 for off in offsets)
+    pipe.send(_message(1))
+    assert pipe.poll(timeout=1.0)
+    with pipe.recv_view() as msg:
+        for arr in msg.values():
+            assert not arr.flags.writeable
+            assert np.shares_memory(arr, pipe._ring)
+
+
+def test_copy_is_private(make_pipe):
+    pipe = make_pipe(_message(), slots=1)
+    pipe.send(_message(1))
+    got = poll_recv(pipe)
+    pipe.send(_message(2))
+    _assert_same(got, _message(1))
+
+
+def test_one_pipe_message_per_composite(make_pipe):
+    pipe = make_pipe(_message())
+    for i in range(3):
+        pipe.send(_message(i))
+        _assert_same(poll_recv(pipe), _message(i))
+    assert pipe._p_in.poll() is False
+
+
+@pytest.mark.parametrize("slots", [None, 2])
+def test_reserve_fills_fields_in_place(make_pipe, slots):
+    pipe = make_pipe(_message(), slots=slots)
+    with pipe.reserve() as msg:
+        msg["samples"][:] = 7
+        msg["t"][:] = 1
+        msg["labels"][:] = 2
+    got = poll_recv(pipe)
+    assert got["samples"][0, 0] == 7 and got["t"][3] == 1 and got["labels"][1] == 2
+
+
+def test_structure_mismatch_is_rejected(make_pipe):
+    pipe = make_pipe(_message(), slots=2)
+    bad = _message()
+    bad["t"] = np.arange(5)
+    with pytest.raises(ValueError, match="shape"):
+        pipe.send(bad)
+    with pytest.raises(ValueError):
+        pipe.send({"samples": bad["samples"]})
+    with pytest.raises(ValueError):
+        pipe.send(np.zeros(4))
+
+
+@pytest.mark.parametrize("slots", [None, 2])
+def test_dtype_mismatch_is_rejected(make_pipe, slots):
+    pipe = make_pipe((np.zeros(3, dtype=np.int8), np.zeros(2)), slots=slots)
+    with pytest.raises(ValueError, match="dtype"):
+        pipe.send((np.array([300.0, 1.5, -2.7]), np.zeros(2)))
+    pipe.send((np.array([1, 2, 3], dtype=np.int8), np.ones(2)))
+    got = poll_recv(pipe)
+    assert got[0].dtype == np.int8 and list(got[0]) == [1, 2, 3]
+
+
+def test_plain_pipe_keeps_tuples_as_passthrough(make_pipe):
+    pipe = make_pipe(np.zeros(4), slots=2)
+    value = (np.ones(2), np.zeros(3))
+    pipe.send(value)
+    got = poll_recv(pipe)
+    assert isinstance(got, tuple) and np.array_equal(got[0], value[0])
+
+
+def test_multi_with_meta_broadcast_and_fan_in(make_pipe, make_bc, make_fan):
+    meta = [("seq", "i8")]
+    pipe = make_pipe(_message(), slots=2, meta_dtype=meta)
+    pipe.send(_message(3), meta={"seq": 3})
+    msg, rec = poll_recv(pipe)
+    _assert_same(msg, _message(3))
+    assert rec["seq"] == 3
+
+    bc = make_bc(_message(), n_readers=2)
+    bc.send(_message(4))
+    for reader in bc.readers:
+        _assert_same(poll_recv(reader), _message(4))
+
+    fan = make_fan(_message(), n_producers=2)
+    fan.producers[1].send(_message(6))
+    pid, msg = poll_recv(fan)
+    assert pid == 1
+    _assert_same(msg, _message(6))
+
+
+def _send_messages(out_conn, n):
+    for i in range(n):
+        out_conn.send(_message(i))
+
+
+def test_deferred_multi_across_processes():
+    n = 10
+    pipe = mempipe.MemPipe(slots=2)
+    proc = multiprocessing.Process(target=_send_messages, args=(pipe, n))
+    proc.start()
+    try:
+        for i in range(n):
+            _assert_same(poll_recv(pipe, timeout=5.0), _message(i))
+    finally:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
+        pipe.close()
@@ -0,0 +1,98 @@
+"""numa_node=: placing a pipe's segment on a NUMA node."""
+
+import errno
+import mmap
+
+import numpy as np
+import pytest
+
+import mempipe
+from mempipe import numa
+from mempipe.pipeline import _cpus_node
+from conftest import poll_recv
+
+
+def add_one(x):
+    return x + 1
+
+
+def test_parse_node_list():
+    assert numa._parse_list("0\n") == [0]
+    assert numa._parse_list("0-2,4,6-7") == [0, 1, 2, 4, 6, 7]
+
+
+def test_numa_nodes():
+    nodes = numa.numa_nodes()
+    assert nodes and all(isinstance(n, int) for n in nodes)
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+def test_round_trip_on_node(make_pipe, slots):
+    node = numa.numa_nodes()[0]
+    pipe = make_pipe(np.zeros((64, 64)), slots=slots, numa_node=node)
+    pipe.send(np.eye(64))
+    assert np.array_equal(poll_recv(pipe), np.eye(64))
+    assert pipe.numa_node == node
+
+
+@pytest.mark.parametrize("node", [-1, "0", True, 1.0])
+def test_invalid_node(node):
+    with pytest.raises(ValueError):
+        mempipe.MemPipe(numa_node=node)
+
+
+def test_single_node_ignores_binding(make_pipe, monkeypatch):
+    monkeypatch.setattr(numa, "numa_nodes", lambda: [0])
+    pipe = make_pipe(np.zeros(1 << 16), slots=2, numa_node=7)
+    assert pipe.numa_node == 0
+    assert numa._bind(pipe._address(), mmap.PAGESIZE, 7) is False
+
+
+@pytest.mark.skipif(numa._SYS_MBIND is None, reason="no mbind() on this architecture")
+def test_bind_places_pages(make_pipe, monkeypatch):
+    # Pretend there is a second node so the segment really is bound, to the
+    # one node every Linux machine has.
+    node = numa.numa_nodes()[0]
+    monkeypatch.setattr(numa, "numa_nodes", lambda: [node, node + 1])
+    pipe = make_pipe(np.zeros(1 << 17), slots=2, numa_node=node, prefault=True)
+    assert pipe.numa_node == node
+    counts = numa._page_nodes(pipe._address(), pipe._shm_size)
+    assert set(counts) == {node}
+    assert sum(counts.values()) == -(-pipe._shm_size // mmap.PAGESIZE)
+
+
+def _eperm(*args):
+    raise OSError(errno.EPERM, "Operation not permitted")
+
+
+def test_refused_binding_is_skipped(make_pipe, monkeypatch):
+    # As under a container's seccomp filter.
+    node = numa.numa_nodes()[0]
+    monkeypatch.setattr(numa, "numa_nodes", lambda: [node, node + 1])
+    monkeypatch.setattr(numa, "_syscall", _eperm)
+    assert numa._bind(0, mmap.PAGESIZE, node) is False
+    assert numa._page_nodes(0, mmap.PAGESIZE) == {}
+    pipe = make_pipe(np.zeros(1 << 16), slots=2, numa_node=node)
+    pipe.send(np.ones(1 << 16))
+    assert np.array_equal(poll_recv(pipe), np.ones(1 << 16))
+    assert pipe.numa_node is None
+    with mempipe.Pipeline([add_one], ex_array=np.zeros(4), cpus=[0]) as pipeline:
+        pipeline.send(np.zeros(4))
+        assert np.array_equal(poll_recv(pipeline, timeout=10.0), np.ones(4))
+
+
+def test_unknown_node_rejected_on_numa_machines(monkeypatch):
+    monkeypatch.setattr(numa, "numa_nodes", lambda: [0, 1])
+    with pytest.raises(ValueError):
+        mempipe.MemPipe(numa_node=5)
+
+
+def test_pipeline_binds_pipes_to_stage_nodes():
+    node = numa.cpu_node(0)
+    assert _cpus_node({0}) == node
+    assert _cpus_node(None) is None
+    with mempipe.Pipeline([add_one], ex_array=np.zeros(4), cpus=[0]) as pipeline:
+        assert pipeline._pipes[0]._numa_node == node
+        assert pipeline._pipes[1]._numa_node is None
+        pipeline.send(np.zeros(4))
+        assert np.array_equal(poll_recv(pipeline, timeout=10.0), np.ones(4))
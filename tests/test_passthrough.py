@@ -15,12 +15,7 @@ import pytest
 
 import mempipe
 from mempipe.mempipe import _PASSTHROUGH
-
-
-def _poll_recv(pipe, timeout=1.0):
-    """Poll then recv, asserting poll() armed a value."""
-    assert pipe.poll(timeout=timeout) is True
-    return pipe.recv()
+from conftest import poll_recv
 
 
 def test_passthrough_string(make_pipe):
@@ -28,7 +23,7 @@ def test_passthrough_string(make_pipe):
     p_in, p_out = mp.Pipe()
 
     p_in.send("hello world")
-    assert _poll_recv(p_out) == "hello world"
+    assert poll_recv(p_out) == "hello world"
 
 
 @pytest.mark.parametrize(
@@ -47,7 +42,7 @@ def test_passthrough_various_types(make_pipe, value):
     p_in, p_out = mp.Pipe()
 
     p_in.send(value)
-    assert _poll_recv(p_out) == value
+    assert poll_recv(p_out) == value
 
 
 def test_passthrough_works_without_ex_array():
@@ -56,7 +51,7 @@ def test_passthrough_works_without_ex_array():
     try:
         p_in, p_out = mp.Pipe()
         p_in.send("control-message")
-        assert _poll_recv(p_out) == "control-message"
+        assert poll_recv(p_out) == "control-message"
         # Nothing should have been allocated for a pure-passthrough exchange.
         assert mp.shm_created is False
     finally:
@@ -71,11 +66,11 @@ def test_passthrough_tuple_value_is_not_confused_with_init(make_pipe):
 
     plain = (10, 20)
     p_in.send(plain)
-    assert _poll_recv(p_out) == plain
+    assert poll_recv(p_out) == plain
 
     sneaky = (_PASSTHROUGH, "payload")
     p_in.send(sneaky)
-    assert _poll_recv(p_out) == sneaky
+    assert poll_recv(p_out) == sneaky
 
 
 def test_recv_without_poll_returns_none_for_passthrough(make_pipe):
@@ -97,11 +92,11 @@ def test_interleaved_array_then_passthrough(make_pipe):
 
     arr = np.arange(9, dtype=np.float64).reshape(3, 3)
     p_in.send(arr)
-    received = _poll_recv(p_out)
+    received = poll_recv(p_out)
     assert np.array_equal(received, arr)
 
     p_in.send({"status": "done"})
-    assert _poll_recv(p_out) == {"status": "done"}
+    assert poll_recv(p_out) == {"status": "done"}
 
 
 def test_interleaved_passthrough_then_array(make_pipe):
@@ -110,11 +105,11 @@ def test_interleaved_passthrough_then_array(make_pipe):
     p_in, p_out = mp.Pipe()
 
     p_in.send("prelude")
-    assert _poll_recv(p_out) == "prelude"
+    assert poll_recv(p_out) == "prelude"
 
     arr = np.full((3, 3), 7.0)
     p_in.send(arr)
-    received = _poll_recv(p_out)
+    received = poll_recv(p_out)
     assert np.array_equal(received, arr)
 
 
@@ -129,11 +124,11 @@ def test_deferred_init_array_then_passthrough():
 
         arr = np.arange(6, dtype=np.float64).reshape(2, 3)
         p_in.send(arr)                       # shm_created False -> 4-tuple init msg
-        received = _poll_recv(p_out)         # poll consumes the init tuple
+        received = poll_recv(p_out)         # poll consumes the init tuple
         assert np.array_equal(received, arr)
 
         p_in.send("after-array")
-        assert _poll_recv(p_out) == "after-array"
+        assert poll_recv(p_out) == "after-array"
     finally:
         mp.close()
 
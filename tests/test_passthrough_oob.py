@@ -0,0 +1,182 @@
+"""Large passthrough values: protocol-5 buffers moved into shared memory."""
+
+from collections import deque
+import multiprocessing
+import multiprocessing.shared_memory
+import os
+
+import numpy as np
+import pytest
+
+import mempipe
+from mempipe.mempipe import _PASSTHROUGH, _Spilled
+from conftest import poll_recv
+
+
+BIG = 1 << 20
+
+
+def _wire(pipe, value):
+    "Send value on a single-slot pipe and return what crossed the OS pipe."
+    pipe.send(value)
+    tag, payload = pipe._p_in.recv()
+    assert tag == _PASSTHROUGH
+    return payload
+
+
+@pytest.mark.parametrize("value", [
+    b"x" * BIG,
+    bytearray(b"y" * BIG),
+    [np.arange(BIG // 8), "label", np.ones(3)],
+    {"raw": np.random.rand(512, 512), "n": 3},
+], ids=["bytes", "bytearray", "list", "dict"])
+def test_large_buffers_go_through_shared_memory(make_pipe, value):
+    pipe = make_pipe(np.zeros(4), oob_threshold=64 * 1024)
+    payload = _wire(pipe, value)
+    assert isinstance(payload, _Spilled)
+    assert len(payload.skeleton) < 4096
+    got = pipe._unspill(payload)
+    assert type(got) is type(value)
+    if isinstance(value, (bytes, bytearray)):
+        assert got == value
+    elif isinstance(value, list):
+        assert np.array_equal(got[0], value[0]) and got[1] == "label"
+        assert np.array_equal(got[2], value[2])
+    else:
+        assert np.array_equal(got["raw"], value["raw"]) and got["n"] == 3
+
+
+def test_memoryview_round_trip(make_pipe):
+    pipe = make_pipe(np.zeros(4), slots=2, oob_threshold=1024)
+    pipe.send(memoryview(b"z" * 4096))
+    got = poll_recv(pipe)
+    assert isinstance(got, memoryview) and got.tobytes() == b"z" * 4096
+
+
+def test_small_values_use_the_pipe(make_pipe):
+    pipe = make_pipe(np.zeros(4), oob_threshold=64 * 1024)
+    for value in ("hello", [np.ones(10)], b"x" * 100, {"a": 1}):
+        payload = _wire(pipe, value)
+        assert not isinstance(payload, _Spilled)
+
+
+def test_threshold_none_disables_spilling(make_pipe):
+    # Small enough for the OS pipe's buffer: nothing reads it concurrently.
+    value = [np.ones(1024)]
+    pipe = make_pipe(np.zeros(4), oob_threshold=1024)
+    spilled = _wire(pipe, value)
+    assert isinstance(spilled, _Spilled)
+    pipe._unspill(spilled)
+    assert isinstance(_wire(make_pipe(np.zeros(4), oob_threshold=None), value), list)
+
+
+def test_spill_segment_is_reused_once_read(make_pipe):
+    pipe = make_pipe(np.zeros(4), oob_threshold=1024)
+    first = _wire(pipe, [np.arange(10000)])
+    got = pipe._unspill(first)
+    assert np.array_equal(got[0], np.arange(10000)) and got[0].flags.writeable
+    second = _wire(pipe, [np.ones(10000)])
+    assert (second.name, second.gen) == (first.name, first.gen + 1)
+    assert np.array_equal(pipe._unspill(second)[0], np.ones(10000))
+
+
+def test_busy_spill_segment_falls_back_to_a_one_off(make_pipe):
+    pipe = make_pipe(np.zeros(4), slots=4, oob_threshold=1024)
+    values = [[np.full(1000, float(i))] for i in range(3)]
+    for value in values:
+        pipe.send(value)
+    for value in values:
+        assert np.array_equal(poll_recv(pipe)[0], value[0])
+    pipe.send(values[0])
+    assert pipe._pending == deque() and np.array_equal(poll_recv(pipe)[0], values[0][0])
+
+
+def test_one_off_segment_is_unlinked_once_read(make_pipe):
+    pipe = make_pipe(np.zeros(4), oob_threshold=1024)
+    _wire(pipe, [np.ones(1000)])
+    one_off = _wire(pipe, [np.zeros(1000)])
+    assert one_off.gen is None
+    pipe._unspill(one_off)
+    with pytest.raises(FileNotFoundError):
+        multiprocessing.shared_memory.SharedMemory(name=one_off.name)
+
+
+def _exists(name):
+    try:
+        multiprocessing.shared_memory.SharedMemory(name=name).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="needs /dev/shm")
+@pytest.mark.parametrize("slots", [None, 4])
+def test_close_unlinks_unread_spills(slots):
+    before = set(os.listdir("/dev/shm"))
+    pipe = mempipe.MemPipe(np.zeros(4), slots=slots)
+    big = b"x" * BIG
+    for _ in range(3):
+        pipe.send(big)
+    if slots is not None:
+        assert pipe.poll()      # the other two wait in _pending
+    pipe.close()
+    assert set(os.listdir("/dev/shm")) <= before
+
+
+def test_one_off_segments_are_forgotten_once_read(make_pipe):
+    pipe = make_pipe(np.zeros(4), oob_threshold=1024)
+    _wire(pipe, [np.ones(1000)])
+    pipe._unspill(_wire(pipe, [np.zeros(1000)]))
+    _wire(pipe, [np.zeros(1000)])
+    assert len(pipe._spill_once) == 1 and _exists(pipe._spill_once[0])
+
+
+def test_growing_spill_segment(make_pipe):
+    pipe = make_pipe(np.zeros(4), oob_threshold=1024)
+    small = _wire(pipe, b"s" * 2048)
+    assert pipe._unspill(small) == b"s" * 2048
+    big = b"b" * (3 << 20)
+    large = _wire(pipe, big)
+    assert large.name != small.name
+    assert pipe._unspill(large) == big
+
+
+def test_spilled_values_keep_order_with_frames(make_pipe):
+    pipe = make_pipe(np.zeros(4), slots=4, oob_threshold=1024)
+    pipe.send(np.ones(4))
+    pipe.send(b"a" * 2048)
+    pipe.send(np.zeros(4))
+    assert np.array_equal(poll_recv(pipe), np.ones(4))
+    assert poll_recv(pipe) == b"a" * 2048
+    assert np.array_equal(poll_recv(pipe), np.zeros(4))
+
+
+def test_invalid_threshold(monkeypatch):
+    with pytest.raises(ValueError):
+        mempipe.MemPipe(oob_threshold=-1)
+    monkeypatch.setattr(mempipe.mempipe.os, "name", "nt")
+    with pytest.raises(ValueError, match="POSIX"):
+        mempipe.MemPipe(oob_threshold=1024)
+    mempipe.MemPipe(oob_threshold=None).close()
+
+
+def _send_big(out_conn, n):
+    for i in range(n):
+        out_conn.send({"i": i, "data": np.full(BIG // 8, float(i))})
+
+
+@pytest.mark.parametrize("slots", [None, 2])
+def test_large_passthrough_across_processes(slots):
+    n = 5
+    pipe = mempipe.MemPipe(slots=slots, oob_threshold=64 * 1024)
+    proc = multiprocessing.Process(target=_send_big, args=(pipe, n))
+    proc.start()
+    try:
+        for i in range(n):
+            got = poll_recv(pipe, timeout=10.0)
+            assert got["i"] == i and np.all(got["data"] == i)
+    finally:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
+        pipe.close()
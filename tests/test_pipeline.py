@@ -0,0 +1,171 @@
+"""mempipe.Pipeline: chains of worker processes.
+
+Stage functions live at module level so they can be pickled under the
+spawn start method.
+"""
+
+import os
+from queue import Full
+
+import numpy as np
+import pytest
+
+import mempipe
+from conftest import poll_recv
+
+
+def add_one(x):
+    return x + 1
+
+
+def double(x):
+    return x * 2
+
+
+def fail_on_negative(x):
+    if x.min() < 0:
+        raise ValueError(f"negative input {x.min()}")
+    return x
+
+
+def report_cpus(x):
+    return sorted(os.sched_getaffinity(0))
+
+
+def total(x):
+    return float(x.sum())
+
+
+def test_chain_applies_stages_in_order():
+    with mempipe.Pipeline([add_one, double, add_one], ex_array=np.zeros(4)) as pipeline:
+        for i in range(10):
+            pipeline.send(np.full(4, float(i)))
+        results = [poll_recv(pipeline, timeout=10.0) for _ in range(10)]
+    for i, result in enumerate(results):
+        assert np.array_equal(result, np.full(4, (i + 1) * 2 + 1.0))
+
+
+def test_deferred_init_and_passthrough_results():
+    with mempipe.Pipeline([add_one, total]) as pipeline:
+        pipeline.send(np.ones((3, 3)))
+        assert poll_recv(pipeline, timeout=10.0) == 18.0
+
+
+def test_exception_is_forwarded_and_pipeline_keeps_running():
+    with mempipe.Pipeline([fail_on_negative, add_one], ex_array=np.zeros(2)) as pipeline:
+        pipeline.send(np.array([1.0, 2.0]))
+        pipeline.send(np.array([-1.0, 2.0]))
+        pipeline.send(np.array([3.0, 4.0]))
+        assert np.array_equal(poll_recv(pipeline, timeout=10.0), [2.0, 3.0])
+        assert pipeline.poll(timeout=10.0)
+        with pytest.raises(ValueError, match="negative input") as info:
+            pipeline.recv()
+        assert "fail_on_negative" in str(info.value.__cause__)
+        assert np.array_equal(poll_recv(pipeline, timeout=10.0), [4.0, 5.0])
+
+
+def test_close_reports_per_stage_stats():
+    pipeline = mempipe.Pipeline([add_one, double], ex_array=np.zeros(8))
+    for _ in range(20):
+        pipeline.send(np.zeros(8))
+        poll_recv(pipeline, timeout=10.0)
+    stats = pipeline.close()
+    assert [s["stage"] for s in stats] == ["0:add_one", "1:double"]
+    for s in stats:
+        assert s["messages"] == 20
+        assert 0 <= s["busy_s"] <= s["elapsed_s"]
+        assert s["per_s"] > 0
+    assert pipeline.close() is stats
+    assert all(not proc.is_alive() for proc in pipeline._procs)
+
+
+def test_close_discards_unread_results():
+    pipeline = mempipe.Pipeline([add_one], ex_array=np.zeros(2), slots=2)
+    # Four frames fit in the two rings and the stage without anyone reading.
+    for _ in range(4):
+        pipeline.send(np.zeros(2))
+    stats = pipeline.close()
+    assert stats[0]["messages"] == 4
+
+
+def test_zero_copy_stages():
+    with mempipe.Pipeline([add_one, double], ex_array=np.zeros(16), copy=False) as pipeline:
+        for i in range(20):
+            pipeline.send(np.full(16, float(i)))
+            assert np.array_equal(poll_recv(pipeline, timeout=10.0), np.full(16, (i + 1) * 2.0))
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="needs sched_setaffinity")
+def test_stage_pinned_to_cpu():
+    cpu = min(os.sched_getaffinity(0))
+    with mempipe.Pipeline([report_cpus], ex_array=np.zeros(1), cpus=[cpu]) as pipeline:
+        pipeline.send(np.zeros(1))
+        assert poll_recv(pipeline, timeout=10.0) == [cpu]
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        mempipe.Pipeline([])
+    with pytest.raises(ValueError):
+        mempipe.Pipeline([add_one, double], cpus=[0])
+
+
+def add_one_inplace(x):
+    x += 1
+
+
+def negate(x):
+    return -x
+
+
+def record_address(x):
+    x[1] = x.__array_interface__["data"][0]
+
+
+def test_inplace_chain():
+    ex = np.zeros(4)
+    with mempipe.Pipeline([add_one_inplace, negate, add_one_inplace], ex_array=ex,
+                          inplace=True) as pipeline:
+        for i in range(10):
+            pipeline.send(np.full(4, float(i)))
+            assert np.array_equal(poll_recv(pipeline, timeout=10.0), np.full(4, -(i + 1) + 1.0))
+        assert len(pipeline._free) == pipeline._buffers.n
+
+
+def test_inplace_stages_share_one_buffer():
+    with mempipe.Pipeline([record_address, add_one_inplace], ex_array=np.zeros(2),
+                          inplace=True, buffers=1) as pipeline:
+        pipeline.send(np.zeros(2))
+        result = poll_recv(pipeline, timeout=10.0, copy=False)
+        base = pipeline._buffers.frames.__array_interface__["data"][0]
+        # The stage worked on the pool's one buffer, wherever it is mapped
+        # in that process, and the result is that buffer.
+        assert result.__array_interface__["data"][0] == base
+        assert result[0] == 1.0 and result[1] != 0
+        assert not result.flags.writeable
+        with pytest.raises(Full):
+            pipeline.send(np.zeros(2))
+        pipeline.release()
+        pipeline.send(np.zeros(2))
+        assert poll_recv(pipeline, timeout=10.0)[0] == 1.0
+
+
+def test_inplace_failure_frees_buffer():
+    with mempipe.Pipeline([fail_on_negative, add_one_inplace], ex_array=np.zeros(2),
+                          inplace=True, buffers=1) as pipeline:
+        pipeline.send(np.array([-1.0, 0.0]))
+        assert pipeline.poll(timeout=10.0)
+        with pytest.raises(ValueError, match="negative input"):
+            pipeline.recv()
+        pipeline.send(np.array([1.0, 0.0]))
+        assert np.array_equal(poll_recv(pipeline, timeout=10.0), [2.0, 1.0])
+
+
+def test_inplace_rejects_other_messages():
+    with mempipe.Pipeline([add_one_inplace], ex_array=np.zeros(2), inplace=True) as pipeline:
+        with pytest.raises(ValueError):
+            pipeline.send(np.zeros(3))
+        with pytest.raises(ValueError):
+            pipeline.send("text")
+    with pytest.raises(ValueError):
+        mempipe.Pipeline([add_one_inplace], inplace=True)
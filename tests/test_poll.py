@@ -1,8 +1,12 @@
 """poll() semantics and ordering invariants around poll/recv."""
 
+import multiprocessing
 import time
 
 import numpy as np
+import pytest
+
+import mempipe
 
 
 def test_poll_zero_timeout_on_empty(make_pipe):
@@ -76,3 +80,62 @@ def test_overlapping_sends_share_memory_buffer(make_pipe):
     # Buffer was overwritten by B before either recv ran.
     assert np.array_equal(first, B)
     assert np.array_equal(second, B)
+
+
+# --- wait modes ------------------------------------------------------------
+
+@pytest.mark.parametrize("slots, wait", [(None, "hybrid"), (None, "block"),
+                                         (2, "spin"), (2, "hybrid"), (2, "block")])
+def test_wait_modes_respect_timeout(slots, wait):
+    mp = mempipe.MemPipe(np.zeros(4), slots=slots, wait=wait, spin_us=1000)
+    try:
+        t0 = time.perf_counter()
+        assert mp.poll(timeout=0.05) is False
+        assert 0.03 <= time.perf_counter() - t0 <= 0.5
+
+        mp.send(np.ones(4))
+        assert mp.poll(timeout=1.0) is True
+        assert np.array_equal(mp.recv(), np.ones(4))
+    finally:
+        mp.close()
+
+
+def test_default_wait_modes():
+    single, ring = mempipe.MemPipe(np.zeros(4)), mempipe.MemPipe(np.zeros(4), slots=2)
+    try:
+        assert single._wait == "block" and single._spin_s == 0
+        hybrid = mempipe.MemPipe(wait="hybrid", spin_us=20)
+        assert hybrid._wait == "block" and hybrid._spin_s == 0
+        assert ring._wait == "hybrid"
+        assert mempipe.MemPipe(slots=2, wait="hybrid", spin_us=20)._spin_s == pytest.approx(20e-6)
+    finally:
+        single.close()
+        ring.close()
+
+
+@pytest.mark.parametrize("kwargs", [{"wait": "sleep"}, {"spin_us": -1}])
+def test_invalid_wait_arguments(kwargs):
+    with pytest.raises(ValueError):
+        mempipe.MemPipe(np.zeros(4), slots=2, **kwargs)
+
+
+def test_single_slot_pipe_rejects_spin():
+    with pytest.raises(ValueError, match="slots"):
+        mempipe.MemPipe(np.zeros(4), wait="spin")
+
+
+def _delayed_send(out_conn):
+    time.sleep(0.1)
+    out_conn.send(np.full(4, 3.0))
+
+
+def test_spin_wait_picks_up_frame_from_other_process():
+    mp = mempipe.MemPipe(np.zeros(4), slots=2, wait="spin")
+    proc = multiprocessing.Process(target=_delayed_send, args=(mp,))
+    proc.start()
+    try:
+        assert mp.poll(timeout=10) is True
+        assert np.array_equal(mp.recv(), np.full(4, 3.0))
+    finally:
+        proc.join(timeout=2.0)
+        mp.close()
@@ -0,0 +1,123 @@
+"""MemPool: MemPipes taking their segments from one reusable segment."""
+
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+import os
+
+import numpy as np
+import pytest
+
+import mempipe
+from mempipe.pool import _size_class
+from conftest import poll_recv
+
+
+@pytest.fixture
+def pool():
+    p = mempipe.MemPool(8 << 20)
+    yield p
+    p.close()
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+def test_pipes_share_pool_segment(pool, slots):
+    a = mempipe.MemPipe(np.zeros(100), slots=slots, pool=pool)
+    b = mempipe.MemPipe(np.zeros((3, 3), dtype=np.int32), slots=slots, pool=pool)
+    try:
+        assert a._shm_name == b._shm_name == pool.name
+        assert a._base != b._base
+        a.send(np.arange(100.0))
+        b.send(np.eye(3, dtype=np.int32))
+        assert np.array_equal(poll_recv(a), np.arange(100.0))
+        assert np.array_equal(poll_recv(b), np.eye(3, dtype=np.int32))
+    finally:
+        a.close()
+        b.close()
+
+
+def test_close_returns_block_for_reuse(pool):
+    free = pool.free_bytes
+    a = mempipe.MemPipe(np.zeros(1000), slots=2, pool=pool)
+    base = a._base
+    assert pool.free_bytes < free
+    a.close()
+    assert pool.free_bytes == free
+    assert os.path.exists(f"/dev/shm/{pool.name}") or os.name != "posix"
+    b = mempipe.MemPipe(np.zeros(1000), slots=2, pool=pool)
+    assert b._base == base
+    b.close()
+
+
+def test_deferred_init_takes_block_on_first_send(pool):
+    pipe = mempipe.MemPipe(pool=pool)
+    try:
+        pipe.send(np.full(10, 4.0))
+        assert pipe._shm_name == pool.name
+        assert np.array_equal(poll_recv(pipe), np.full(10, 4.0))
+    finally:
+        pipe.close()
+
+
+def test_pool_exhaustion(pool):
+    with pytest.raises(MemoryError):
+        mempipe.MemPipe(np.zeros(2 << 20), slots=8, pool=pool)
+
+
+def test_size_classes():
+    assert _size_class(1) == 64 * 1024
+    for n in (70_000, 1 << 20, (1 << 20) + 1, 384_000_000):
+        cls = _size_class(n)
+        assert n <= cls <= n * 1.125
+        assert _size_class(cls) == cls
+
+
+def test_pool_cannot_be_pickled(pool):
+    import pickle
+    with pytest.raises(TypeError):
+        pickle.dumps(pool)
+
+
+def _echo_doubled(p_in, p_out):
+    p_in.poll(timeout=10)
+    p_out.send(p_in.recv() * 2)
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+def test_cross_process_with_deferred_init(pool, slots):
+    # `there` gets a block past offset 0, so the child has to learn the
+    # offset from the init message; `back` is first sent on in the child,
+    # which cannot hand out pool blocks and makes a segment of its own.
+    first = mempipe.MemPipe(np.zeros(10), pool=pool)
+    there = mempipe.MemPipe(slots=slots, pool=pool)
+    back = mempipe.MemPipe(slots=slots, pool=pool)
+    proc = multiprocessing.Process(target=_echo_doubled, args=(there, back))
+    proc.start()
+    try:
+        there.send(np.arange(1000.0))
+        assert np.array_equal(poll_recv(back, timeout=10.0), np.arange(1000.0) * 2)
+        assert there._shm_name == pool.name and there._base > 0
+        assert back._shm_name != pool.name
+    finally:
+        proc.join(timeout=10)
+        if proc.is_alive():
+            proc.terminate()
+        for pipe in (first, there, back):
+            pipe.close()
+    # The child never closed its own segment, and would have unlinked it
+    # from under us if it had.
+    leftover = SharedMemory(name=back._shm_name)
+    leftover.close()
+    leftover.unlink()
+
+
+def add_one(x):
+    return x + 1
+
+
+def test_pipeline_rebuilt_on_pool(pool):
+    free = pool.free_bytes
+    for _ in range(3):
+        with mempipe.Pipeline([add_one, add_one], ex_array=np.zeros(256), pool=pool) as pipeline:
+            pipeline.send(np.zeros(256))
+            assert poll_recv(pipeline, timeout=10.0)[0] == 2.0
+        assert pool.free_bytes == free
@@ -0,0 +1,83 @@
+"""huge_pages= and prefault=: preparing a segment's mapping up front."""
+
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+import mempipe
+from mempipe import mempipe as core
+from conftest import poll_recv
+
+
+def _resident_kb(pipe):
+    "Rss of this process's mapping of the pipe's segment, from smaps."
+    name = pipe._shm_name
+    with open("/proc/self/smaps") as f:
+        lines = f.read().splitlines()
+    for i, line in enumerate(lines):
+        if line.endswith(name):
+            for entry in lines[i + 1:]:
+                if entry.startswith("Rss:"):
+                    return int(entry.split()[1])
+    raise AssertionError(f"{name} is not mapped")
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+@pytest.mark.parametrize("kwargs", [dict(prefault=True), dict(huge_pages=True),
+                                    dict(prefault=True, huge_pages=True)])
+def test_round_trip(make_pipe, slots, kwargs):
+    pipe = make_pipe(np.zeros((64, 64)), slots=slots, **kwargs)
+    pipe.send(np.eye(64))
+    assert np.array_equal(poll_recv(pipe), np.eye(64))
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps"), reason="needs /proc/self/smaps")
+def test_prefault_populates_mapping(make_pipe):
+    lazy = make_pipe(np.zeros(1 << 20, dtype=np.uint8), slots=2)
+    eager = make_pipe(np.zeros(1 << 20, dtype=np.uint8), slots=2, prefault=True)
+    assert _resident_kb(eager) >= 2 * 1024
+    assert _resident_kb(lazy) < _resident_kb(eager)
+
+
+def test_prefault_falls_back_to_touching_pages(make_pipe, monkeypatch):
+    # An advice value the kernel rejects stands in for a pre-5.14 kernel.
+    monkeypatch.setattr(core, "_MADV_POPULATE_WRITE", -1)
+    pipe = make_pipe(np.zeros(1 << 16), slots=2, prefault=True)
+    pipe.send(np.ones(1 << 16))
+    assert np.array_equal(poll_recv(pipe), np.ones(1 << 16))
+
+
+def test_huge_pages_skipped_without_shmem_thp(make_pipe, monkeypatch):
+    monkeypatch.setattr(core, "_shmem_thp", lambda: False)
+    pipe = make_pipe(np.zeros(1 << 20), slots=2, huge_pages=True)
+    assert pipe.huge_pages is False
+
+
+@pytest.mark.skipif(not core._shmem_thp(), reason="shared-memory THP is disabled")
+def test_huge_pages_requested(make_pipe):
+    pipe = make_pipe(np.zeros(1 << 20), slots=2, huge_pages=True)
+    assert pipe.huge_pages is True
+
+
+def _recv_sum(pipe, out):
+    pipe.poll(timeout=10)
+    out.put((float(pipe.recv().sum()), pipe.huge_pages))
+
+
+@pytest.mark.parametrize("slots", [None, 2])
+def test_receiver_prepares_its_mapping(slots):
+    pipe = mempipe.MemPipe(slots=slots, prefault=True, huge_pages=True)
+    out = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_recv_sum, args=(pipe, out))
+    proc.start()
+    try:
+        pipe.send(np.ones(1 << 18))
+        total, _ = out.get(timeout=10)
+        assert total == float(1 << 18)
+    finally:
+        proc.join(timeout=10)
+        if proc.is_alive():
+            proc.terminate()
+        pipe.close()
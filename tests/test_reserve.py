@@ -0,0 +1,97 @@
+"""Zero-copy send: reserve() a frame, fill it in place, commit()."""
+
+import multiprocessing
+import queue
+import time
+
+import numpy as np
+import pytest
+
+import mempipe
+from conftest import poll_recv
+
+
+@pytest.mark.parametrize("slots", [None, 1, 3])
+def test_reserve_fills_shared_buffer_in_place(make_pipe, slots):
+    mp = make_pipe(np.zeros((4, 4)), slots=slots)
+    x, y = np.random.rand(4, 4), np.random.rand(4, 4)
+    for _ in range(4):
+        with mp.reserve() as buf:
+            assert buf.flags.writeable
+            np.add(x, y, out=buf)
+        assert np.array_equal(poll_recv(mp), x + y)
+
+
+def test_reserve_then_commit_without_with_block(make_pipe):
+    mp = make_pipe(np.zeros(4), slots=2)
+    res = mp.reserve()
+    res.array[:] = 7.0
+    assert mp.poll(timeout=0) is False
+    mp.commit()
+    assert np.array_equal(poll_recv(mp), np.full(4, 7.0))
+
+
+def test_exception_in_with_block_sends_nothing(make_pipe):
+    mp = make_pipe(np.zeros(4), slots=2)
+    with pytest.raises(RuntimeError):
+        with mp.reserve() as buf:
+            buf[:] = 1.0
+            raise RuntimeError("producer failed")
+    assert mp.poll(timeout=0) is False
+
+    mp.send(np.full(4, 2.0))
+    assert np.array_equal(poll_recv(mp), np.full(4, 2.0))
+
+
+def test_reserve_respects_on_full(make_pipe):
+    mp = make_pipe(np.zeros(4), slots=1, on_full="raise")
+    with mp.reserve() as buf:
+        buf[:] = 1.0
+    with pytest.raises(queue.Full):
+        mp.reserve()
+    assert np.array_equal(poll_recv(mp), np.ones(4))
+    with mp.reserve() as buf:
+        buf[:] = 2.0
+    assert np.array_equal(poll_recv(mp), np.full(4, 2.0))
+
+
+def test_reserve_errors(make_pipe):
+    with pytest.raises(ValueError):
+        make_pipe().reserve()                       # no shape known yet
+
+    mp = make_pipe(np.zeros(4), slots=2)
+    mp.reserve()
+    with pytest.raises(ValueError):
+        mp.reserve()
+    with pytest.raises(ValueError):
+        mp.send(np.ones(4))
+    mp.commit()
+    with pytest.raises(ValueError):
+        mp.commit()
+
+
+def _fill_worker(out_conn, n):
+    for i in range(n):
+        with out_conn.reserve() as buf:
+            buf.fill(i)
+
+
+def test_reserve_across_processes():
+    n = 10
+    mp = mempipe.MemPipe(np.zeros((8, 8), dtype=np.int32), slots=2)
+    proc = multiprocessing.Process(target=_fill_worker, args=(mp, n))
+    proc.start()
+    try:
+        received = []
+        deadline = time.perf_counter() + 10
+        while len(received) < n and time.perf_counter() < deadline:
+            if mp.poll(timeout=0.1):
+                received.append(mp.recv())
+        assert [int(a[0, 0]) for a in received] == list(range(n))
+        assert all((a == a[0, 0]).all() for a in received)
+    finally:
+        proc.join(timeout=2.0)
+        if proc.is_alive():
+            proc.terminate()
+            proc.join(timeout=2.0)
+        mp.close()
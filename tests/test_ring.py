@@ -0,0 +1,127 @@
+"""Ring-buffer mode: MemPipe(ex_array, slots=N) and its on_full policies."""
+
+import multiprocessing
+import queue
+import time
+
+import numpy as np
+import pytest
+
+import mempipe
+from conftest import poll_recv
+
+
+def _frames(n, shape=(4, 4)):
+    return [np.full(shape, float(i)) for i in range(n)]
+
+
+def test_overlapping_sends_are_not_overwritten(make_pipe):
+    """Contrast with test_poll.test_overlapping_sends_share_memory_buffer: with
+    a ring, each queued frame keeps its own slot."""
+    mp = make_pipe(np.zeros((4, 4)), slots=3)
+    sent = _frames(3)
+    for frame in sent:
+        mp.send(frame)
+    for frame in sent:
+        assert np.array_equal(poll_recv(mp), frame)
+    assert mp.poll(timeout=0) is False
+
+
+def test_ring_wraps_around(make_pipe):
+    mp = make_pipe(np.zeros((4, 4)), slots=2)
+    for frame in _frames(7):
+        mp.send(frame)
+        assert np.array_equal(poll_recv(mp), frame)
+
+
+def test_on_full_raise(make_pipe):
+    mp = make_pipe(np.zeros((4, 4)), slots=2, on_full="raise")
+    a, b, c = _frames(3)
+    mp.send(a)
+    mp.send(b)
+    with pytest.raises(queue.Full):
+        mp.send(c)
+    assert np.array_equal(poll_recv(mp), a)
+    mp.send(c)
+    assert np.array_equal(poll_recv(mp), b)
+    assert np.array_equal(poll_recv(mp), c)
+
+
+def test_on_full_drop_discards_oldest(make_pipe):
+    mp = make_pipe(np.zeros((4, 4)), slots=2, on_full="drop")
+    a, b, c = _frames(3)
+    for frame in (a, b, c):
+        mp.send(frame)
+    assert np.array_equal(poll_recv(mp), b)
+    assert np.array_equal(poll_recv(mp), c)
+    assert mp.poll(timeout=0) is False
+
+
+def test_deferred_init_ring(make_pipe):
+    mp = make_pipe(slots=2)
+    a, b = _frames(2, shape=(3, 5))
+    mp.send(a)
+    mp.send(b)
+    assert np.array_equal(poll_recv(mp), a)
+    assert np.array_equal(poll_recv(mp), b)
+
+
+def test_passthrough_keeps_order_with_ring_frames(make_pipe):
+    mp = make_pipe(np.zeros((4, 4)), slots=2)
+    a, b = _frames(2)
+    mp.send(a)
+    mp.send("between")
+    mp.send(b)
+    assert np.array_equal(poll_recv(mp), a)
+    assert poll_recv(mp) == "between"
+    assert np.array_equal(poll_recv(mp), b)
+
+
+def test_poll_without_recv_frees_the_slot(make_pipe):
+    mp = make_pipe(np.zeros((4, 4)), slots=1, on_full="raise")
+    a, b = _frames(2)
+    mp.send(a)
+    assert mp.poll(timeout=1.0) is True
+    mp.send("skip")     # passthrough does not need a slot
+    assert mp.poll(timeout=1.0) is True
+    mp.send(b)          # a's slot was released when its poll was superseded
+    assert mp.recv() == "skip"
+    assert np.array_equal(poll_recv(mp), b)
+
+
+@pytest.mark.parametrize("kwargs", [{"slots": 0}, {"slots": 2, "on_full": "wait"}])
+def test_invalid_ring_arguments(kwargs):
+    with pytest.raises(ValueError):
+        mempipe.MemPipe(np.zeros(4), **kwargs)
+
+
+def _slow_reader(in_conn, out_conn, n):
+    received = []
+    deadline = time.perf_counter() + 30
+    while len(received) < n and time.perf_counter() < deadline:
+        if in_conn.poll(timeout=0.1):
+            received.append(in_conn.recv()[0, 0])
+            time.sleep(0.005)
+    out_conn.send(received)
+
+
+def test_block_policy_across_processes():
+    """A burst larger than the ring blocks the sender instead of corrupting
+    unread frames; the reader sees every frame in order."""
+    n = 20
+    ring = mempipe.MemPipe(np.zeros((4, 4)), slots=3)
+    result = mempipe.MemPipe()
+    proc = multiprocessing.Process(target=_slow_reader, args=(ring, result, n))
+    proc.start()
+    try:
+        for frame in _frames(n):
+            ring.send(frame)
+        assert result.poll(timeout=30) is True
+        assert result.recv() == [float(i) for i in range(n)]
+    finally:
+        proc.join(timeout=2.0)
+        if proc.is_alive():
+            proc.terminate()
+            proc.join(timeout=2.0)
+        ring.close()
+        result.close()
@@ -0,0 +1,181 @@
+"""trace=Tracer(): per-thread event rings in shared memory and the Chrome trace."""
+
+import json
+import multiprocessing
+import os
+import threading
+
+import numpy as np
+import pytest
+
+import mempipe
+from mempipe import trace
+from conftest import poll_recv
+
+
+@pytest.fixture
+def tracer():
+    with mempipe.Tracer(capacity=256, rings=8) as t:
+        yield t
+
+
+def add_one(x):
+    return x + 1
+
+
+def _events(tracer, pipe):
+    recs = tracer.records()
+    recs = recs[recs["pipe"] == pipe._trace_id]
+    return [(trace.EVENTS[int(r["event"])], int(r["seq"]), int(r["n"])) for r in recs]
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+def test_records_send_armed_recv(make_pipe, tracer, slots):
+    pipe = make_pipe(np.zeros(4), slots=slots, trace=tracer)
+    for i in range(2):
+        pipe.send(np.full(4, float(i)))
+        poll_recv(pipe)
+    pipe.send("passthroughs are not traced")
+    poll_recv(pipe)
+    assert _events(tracer, pipe) == [("send", 0, 1), ("armed", 0, 1), ("recv", 0, 1),
+                                     ("send", 1, 1), ("armed", 1, 1), ("recv", 1, 1)]
+    recs = tracer.records()
+    assert (recs["t0_ns"] <= recs["t1_ns"]).all()
+    assert (recs["pid"] == os.getpid()).all()
+
+
+def test_untraced_pipes_record_nothing(make_pipe, tracer):
+    pipe = make_pipe(np.zeros(4), slots=2)
+    pipe.send(np.zeros(4))
+    poll_recv(pipe)
+    assert pipe._tracer is None and len(tracer.records()) == 0
+
+
+def test_pipes_get_their_own_ids(make_pipe, tracer):
+    ids = {make_pipe(np.zeros(4), trace=tracer)._trace_id for _ in range(3)}
+    assert ids == {0, 1, 2}
+
+
+def test_batches_and_reservations(make_pipe, tracer):
+    pipe = make_pipe(np.zeros(8), slots=8, trace=tracer)
+    pipe.send_many(np.ones((5, 8)))
+    with pipe.reserve() as buf:
+        buf[...] = 2.0
+    assert pipe.recv_many(timeout=1.0).shape == (6, 8)
+    events = _events(tracer, pipe)
+    assert ("send", 0, 5) in events and ("send", 5, 1) in events
+    assert events[-1] == ("recv", 0, 6)
+    pipe.send(np.zeros(8))
+    poll_recv(pipe)
+    assert pipe.skipped == 0
+
+
+def test_single_slot_commit_and_drops(make_pipe, tracer):
+    pipe = make_pipe(np.zeros(4), trace=tracer)
+    with pipe.reserve() as buf:
+        buf[...] = 1.0
+    pipe.send(np.zeros(4))
+    assert pipe.poll() and pipe.poll()      # the first frame is dropped
+    pipe.recv()
+    assert _events(tracer, pipe) == [("send", 0, 1), ("send", 1, 1), ("armed", 0, 1),
+                                     ("armed", 1, 1), ("recv", 1, 1)]
+
+
+def test_ring_keeps_the_newest_events(make_pipe):
+    with mempipe.Tracer(capacity=4) as tracer:
+        pipe = make_pipe(np.zeros(4), slots=2, trace=tracer)
+        for i in range(5):
+            pipe.send(np.zeros(4))
+            poll_recv(pipe)
+        assert _events(tracer, pipe)[-3:] == [("send", 4, 1), ("armed", 4, 1), ("recv", 4, 1)]
+        assert len(tracer.records()) <= 4
+
+
+def test_threads_record_into_rings_of_their_own(make_pipe):
+    with mempipe.Tracer(capacity=64, rings=2) as tracer:
+        pipes = [make_pipe(np.zeros(4), slots=2, trace=tracer) for _ in range(3)]
+
+        def use(pipe):
+            pipe.send(np.zeros(4))
+            poll_recv(pipe)
+
+        for pipe in pipes:
+            thread = threading.Thread(target=use, args=(pipe,))
+            thread.start()
+            thread.join()
+        recs = tracer.records()
+        assert len(np.unique(recs["tid"])) == 2 and len(recs) == 6
+        assert tracer.lost_threads == 1
+
+
+def test_unpickled_tracer_shares_the_rings(make_pipe, tracer):
+    fn, args = tracer.__reduce__()
+    assert fn(*args) is tracer
+    # As in a process that has not mapped the tracer yet.
+    del trace._tracers[tracer.name]
+    other = fn(*args)
+    try:
+        assert other is not tracer
+        other._record(0, 7, 3, 10, 20)
+        rec = tracer.records()[-1]
+        assert (rec["pipe"], rec["seq"], rec["t0_ns"], rec["t1_ns"]) == (7, 3, 10, 20)
+    finally:
+        other.close()
+        trace._tracers[tracer.name] = tracer
+
+
+def _send_frames(pipe, n):
+    for i in range(n):
+        pipe.send(np.full(16, float(i)))
+
+
+def test_other_processes_record_into_the_tracer(tracer):
+    pipe = mempipe.MemPipe(np.zeros(16), slots=4, trace=tracer)
+    proc = multiprocessing.Process(target=_send_frames, args=(pipe, 3))
+    proc.start()
+    try:
+        for _ in range(3):
+            poll_recv(pipe, timeout=10.0)
+    finally:
+        proc.join(timeout=10)
+        pipe.close()
+    recs = tracer.records()
+    sends = recs[recs["event"] == trace._TR_SEND]
+    assert list(sends["seq"]) == [0, 1, 2] and (sends["pid"] == proc.pid).all()
+
+
+def test_pipeline_timeline(tmp_path):
+    with mempipe.Tracer() as tracer:
+        with mempipe.Pipeline([add_one, add_one], ex_array=np.zeros(16), trace=tracer) as pipeline:
+            for _ in range(3):
+                pipeline.send(np.zeros(16))
+                poll_recv(pipeline, timeout=10.0)
+        recs = tracer.records()
+        work = recs[recs["event"] == trace._TR_WORK]
+        assert len(work) == 6 and len(np.unique(work["pid"])) == 2
+        path = tmp_path / "trace.json"
+        tracer.dump(path)
+        events = json.loads(path.read_text())["traceEvents"]
+    names = {e["args"]["name"] for e in events if e["name"] == "process_name"}
+    assert any(name.startswith("mempipe-stage-1") for name in names)
+    slices = [e for e in events if e["ph"] == "X"]
+    assert {e["cat"] for e in slices} == {"send -> 0:add_one", "0:add_one -> 1:add_one",
+                                         "1:add_one -> recv"}
+    # An arrow for every frame through each of the three pipes.
+    starts = [e for e in events if e["ph"] == "s"]
+    ends = [e for e in events if e["ph"] == "f"]
+    assert len(starts) == len(ends) == 9
+    assert {e["id"] for e in starts} == {e["id"] for e in ends}
+
+
+def test_close_unlinks(tracer):
+    name = tracer.name
+    tracer.close()
+    assert not os.path.exists(f"/dev/shm/{name}")
+
+
+def test_invalid_sizes():
+    with pytest.raises(ValueError):
+        mempipe.Tracer(capacity=0)
+    with pytest.raises(ValueError):
+        mempipe.Tracer(rings=0)
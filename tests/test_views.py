@@ -0,0 +1,103 @@
+"""Zero-copy receive: recv(copy=False), release() and recv_view()."""
+
+import queue
+import threading
+
+import numpy as np
+import pytest
+
+
+def _poll_view(pipe):
+    assert pipe.poll(timeout=1.0) is True
+    return pipe.recv(copy=False)
+
+
+def test_view_aliases_shared_memory_and_is_read_only(make_pipe):
+    mp = make_pipe(np.zeros((4, 4)), slots=2)
+    sent = np.random.rand(4, 4)
+    mp.send(sent)
+
+    view = _poll_view(mp)
+    assert np.array_equal(view, sent)
+    assert np.shares_memory(view, mp._ring)
+    with pytest.raises(ValueError):
+        view[0, 0] = 1.0
+    mp.release()
+
+
+def test_held_view_keeps_its_slot(make_pipe):
+    mp = make_pipe(np.zeros(4), slots=1, on_full="raise")
+    mp.send(np.ones(4))
+    view = _poll_view(mp)
+    with pytest.raises(queue.Full):
+        mp.send(np.zeros(4))
+    assert np.array_equal(view, np.ones(4))
+
+    mp.release()
+    mp.send(np.zeros(4))
+
+
+def test_slots_are_released_in_order(make_pipe):
+    mp = make_pipe(np.zeros(4), slots=2, on_full="raise")
+    mp.send(np.full(4, 1.0))
+    mp.send(np.full(4, 2.0))
+
+    first = _poll_view(mp)
+    assert mp.poll(timeout=1.0) is True
+    second = mp.recv()              # a copy, but its slot sits behind `first`
+    assert np.array_equal(second, np.full(4, 2.0))
+    with pytest.raises(queue.Full):
+        mp.send(np.full(4, 3.0))
+
+    assert np.array_equal(first, np.full(4, 1.0))
+    mp.release()                    # frees both slots
+    mp.send(np.full(4, 3.0))
+    mp.send(np.full(4, 4.0))
+
+
+def test_recv_view_context_manager_releases(make_pipe):
+    mp = make_pipe(np.zeros(4), slots=1, on_full="raise")
+    for i in range(3):
+        mp.send(np.full(4, float(i)))
+        assert mp.poll(timeout=1.0) is True
+        with mp.recv_view() as view:
+            assert view.sum() == 4 * i
+
+
+def test_recv_view_passes_passthrough_values_through(make_pipe):
+    mp = make_pipe(np.zeros(4), slots=1)
+    mp.send("hello")
+    assert mp.poll(timeout=1.0) is True
+    with mp.recv_view() as value:
+        assert value == "hello"
+
+
+def test_release_without_view_raises(make_pipe):
+    mp = make_pipe(np.zeros(4), slots=1)
+    with pytest.raises(ValueError):
+        mp.release()
+
+
+def test_drop_mode_view_is_a_private_copy(make_pipe):
+    mp = make_pipe(np.zeros(4), slots=1, on_full="drop")
+    mp.send(np.ones(4))
+    data = _poll_view(mp)
+    mp.send(np.zeros(4))            # overwrites the only slot
+    assert np.array_equal(data, np.ones(4))
+
+
+def test_single_slot_view_blocks_sender_until_release(make_pipe):
+    mp = make_pipe(np.zeros(4))
+    mp.send(np.ones(4))
+    view = _poll_view(mp)
+
+    sender = threading.Thread(target=mp.send, args=(np.zeros(4),))
+    sender.start()
+    sender.join(timeout=0.1)
+    assert sender.is_alive()
+    assert np.array_equal(view, np.ones(4))
+
+    mp.release()
+    sender.join(timeout=1.0)
+    assert not sender.is_alive()
+    assert np.array_equal(mp.recv() if mp.poll(timeout=1.0) else None, np.zeros(4))
@@ -0,0 +1,124 @@
+"""mempipe.wait(): select-style waiting across several pipes."""
+
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import mempipe
+
+
+def test_wait_returns_only_ready_pipes(make_pipe):
+    pipes = [make_pipe(np.zeros(4), slots=s) for s in (None, 4, None, 4)]
+    pipes[1].send(np.ones(4))
+    pipes[2].send(np.full(4, 2.0))
+
+    assert mempipe.wait(pipes, timeout=1.0) == [pipes[1], pipes[2]]
+    assert np.array_equal(pipes[1].recv(), np.ones(4))
+    assert np.array_equal(pipes[2].recv(), np.full(4, 2.0))
+    assert mempipe.wait(pipes, timeout=0) == []
+
+
+def test_wait_times_out(make_pipe):
+    pipes = [make_pipe(np.zeros(4), slots=4), make_pipe(np.zeros(4))]
+    t0 = time.perf_counter()
+    assert mempipe.wait(pipes, timeout=0.05) == []
+    assert 0.03 <= time.perf_counter() - t0 < 1.0
+    for pipe in pipes:
+        assert pipe._slots is None or pipe._rdr[mempipe.mempipe._RDR_WAITING] == 0
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+def test_wait_wakes_on_send(make_pipe, slots):
+    pipes = [make_pipe(np.zeros(4), slots=slots) for _ in range(3)]
+    timer = threading.Timer(0.05, pipes[2].send, (np.ones(4),))
+    timer.start()
+    try:
+        assert mempipe.wait(pipes, timeout=5.0) == [pipes[2]]
+    finally:
+        timer.join()
+    assert np.array_equal(pipes[2].recv(), np.ones(4))
+
+
+def test_wait_keeps_armed_message(make_pipe):
+    """A message armed by poll() before wait() is not dropped."""
+    pipe = make_pipe(np.zeros(4), slots=4)
+    pipe.send(np.ones(4))
+    pipe.send(np.full(4, 2.0))
+    assert pipe.poll()
+    assert mempipe.wait([pipe], timeout=0) == [pipe]
+    assert np.array_equal(pipe.recv(), np.ones(4))
+    assert mempipe.wait([pipe], timeout=0) == [pipe]
+    assert np.array_equal(pipe.recv(), np.full(4, 2.0))
+
+
+def test_wait_never_loses_messages(make_pipe):
+    pipes = [make_pipe(np.zeros(2), slots=2) for _ in range(2)]
+    pipes[0].send(np.zeros(2))
+    pipes[0].send("text")
+    pipes[1].send(np.ones(2))
+
+    got = {0: [], 1: []}
+    while True:
+        ready = mempipe.wait(pipes, timeout=0.05)
+        if not ready:
+            break
+        for pipe in ready:
+            got[pipes.index(pipe)].append(pipe.recv())
+    assert [type(m) for m in got[0]] == [np.ndarray, str]
+    assert len(got[1]) == 1
+
+
+def test_wait_on_broadcast_readers(make_bc):
+    bc = make_bc(np.zeros(4), n_readers=2, slots=2)
+    bc.send(np.ones(4))
+    assert mempipe.wait(bc.readers, timeout=1.0) == list(bc.readers)
+
+
+def _feed(pipes):
+    for i, pipe in enumerate(pipes):
+        for j in range(20):
+            pipe.send(np.full(8, float(100 * i + j)))
+        pipe.close()
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+def test_wait_reports_hung_up_sender(slots):
+    pipes = [mempipe.MemPipe(np.zeros(8), slots=slots) for _ in range(3)]
+    proc = multiprocessing.Process(target=_feed, args=(pipes,))
+    proc.start()
+    for pipe in pipes:
+        pipe.close_send_end()
+    open_pipes, n_frames = list(pipes), 0
+    try:
+        deadline = time.perf_counter() + 30
+        while open_pipes and time.perf_counter() < deadline:
+            for pipe in mempipe.wait(open_pipes, timeout=1.0):
+                try:
+                    pipe.recv()
+                    n_frames += 1
+                except EOFError:
+                    open_pipes.remove(pipe)
+    finally:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
+        for pipe in pipes:
+            pipe.close()
+    assert open_pipes == []
+    if slots is not None:
+        assert n_frames == 60
+
+
+@pytest.mark.parametrize("slots", [None, 4])
+def test_close_send_end_lets_the_receiver_see_eof(make_pipe, slots):
+    pipe = make_pipe(np.zeros(8), slots=slots)
+    pipe.send(np.ones(8))
+    pipe.close_send_end()
+    assert mempipe.wait([pipe], timeout=1.0) == [pipe]
+    assert np.array_equal(pipe.recv(), np.ones(8))
+    assert mempipe.wait([pipe], timeout=1.0) == [pipe]
+    with pytest.raises(EOFError):
+        pipe.recv()